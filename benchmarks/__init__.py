@@ -0,0 +1,4 @@
+import os
+
+# 基准测试在无桌面的机器上运行，光标后端固定为内存中的虚拟屏幕
+os.environ.setdefault("VISION_MOUSE_ACTUATOR", "virtual")
@@ -0,0 +1,144 @@
+"""
+/camera/test 的压力测试：打开若干路视频流的同时请求 /camera/state，对比其他接口的响应延迟；
+所有连接共用一个模拟的摄像头，cap.read 阻塞到下一帧，统计每路收到的帧数和摄像头的读取次数。
+--blocking 时对比原来每个连接在事件循环里自己读取摄像头的写法
+
+python -m benchmarks.bench_camera_stream --streams 4 --format jpeg
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from contextlib import ExitStack
+
+import numpy as np
+
+from fastapi import WebSocket
+from fastapi.testclient import TestClient
+
+from controllers.flows.broadcast import frame_broadcaster
+from controllers.types import FrameTuple
+from server import app
+
+
+class FakeCamera:
+    def __init__(self, fps: float) -> None:
+        """
+        与真实摄像头一样只有一个设备：每帧只能被一次 read 取走，同时读取的调用排队等待下一帧
+        """
+        self.interval = 1 / fps
+        self.frame = np.random.randint(0, 255, (720, 1280, 3), np.uint8)
+        self.reads = 0
+        self._next = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def read(self, auto_open: bool = False) -> FrameTuple:
+        with self._lock:
+            self._next = max(self._next + self.interval, time.perf_counter())
+            time.sleep(max(self._next - time.perf_counter(), 0))
+            self.reads += 1
+        return FrameTuple(self.frame, 1280, 720, time.time())
+
+
+camera = FakeCamera(30)
+
+
+@app.websocket("/bench/blocking")
+async def blocking_camera(ws: WebSocket):
+    """
+    原来的 /camera/test：每个连接在 async 函数里直接阻塞读取共用的摄像头
+    """
+    await ws.accept()
+    disconnect = asyncio.ensure_future(ws.receive())
+    while not disconnect.done():
+        frame = camera.read()
+        await ws.send_bytes(frame.frame.tobytes())
+
+
+def measure(client: TestClient, requests: int) -> list[float]:
+    res = []
+    for _ in range(requests):
+        t_start = time.perf_counter()
+        client.get("/camera/state")
+        res.append((time.perf_counter() - t_start) * 1000)
+    return res
+
+
+def run(client: TestClient, path: str, streams: int, requests: int):
+    stop = threading.Event()
+    received = [0] * streams
+    frames = [0] * streams
+
+    def read(idx: int, ws):
+        while not stop.is_set():
+            msg = ws.receive()
+            data = msg.get("bytes")
+            if data:
+                received[idx] += len(data)
+                frames[idx] += 1
+
+    with ExitStack() as stack:
+        threads = []
+        for idx in range(streams):
+            ws = stack.enter_context(client.websocket_connect(path))
+            thread = threading.Thread(target=read, args=(idx, ws), daemon=True)
+            thread.start()
+            threads.append(thread)
+        reads = camera.reads
+        t_start = time.perf_counter()
+        latency = measure(client, requests)
+        cost = time.perf_counter() - t_start
+        reads = camera.reads - reads
+        stop.set()
+        for thread in threads:
+            thread.join(2)
+    stream_fps = min(frames) / cost if frames else 0.0
+    return latency, sum(received) / cost, stream_fps, reads / cost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--format", default="jpeg")
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--camera-fps", type=float, default=30)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+
+    global camera
+    camera = FakeCamera(args.camera_fps)
+    frame_broadcaster.source = camera
+    frame_broadcaster.is_flow_running = lambda: False
+    path = f"/camera/test?format={args.format}&fps={args.fps}"
+    cases = [
+        ("idle", "", 0, args.requests),
+        (f"{args.format} x{args.streams}", path, args.streams, args.requests),
+    ]
+    if args.blocking:
+        # 每个请求都要等上接近一秒，只测 20 次
+        cases.append((f"blocking x{args.streams}", "/bench/blocking", args.streams, 20))
+
+    print(f"GET /camera/state while streaming, camera {args.camera_fps} fps")
+    print(
+        f"{'case':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'MB/s':>10}"
+        f"{'min fps':>10}{'reads/s':>10}"
+    )
+    with TestClient(app) as client:
+        for name, path, streams, requests in cases:
+            latency, rate, stream_fps, read_rate = run(client, path, streams, requests)
+            latency.sort()
+            p95 = latency[int(len(latency) * 0.95) - 1]
+            # min fps 是最慢一路每秒收到的帧数，共用读取时每路都接近目标帧率
+            print(
+                f"{name:<16}{statistics.median(latency):>10.2f}{p95:>10.2f}"
+                f"{latency[-1]:>10.2f}{rate / 1e6:>10.2f}"
+                f"{stream_fps:>10.1f}{read_rate:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+对比 run_flow 解释执行和 compile_flow 生成的静态执行表
+
+python -m benchmarks.bench_compiled_flow --frames 3000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from typing import Any, Callable
+
+from controllers.flows.compiler import compile_flow
+from controllers.flows.node import FlowNode, FlowNodeBase, run_flow
+from controllers.hand_info import HandInfo
+from controllers.recording import hand_info_from_dict
+
+from benchmarks.replay import connect_control_graph
+from benchmarks.synthetic import gen_synthetic_hand
+
+
+class MemoryLandMarkNode(FlowNodeBase[Any, list[HandInfo]]):
+    def __init__(self, frames: int) -> None:
+        super().__init__()
+        self.hands = [
+            [hand_info_from_dict(gen_synthetic_hand(i))] for i in range(frames)
+        ]
+        self.idx = 0
+
+    def forward(self, _in: Any) -> list[HandInfo]:
+        hands = self.hands[self.idx]
+        self.idx = (self.idx + 1) % len(self.hands)
+        for hand in hands:
+            hand.match_cache = None
+        self.output = hands
+        return hands
+
+
+def build_graph(frames: int, automaton: bool = True) -> FlowNode:
+    start_node = MemoryLandMarkNode(frames)
+    connect_control_graph(start_node, automaton)
+    return start_node
+
+
+def measure(run: Callable[[], None], frames: int) -> float:
+    for _ in range(100):
+        run()
+    gc.collect()
+    gc.disable()
+    try:
+        t_start = time.perf_counter()
+        for _ in range(frames):
+            run()
+        elapsed = time.perf_counter() - t_start
+    finally:
+        gc.enable()
+    return elapsed / frames * 1e6
+
+
+def measure_transient(run: Callable[[], None], frames: int) -> float:
+    """
+    每帧执行期间相对于开始时多占用的内存峰值，反映执行器每帧创建的临时容器
+    """
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(frames):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            run()
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total / frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    interpreter = build_graph(args.frames, automaton=False)
+    plan = compile_flow(build_graph(args.frames, automaton=False))
+    automaton_plan = compile_flow(build_graph(args.frames))
+
+    runs: dict[str, Callable[[], None]] = {
+        "run_flow": lambda: run_flow(interpreter, None),
+        "compiled": lambda: plan.run(None),
+        "automaton": lambda: automaton_plan.run(None),
+    }
+
+    print(
+        f"{len(plan)} steps with gesture subgraphs, "
+        f"{len(automaton_plan)} steps with the gesture automaton, "
+        f"{args.frames} frames x {args.repeat}"
+    )
+    print(f"{'executor':<12}{'best us/frame':>16}{'transient bytes/frame':>24}")
+    for name, run in runs.items():
+        best = min(measure(run, args.frames) for _ in range(args.repeat))
+        transient = measure_transient(run, min(args.frames, 500))
+        print(f"{name:<12}{best:>16.2f}{transient:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+对比 filter 包中各个窗口滤波器每次 push 的耗时
+
+python -m benchmarks.bench_filter --pushes 20000
+"""
+
+import argparse
+import time
+
+from typing import Any, Callable
+
+import numpy as np
+
+from filter import (
+    BatchEwmaFilter,
+    BatchRunningMeanFilter,
+    EwmaFilter,
+    RunningMeanFilter,
+    RunningVarianceFilter,
+    SlidingWindowMeanFilter,
+)
+
+
+def measure(push: Callable[[Any], Any], data: list[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        for it in data:
+            push(it)
+        best = min(best, time.perf_counter() - t_start)
+    return best / len(data) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pushes", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--streams", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = [tuple(p) for p in rng.normal(0, 10, (args.pushes, 2)).tolist()]
+    window = args.window
+
+    single: dict[str, Callable[[Any], Any]] = {
+        "SlidingWindowMeanFilter": SlidingWindowMeanFilter(window).push,
+        "RunningMeanFilter": RunningMeanFilter(window).push,
+        "RunningVarianceFilter": RunningVarianceFilter(window).push,
+        "EwmaFilter": EwmaFilter(2 / (window + 1)).push,
+    }
+    print(f"single stream, window {window}, {args.pushes} pushes")
+    print(f"{'filter':<28}{'best us/push':>14}")
+    for name, push in single.items():
+        print(f"{name:<28}{measure(push, points, args.repeat):>14.3f}")
+
+    # 例如两只手的全部关键点：每一路是一个 (x, y)
+    streams = args.streams
+    frames = rng.normal(0, 10, (args.pushes // 10, streams, 2))
+    frame_list = list(frames)
+    per_stream = [RunningMeanFilter(window) for _ in range(streams)]
+    per_stream_lists = [[tuple(p) for p in frame.tolist()] for frame in frame_list]
+
+    def push_each(frame: list[tuple[float, float]]):
+        for f, p in zip(per_stream, frame):
+            f.push(p)
+
+    batch: dict[str, tuple[Callable[[Any], Any], list[Any]]] = {
+        "RunningMeanFilter x N": (push_each, per_stream_lists),
+        "BatchRunningMeanFilter": (
+            BatchRunningMeanFilter(window, (streams, 2)).push,
+            frame_list,
+        ),
+        "BatchEwmaFilter": (
+            BatchEwmaFilter(2 / (window + 1), (streams, 2)).push,
+            frame_list,
+        ),
+    }
+    print(f"\n{streams} streams, {len(frame_list)} frames")
+    print(f"{'filter':<28}{'best us/frame':>14}")
+    for name, (push, data) in batch.items():
+        print(f"{name:<28}{measure(push, data, args.repeat):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
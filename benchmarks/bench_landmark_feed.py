@@ -0,0 +1,62 @@
+"""
+对比 /flow/landMark/feed 的 json 和二进制差分两种格式每秒的字节数和编码耗时
+
+python -m benchmarks.bench_landmark_feed --frames 900 --hands 2
+"""
+
+import argparse
+import json
+import time
+
+from controllers.hand_info import HandInfo
+from controllers.landmark_codec import LandmarkEncoder, landmark_json
+from controllers.recording import hand_info_from_dict
+
+from benchmarks.synthetic import gen_synthetic_hand
+
+
+def gen_frames(frames: int, hands: int) -> list[list[HandInfo]]:
+    return [
+        [hand_info_from_dict(gen_synthetic_hand(idx + i * 200)) for i in range(hands)]
+        for idx in range(frames)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=900)
+    parser.add_argument("--hands", type=int, default=2)
+    parser.add_argument("--fps", type=float, default=30)
+    args = parser.parse_args()
+
+    data = gen_frames(args.frames, args.hands)
+
+    def encode_json(seq: int, hands: list[HandInfo]) -> bytes:
+        # 与 starlette 的 send_json 相同的序列化方式
+        res = landmark_json(hands, hands[0])
+        return json.dumps(res, separators=(",", ":")).encode()
+
+    encoder = LandmarkEncoder()
+
+    def encode_binary(seq: int, hands: list[HandInfo]) -> bytes:
+        return encoder.encode(seq, hands, hands[0], 1280, 720)
+
+    print(f"{args.frames} frames, {args.hands} hands + current hand, {args.fps} fps")
+    print(
+        f"{'format':<10}{'bytes/frame':>14}{'KB/s':>10}{'us/frame':>12}{'cpu ms/s':>12}"
+    )
+    for name, encode in (("json", encode_json), ("binary", encode_binary)):
+        total = 0
+        t_start = time.perf_counter()
+        for seq, hands in enumerate(data):
+            total += len(encode(seq, hands))
+        cost = (time.perf_counter() - t_start) / len(data)
+        per_frame = total / len(data)
+        print(
+            f"{name:<10}{per_frame:>14.1f}{per_frame * args.fps / 1024:>10.1f}"
+            f"{cost * 1e6:>12.1f}{cost * args.fps * 1000:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
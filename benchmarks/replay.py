@@ -0,0 +1,197 @@
+"""
+离线回放基准测试，不需要摄像头和桌面环境
+
+python -m benchmarks.replay --synthetic 900
+python -m benchmarks.replay --landmarks session.jsonl
+python -m benchmarks.replay --video session.mp4
+python -m benchmarks.replay --images ./frames
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable
+
+from controllers.flows.automaton import GestureAutomatonNode
+from controllers.flows.control_flow import (
+    gen_all_cursor_control_node,
+    gesture_handle_set,
+)
+from controllers.flows.node import (
+    CameraNode,
+    CursorMoveHandleNode,
+    FlowNode,
+    GestureRecognizeNode,
+    LandMarkFilterNode,
+    LandMarkSmoothNode,
+    RecordedLandMarkNode,
+    run_flow,
+)
+from controllers.flows.profiler import flow_profiler
+from controllers.recording import (
+    EndOfRecording,
+    HandInfoRecordSource,
+    ImageDirSource,
+    VideoFileSource,
+)
+
+from benchmarks.synthetic import write_synthetic_recording
+
+GraphFactory = Callable[[], FlowNode]
+
+
+def connect_control_graph(model_node: FlowNode, automaton: bool = True):
+    """
+    与 flows.flow.init_graph 相同的下游结构：过滤 -> 光标移动 + 手势状态机（或每个映射一个子图）
+    """
+    hands_filter_node = LandMarkFilterNode()
+    smooth_node = LandMarkSmoothNode()
+    model_node.add_next(hands_filter_node)
+    hands_filter_node.add_next(smooth_node)
+    smooth_node.add_next(CursorMoveHandleNode())
+    if automaton:
+        smooth_node.add_next(GestureAutomatonNode(gesture_handle_set))
+    else:
+        for control_node in gen_all_cursor_control_node():
+            smooth_node.add_next(control_node)
+
+
+def frame_graph_factory(source_factory: Callable[[], Any]) -> GraphFactory:
+    def build() -> FlowNode:
+        camera_node = CameraNode(source_factory())
+        model_node = GestureRecognizeNode()
+        camera_node.add_next(model_node)
+        connect_control_graph(model_node)
+        return camera_node
+
+    return build
+
+
+def landmark_graph_factory(path: str) -> GraphFactory:
+    def build() -> FlowNode:
+        start_node = RecordedLandMarkNode(HandInfoRecordSource(path))
+        connect_control_graph(start_node)
+        return start_node
+
+    return build
+
+
+def replay(start_node: FlowNode, max_frames: int) -> tuple[int, float]:
+    start_node.init()
+    frames = 0
+    t_start = time.perf_counter()
+    try:
+        while frames < max_frames:
+            run_flow(start_node, None)
+            frames += 1
+    except EndOfRecording:
+        pass
+    finally:
+        elapsed = time.perf_counter() - t_start
+        start_node.clean_effect()
+    return frames, elapsed
+
+
+def flatten_tree(tree: dict[str, Any], depth: int = 0) -> list[tuple[int, dict]]:
+    res = [(depth, tree)]
+    for child in tree.get("inner", []):
+        res.extend(flatten_tree(child, depth + 1))
+    for child in tree.get("next", []):
+        res.extend(flatten_tree(child, depth + 1))
+    return res
+
+
+def run_benchmark(build: GraphFactory, max_frames: int) -> dict[str, Any]:
+    frames, elapsed = replay(build(), max_frames)
+    result: dict[str, Any] = {
+        "frames": frames,
+        "seconds": round(elapsed, 4),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+    flow_profiler.reset()
+    flow_profiler.enabled = True
+    start_node = build()
+    try:
+        replay(start_node, max_frames)
+        result["profile"] = flow_profiler.report([start_node])["graphs"][0]
+    finally:
+        flow_profiler.enabled = False
+        flow_profiler.reset()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        alloc_frames, _ = replay(build(), max_frames)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "lineno")
+    result["allocations"] = {
+        "peakKb": round(peak / 1024, 2),
+        "retainedKb": round(sum(d.size_diff for d in diff) / 1024, 2),
+        "blocksPerFrame": round(
+            sum(max(d.count_diff, 0) for d in diff) / max(alloc_frames, 1), 2
+        ),
+        "top": [str(d) for d in diff[:5]],
+    }
+    return result
+
+
+def print_result(result: dict[str, Any]):
+    print(f"frames: {result['frames']}  fps: {result['fps']}")
+    print(f"{'node':<56}{'calls':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for depth, node in flatten_tree(result["profile"]["tree"]):
+        name = "  " * depth + node["name"]
+        if node["calls"] == 0:
+            print(f"{name:<56}{0:>8}")
+            continue
+        print(
+            f"{name:<56}{node['calls']:>8}{node['meanMs']:>10.4f}"
+            f"{node['p50Ms']:>10.4f}{node['p95Ms']:>10.4f}{node['p99Ms']:>10.4f}"
+        )
+    alloc = result["allocations"]
+    print(
+        f"allocations: peak {alloc['peakKb']} KB, retained {alloc['retainedKb']} KB,"
+        f" {alloc['blocksPerFrame']} retained blocks/frame"
+    )
+    for line in alloc["top"]:
+        print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a recording through the flow")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="video file recorded from the camera")
+    source.add_argument("--images", help="directory of jpeg/png frames")
+    source.add_argument("--landmarks", help="jsonl written by HandInfoRecorder")
+    source.add_argument("--synthetic", type=int, help="generate N synthetic frames")
+    parser.add_argument("--frames", type=int, default=10**9)
+    parser.add_argument("--json", help="write the result to this file")
+    args = parser.parse_args()
+
+    if args.video:
+        build = frame_graph_factory(lambda: VideoFileSource(args.video))
+    elif args.images:
+        build = frame_graph_factory(lambda: ImageDirSource(args.images))
+    elif args.landmarks:
+        build = landmark_graph_factory(args.landmarks)
+    else:
+        path = os.path.join(tempfile.gettempdir(), "vision_mouse_synthetic.jsonl")
+        write_synthetic_recording(path, args.synthetic)
+        build = landmark_graph_factory(path)
+
+    result = run_benchmark(build, args.frames)
+    print_result(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import json
+import math
+import time
+
+from controllers.hand_info import Gesture, HandInfo, LandMark
+from controllers.types import FrameTuple
+
+
+def gen_synthetic_hand(idx: int, width: int = 1280, height: int = 720) -> dict:
+    """
+    生成一只绕圈移动的手，每 45 帧做一次食指和拇指的捏合
+    """
+    cx = width / 2 + 200 * math.cos(idx / 30)
+    cy = height / 2 + 120 * math.sin(idx / 30)
+    pos = [[cx + (i % 5) * 12 - 24, cy + (i // 5) * 10 - 20, 0.0] for i in range(21)]
+    pos[LandMark.WRIST] = [cx, cy + 100, 0.0]
+    pos[LandMark.MIDDLE_FINGER_MCP] = [cx, cy, 0.0]
+    for tip, dx in (
+        (LandMark.INDEX_FINGER_TIP, -40),
+        (LandMark.MIDDLE_FINGER_TIP, 0),
+        (LandMark.RING_FINGER_TIP, 30),
+        (LandMark.PINKY_TIP, 60),
+    ):
+        pos[tip] = [cx + dx, cy - 90, 0.0]
+    pinch = (idx // 45) % 2 == 1
+    pos[LandMark.THUMB_TIP] = [cx - 38, cy - 88, 0.0] if pinch else [cx - 80, cy, 0.0]
+    return {"pos": pos, "size": [width, height], "time": idx / 30, "gesture": None}
+
+
+def write_synthetic_recording(path: str, frames: int):
+    with open(path, "w", encoding="utf-8") as file:
+        for idx in range(frames):
+            file.write(json.dumps({"hands": [gen_synthetic_hand(idx)]}) + "\n")
+
+
+class SyntheticHandModel:
+    """
+    代替 mediapipe 模型：画面左上角像素的值作为帧号，返回该帧的合成手，
+    用于测试和压测模型进程，不需要模型文件
+    """
+
+    def forward(self, frame: FrameTuple) -> list[HandInfo]:
+        idx = int(frame.frame[0, 0, 0])
+        data = gen_synthetic_hand(idx, *frame.full_size)
+        return [
+            HandInfo(
+                data["pos"], frame.full_size, time.time(), Gesture.Victory, frame.ctime
+            )
+        ]
+
+    def close(self):
+        pass
@@ -0,0 +1,344 @@
+import importlib
+import os
+import sys
+import threading
+import time
+import weakref
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Protocol
+
+from controllers.flows.profiler import NodeLatency
+
+from utils import logger
+
+SYS_PLATFORM = sys.platform
+
+
+class Actuator(Protocol):
+    name: str
+
+    def position(self) -> tuple[int, int]: ...
+
+    def move_to(self, x: int, y: int): ...
+
+    def click(self, x: int, y: int, button: str): ...
+
+    def mouse_down(self, x: int, y: int, button: str): ...
+
+    def mouse_up(self, x: int, y: int, button: str): ...
+
+    def vscroll(self, clicks: int, x: int, y: int): ...
+
+
+class PyAutoGuiActuator:
+    def __init__(self, name: str, module: str) -> None:
+        """
+        直接调用 pyautogui 各平台的底层实现，跳过 pyautogui 公共 api 的 pause 和安全检查
+        """
+        self.name = name
+        backend = importlib.import_module(module)
+        self._position = backend._position
+        self._moveTo = backend._moveTo
+        self._click = backend._click
+        self._mouseDown = backend._mouseDown
+        self._mouseUp = backend._mouseUp
+        self._vscroll = backend._vscroll
+
+    def position(self) -> tuple[int, int]:
+        return self._position()
+
+    def move_to(self, x: int, y: int):
+        self._moveTo(x, y)
+
+    def click(self, x: int, y: int, button: str):
+        self._click(x, y, button)
+
+    def mouse_down(self, x: int, y: int, button: str):
+        self._mouseDown(x, y, button)
+
+    def mouse_up(self, x: int, y: int, button: str):
+        self._mouseUp(x, y, button)
+
+    def vscroll(self, clicks: int, x: int, y: int):
+        self._vscroll(clicks, x, y)
+
+
+def screen_size() -> tuple[int, int]:
+    """
+    uinput 和虚拟屏幕无法获取屏幕大小，通过环境变量 VISION_MOUSE_SCREEN 指定，如 2560x1440
+    """
+    env = os.getenv("VISION_MOUSE_SCREEN", "1920x1080")
+    try:
+        width, height = (int(it) for it in env.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"invalid VISION_MOUSE_SCREEN {env}, expect WIDTHxHEIGHT")
+    if width <= 0 or height <= 0:
+        raise ValueError(f"invalid VISION_MOUSE_SCREEN {env}, expect WIDTHxHEIGHT")
+    return width, height
+
+
+class UInputActuator:
+    def __init__(self, width: int | None = None, height: int | None = None) -> None:
+        """
+        通过 /dev/uinput 创建一个绝对坐标的虚拟指针设备，不依赖 X11，Wayland 下也可用；
+        uinput 无法读取系统光标位置，位置由自己记录。不指定大小时使用 screen_size()
+        """
+        from evdev import AbsInfo, UInput, ecodes
+
+        if width is None or height is None:
+            width, height = screen_size()
+
+        self.name = "uinput"
+        self._ecodes = ecodes
+        self._pos = (0, 0)
+        self.device = UInput(
+            {
+                ecodes.EV_KEY: [ecodes.BTN_LEFT, ecodes.BTN_RIGHT],
+                ecodes.EV_ABS: [
+                    (ecodes.ABS_X, AbsInfo(0, 0, width - 1, 0, 0, 0)),
+                    (ecodes.ABS_Y, AbsInfo(0, 0, height - 1, 0, 0, 0)),
+                ],
+                ecodes.EV_REL: [ecodes.REL_WHEEL],
+            },
+            name="vision-mouse",
+        )
+
+    def _button(self, button: str) -> int:
+        return self._ecodes.BTN_RIGHT if button == "right" else self._ecodes.BTN_LEFT
+
+    def position(self) -> tuple[int, int]:
+        return self._pos
+
+    def move_to(self, x: int, y: int):
+        ecodes = self._ecodes
+        self.device.write(ecodes.EV_ABS, ecodes.ABS_X, x)
+        self.device.write(ecodes.EV_ABS, ecodes.ABS_Y, y)
+        self.device.syn()
+        self._pos = (x, y)
+
+    def _press(self, button: str, value: int):
+        self.device.write(self._ecodes.EV_KEY, self._button(button), value)
+        self.device.syn()
+
+    def click(self, x: int, y: int, button: str):
+        self.move_to(x, y)
+        self._press(button, 1)
+        self._press(button, 0)
+
+    def mouse_down(self, x: int, y: int, button: str):
+        self.move_to(x, y)
+        self._press(button, 1)
+
+    def mouse_up(self, x: int, y: int, button: str):
+        self.move_to(x, y)
+        self._press(button, 0)
+
+    def vscroll(self, clicks: int, x: int, y: int):
+        self.move_to(x, y)
+        self.device.write(self._ecodes.EV_REL, self._ecodes.REL_WHEEL, clicks)
+        self.device.syn()
+
+
+class ActuatorEvent(NamedTuple):
+    time: float
+    kind: str
+    x: int
+    y: int
+    detail: Any = None
+
+
+class VirtualScreenActuator:
+    def __init__(self, width: int = 1920, height: int = 1080, max_events=10000):
+        """
+        只存在于内存中的屏幕，记录带时间戳的光标事件，用于无桌面环境下的测试和压测
+        """
+        self.name = "virtual"
+        self.width = width
+        self.height = height
+        self.events: deque[ActuatorEvent] = deque(maxlen=max_events)
+        self.buttons: set[str] = set()
+        self._pos = (0, 0)
+
+    def _record(self, kind: str, x: int, y: int, detail: Any = None):
+        x = min(max(int(x), 0), self.width - 1)
+        y = min(max(int(y), 0), self.height - 1)
+        self._pos = (x, y)
+        self.events.append(ActuatorEvent(time.perf_counter(), kind, x, y, detail))
+
+    def position(self) -> tuple[int, int]:
+        return self._pos
+
+    def move_to(self, x: int, y: int):
+        self._record("move", x, y)
+
+    def click(self, x: int, y: int, button: str):
+        self._record("click", x, y, button)
+
+    def mouse_down(self, x: int, y: int, button: str):
+        self.buttons.add(button)
+        self._record("down", x, y, button)
+
+    def mouse_up(self, x: int, y: int, button: str):
+        self.buttons.discard(button)
+        self._record("up", x, y, button)
+
+    def vscroll(self, clicks: int, x: int, y: int):
+        self._record("scroll", x, y, clicks)
+
+
+def _create_x11() -> Actuator:
+    return PyAutoGuiActuator("x11", "pyautogui._pyautogui_x11")
+
+
+_factories: dict[str, Callable[[], Actuator]] = {
+    "virtual": lambda: VirtualScreenActuator(*screen_size()),
+    "uinput": UInputActuator,
+    "x11": _create_x11,
+    "win32": lambda: PyAutoGuiActuator("win32", "pyautogui._pyautogui_win"),
+    "darwin": lambda: PyAutoGuiActuator("darwin", "pyautogui._pyautogui_osx"),
+}
+
+
+def create_actuator(name: str) -> Actuator:
+    if name not in _factories:
+        raise ValueError(f"unknown actuator {name}")
+    return _factories[name]()
+
+
+def _default_actuator_names() -> list[str]:
+    env = os.getenv("VISION_MOUSE_ACTUATOR")
+    if env:
+        return [env]
+    if SYS_PLATFORM.startswith("win32"):
+        return ["win32"]
+    if SYS_PLATFORM.startswith("darwin"):
+        return ["darwin"]
+    names = ["x11"] if os.getenv("DISPLAY") else []
+    return names + ["uinput", "virtual"]
+
+
+class ActuatorManager:
+    def __init__(self, ring_size: int = 512) -> None:
+        """
+        光标后端的统一入口，对同一个后端的调用在该后端的锁内执行，不同后端互不阻塞，
+        并按后端分别统计每种操作的耗时
+        """
+        self.ring_size = ring_size
+        self._backend: Actuator | None = None
+        self._lock = threading.RLock()
+        self._locks: weakref.WeakKeyDictionary[Actuator, threading.Lock] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._latency: dict[str, dict[str, NodeLatency]] = {}
+        # 多路流程时每个工作线程可以绑定自己的后端，未绑定时使用全局后端
+        self._local = threading.local()
+
+    @property
+    def bound(self) -> bool:
+        return getattr(self._local, "backend", None) is not None
+
+    @contextmanager
+    def bind(self, backend: Actuator) -> Iterator[Actuator]:
+        """
+        在当前线程内临时把所有调用转到 backend
+        """
+        last = getattr(self._local, "backend", None)
+        self._local.backend = backend
+        try:
+            yield backend
+        finally:
+            self._local.backend = last
+
+    @property
+    def backend(self) -> Actuator:
+        local = getattr(self._local, "backend", None)
+        if local is not None:
+            return local
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._create_default()
+        return self._backend
+
+    def _create_default(self) -> Actuator:
+        names = _default_actuator_names()
+        for name in names:
+            try:
+                backend = create_actuator(name)
+            except Exception as err:
+                logger.warning(f"actuator {name} unavailable: {err}")
+                continue
+            logger.info(f"use actuator {backend.name}")
+            return backend
+        raise RuntimeError(f"no actuator available, tried {names}")
+
+    def use(self, backend: Actuator | str) -> Actuator:
+        if isinstance(backend, str):
+            backend = create_actuator(backend)
+        with self._lock:
+            self._backend = backend
+        return backend
+
+    def _backend_lock(self, backend: Actuator) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(backend)
+            if lock is None:
+                lock = self._locks[backend] = threading.Lock()
+            return lock
+
+    def _call(self, op: str, *args):
+        backend = self.backend
+        with self._backend_lock(backend):
+            t_start = time.perf_counter()
+            res = getattr(backend, op)(*args)
+            dt = time.perf_counter() - t_start
+        with self._lock:
+            stats = self._latency.setdefault(backend.name, {})
+            stat = stats.get(op)
+            if stat is None:
+                stat = stats[op] = NodeLatency(self.ring_size)
+            stat.record(dt)
+        return res
+
+    def position(self) -> tuple[int, int]:
+        return self._call("position")
+
+    def move_to(self, x: int, y: int):
+        self._call("move_to", x, y)
+
+    def click(self, x: int, y: int, button: str):
+        self._call("click", x, y, button)
+
+    def mouse_down(self, x: int, y: int, button: str):
+        self._call("mouse_down", x, y, button)
+
+    def mouse_up(self, x: int, y: int, button: str):
+        self._call("mouse_up", x, y, button)
+
+    def vscroll(self, clicks: int, x: int, y: int):
+        self._call("vscroll", clicks, x, y)
+
+    def reset_latency(self):
+        with self._lock:
+            self._latency.clear()
+
+    @property
+    def state(self) -> dict[str, Any]:
+        with self._lock:
+            latency = {
+                name: {op: stat.summary() for op, stat in stats.items()}
+                for name, stats in self._latency.items()
+            }
+            backend = self._backend
+        # 查询状态不创建后端，还没有用过时报告将按顺序尝试的后端
+        return {
+            "backend": backend.name if backend is not None else None,
+            "configured": _default_actuator_names(),
+            "backends": list(_factories.keys()),
+            "latency": latency,
+        }
+
+
+actuator_manager = ActuatorManager()
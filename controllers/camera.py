@@ -3,39 +3,78 @@ import os
 os.environ["OPENCV_VIDEOIO_MSMF_ENABLE_HW_TRANSFORMS"] = "0"
 
 import cv2
+import threading
 import time
 
 from typing import Iterable
 from typing_extensions import Self
 
 from utils import logger
+from utils.frame_pool import FramePool, hold_frame, mirror_rgb, release_frame
+from utils.slot import LatestSlot
 from controllers.types import CameraSettingModel, CameraState, SizeTuple, FrameTuple
 
 
 class CameraHelper:
     _global_camer: Self | None = None
+    # 每个摄像头编号一个实例，0 号就是 _global_camer
+    _instances: dict[int, "CameraHelper"] = {}
 
-    def __new__(cls, *args, **kwargs) -> Self:
-        if cls._global_camer:
+    def __new__(cls, index: int = 0, *args, **kwargs) -> Self:
+        if index in cls._instances:
             raise RuntimeError("please use get_instance")
         obj = super().__new__(cls)
-        cls._global_camer = obj
+        cls._instances[index] = obj
+        if index == 0:
+            cls._global_camer = obj
         return obj
 
+    @property
+    def cap(self) -> cv2.VideoCapture:
+        # 第一次使用时才创建，导入模块时不触碰摄像头后端
+        if self._cap is None:
+            self._cap = cv2.VideoCapture()
+        return self._cap
+
+    @cap.setter
+    def cap(self, cap: cv2.VideoCapture):
+        self._cap = cap
+
+    @cap.deleter
+    def cap(self):
+        self._cap = None
+
     @property
     def is_opened(self) -> bool:
-        return self.cap is not None and self.cap.isOpened()
+        return self._cap is not None and self._cap.isOpened()
 
     @property
     def state(self) -> CameraState:
-        return CameraState(self.is_opened, self.size, self.exposure)
+        return CameraState(
+            self.is_opened,
+            self.size,
+            self.exposure,
+            self.grabber,
+            self.skipped_frames,
+            self.frame_allocations,
+            self._frame_pool.acquires,
+            self.fps,
+        )
+
+    @property
+    def skipped_frames(self) -> int:
+        return self._grab_slot.drops
+
+    @property
+    def frame_allocations(self) -> int:
+        return self._raw_pool.allocations + self._frame_pool.allocations
 
     def open(self):
         if self.is_opened:
             return
         logger.info("start open camera")
         cap = self.cap
-        cap.open(0)
+        cap.open(self.index)
         cap_index, cap_name = cap.get(cv2.CAP_PROP_POS_MSEC), cap.get(
             cv2.CAP_PROP_POS_FRAMES
         )
@@ -44,7 +83,10 @@ class CameraHelper:
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size.width)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size.height)
         cap.set(cv2.CAP_PROP_EXPOSURE, self.exposure)
-        cap.set(cv2.CAP_PROP_FPS, 30)
+        cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+        if self.grabber:
+            self._start_grabber()
 
         logger.info("open camera complete")
 
@@ -52,12 +94,91 @@ class CameraHelper:
         if not self.is_opened:
             logger.warning("cap is not opening, but want to close")
             return
-        self.cap.release()  # type: ignore
+        self._stop_grabber()
+        with self._cap_lock:
+            self.cap.release()  # type: ignore
 
-    def __init__(self):
-        self.cap: cv2.VideoCapture = cv2.VideoCapture()
+    def __init__(self, index: int = 0):
+        self.index = index
+        self._cap: cv2.VideoCapture | None = None
         self.size = SizeTuple(1280, 720)
         self.exposure = -5
+        self.fps = 30
+        self.grabber = False
+        # 交给读取线程的原始帧在被读取或者丢弃之前一直持有，不会被采集线程覆盖
+        self._grab_slot: LatestSlot[FrameTuple] = LatestSlot(
+            lambda frame: release_frame(frame.frame)
+        )
+        self._grab_thread: threading.Thread | None = None
+        self._grabbing = False
+        # cap 的 read/grab/set/release 不能在多个线程中同时调用
+        self._cap_lock = threading.Lock()
+        # 采集到的原始 BGR 帧和镜像后的 RGB 帧分别写入复用的缓冲区
+        self._raw_pool = FramePool(3)
+        self._frame_pool = FramePool(4)
+
+    def _read_into_pool(self, retrieve: bool = False) -> cv2.typing.MatLike | None:
+        shape = self._raw_pool.shape or (self.size.height, self.size.width, 3)
+        buf = self._raw_pool.acquire(shape)  # type: ignore
+        if retrieve:
+            ret, frame = self.cap.retrieve(buf)
+        else:
+            ret, frame = self.cap.read(buf)
+        if not ret or frame is None:
+            return None
+        return self._raw_pool.adopt(buf, frame)
+
+    def _grab_loop(self):
+        """
+        后台线程持续 grab，只保留最新的一帧，驱动里积压的旧帧不会再被处理
+        """
+        cap = self.cap
+        while self._grabbing:
+            with self._cap_lock:
+                if not self.is_opened:
+                    break
+                grabbed = cap.grab()
+                ctime = time.time()
+                frame = self._read_into_pool(retrieve=True) if grabbed else None
+            if not grabbed:
+                time.sleep(0.005)
+                continue
+            if frame is None:
+                continue
+            hold_frame(frame)
+            self._grab_slot.put(
+                FrameTuple(frame, frame.shape[1], frame.shape[0], ctime)
+            )
+
+    def _start_grabber(self):
+        if self._grab_thread is not None:
+            return
+        self._grab_slot.clear()
+        self._grabbing = True
+        self._grab_thread = threading.Thread(
+            target=self._grab_loop, name="camera-grabber", daemon=True
+        )
+        self._grab_thread.start()
+
+    def _stop_grabber(self):
+        if self._grab_thread is None:
+            return
+        self._grabbing = False
+        # 必须等线程退出，否则 close 释放 cap 时它可能还在 grab/retrieve
+        self._grab_thread.join()
+        self._grab_thread = None
+
+    def _read_raw(self) -> FrameTuple:
+        if self._grab_thread is not None:
+            try:
+                return self._grab_slot.get(1)
+            except TimeoutError:
+                raise RuntimeError("read camera failed")
+        with self._cap_lock:
+            frame = self._read_into_pool()
+        if frame is None:
+            raise RuntimeError("read camera failed")
+        return FrameTuple(frame, frame.shape[1], frame.shape[0], time.time())
 
     def read(self, auto_open: bool = False):
         if not self.is_opened:
@@ -65,13 +186,25 @@ class CameraHelper:
                 self.open()
             else:
                 raise RuntimeError("cap is not opened")
-        ret, frame = self.cap.read()  # type: ignore
-        if not ret:
-            raise RuntimeError("read camera failed")
-        frame = cv2.flip(frame, 1)
+        raw = self._read_raw()
+        frame = mirror_rgb(raw.frame, self._frame_pool.acquire(raw.frame.shape))
+        # 采集线程交过来的原始帧已经用完；直接读取的帧没有被持有，release 不做任何事
+        release_frame(raw.frame)
         height, width = frame.shape[0], frame.shape[1]
         self.size = SizeTuple(width, height)
-        return FrameTuple(frame, width, height, time.time())
+        return FrameTuple(frame, width, height, raw.ctime)
+
+    def set_fps(self, fps: int):
+        """
+        修改采集帧率，已经打开时立即生效
+        """
+        if fps == self.fps:
+            return
+        # 流程线程调用时采集线程可能正在 grab，检查和修改都在 cap 的锁内
+        with self._cap_lock:
+            self.fps = fps
+            if self.is_opened:
+                self.cap.set(cv2.CAP_PROP_FPS, fps)
 
     @classmethod
     def get_instance(cls) -> Self:
@@ -79,17 +212,33 @@ class CameraHelper:
             cls._global_camer = cls()
         return cls._global_camer
 
+    @classmethod
+    def for_index(cls, index: int) -> "CameraHelper":
+        if index == 0:
+            return cls.get_instance()
+        if index not in cls._instances:
+            cls(index)
+        return cls._instances[index]
+
     @classmethod
     def close_instance(cls):
-        if cls._global_camer:
-            cls._global_camer.close()
+        for instance in list(cls._instances.values()):
+            if instance.is_opened:
+                instance.close()
 
     def update_camera_setting(self, setting: CameraSettingModel):
-        if self.cap is None:
+        if self._cap is None:
             raise RuntimeError("please init camera first")
         if setting.exposure is not None:
-            self.cap.set(cv2.CAP_PROP_EXPOSURE, setting.exposure)
+            with self._cap_lock:
+                self.cap.set(cv2.CAP_PROP_EXPOSURE, setting.exposure)
             self.exposure = setting.exposure
+        if setting.grabber is not None:
+            self.grabber = setting.grabber
+            if setting.grabber and self.is_opened:
+                self._start_grabber()
+            elif not setting.grabber:
+                self._stop_grabber()
 
     def __del__(self):
         self.close()
@@ -107,7 +256,7 @@ def read_real_time_camera_to_jpeg(
     frame_gen: Iterable[cv2.typing.MatLike],
 ) -> Iterable[bytes]:
     for frame in frame_gen:
-        ret, jpeg = cv2.imencode(".jpeg", frame)
+        ret, jpeg = cv2.imencode(".jpeg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
         if not ret:
             raise RuntimeError("convert raw video to jpg failed")
         yield jpeg.tobytes()
@@ -0,0 +1,92 @@
+from typing import Any, NamedTuple
+
+import cv2
+import numpy as np
+
+from controllers.types import FrameTuple
+
+from utils.enum import DictEnum
+
+
+class FrameFormat(DictEnum):
+    raw = "raw"
+    jpeg = "jpeg"
+    webp = "webp"
+    # 缩小后的原始 BGR 数据
+    downscaled = "downscaled"
+
+
+class CameraStreamOptions(NamedTuple):
+    format: FrameFormat = FrameFormat.raw
+    fps: float = 15
+    quality: int = 80
+    scale: float = 1.0
+
+    def describe(self, width: int, height: int) -> dict[str, Any]:
+        """
+        第一帧之前发给客户端的协商结果，width/height 是编码后画面的大小
+        """
+        return {
+            "format": self.format.value,
+            "fps": self.fps,
+            "quality": self.quality,
+            "scale": self.scale,
+            "width": width,
+            "height": height,
+        }
+
+
+def negotiate(
+    format: str = "raw",
+    fps: float = 15,
+    quality: int = 80,
+    scale: float = 1.0,
+    max_fps: float = 30,
+) -> CameraStreamOptions:
+    """
+    检查客户端请求的参数，帧率不超过摄像头的帧率，downscaled 没有指定比例时缩小一半
+    """
+    if not FrameFormat.has(format):
+        raise ValueError(f"unknown frame format {format}")
+    frame_format = FrameFormat[format]
+    if not 0 < scale <= 1:
+        raise ValueError("scale must be in (0, 1]")
+    if frame_format == FrameFormat.downscaled and scale == 1:
+        scale = 0.5
+    if fps <= 0:
+        raise ValueError("fps must be positive")
+    return CameraStreamOptions(
+        frame_format, min(fps, max_fps), min(max(quality, 1), 100), scale
+    )
+
+
+def encode_frame(frame: np.ndarray, options: CameraStreamOptions) -> bytes:
+    if options.scale < 1:
+        height, width = frame.shape[:2]
+        size = (
+            max(1, int(width * options.scale)),
+            max(1, int(height * options.scale)),
+        )
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    # 帧是 RGB，客户端收到的原始数据和编码后的图片都按 BGR
+    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    if options.format == FrameFormat.jpeg:
+        ret, buf = cv2.imencode(
+            ".jpeg", frame, [cv2.IMWRITE_JPEG_QUALITY, options.quality]
+        )
+    elif options.format == FrameFormat.webp:
+        ret, buf = cv2.imencode(
+            ".webp", frame, [cv2.IMWRITE_WEBP_QUALITY, options.quality]
+        )
+    else:
+        return frame.tobytes()
+    if not ret:
+        raise RuntimeError(f"convert raw video to {options.format.value} failed")
+    return buf.tobytes()
+
+
+def encoded_size(frame: FrameTuple, options: CameraStreamOptions) -> tuple[int, int]:
+    width, height = frame.frame.shape[1], frame.frame.shape[0]
+    if options.scale < 1:
+        return max(1, int(width * options.scale)), max(1, int(height * options.scale))
+    return width, height
@@ -1,35 +1,38 @@
-import sys
 import secrets
 import time
 
 from math import sqrt
 from typing import Protocol, Callable, Any
 
-SYS_PLATFORM = sys.platform
-
-if SYS_PLATFORM.startswith("win32"):
-    from pyautogui._pyautogui_win import (
-        _moveTo,
-        _position,
-        _click,
-        _mouseDown,
-        _mouseUp,
-        _vscroll,
-    )
-elif SYS_PLATFORM.startswith("darwin"):
-    from pyautogui._pyautogui_osx import (
-        _moveTo,
-        _position,
-        _click,
-        _mouseDown,
-        _mouseUp,
-        _vscroll,
-    )
-else:
-    raise ImportError
-
+from controllers.actuator import actuator_manager
+from controllers.cursor_motion import cursor_motion
 from utils.enum import DictEnum
 
+
+def _position() -> tuple[int, int]:
+    return actuator_manager.position()
+
+
+def _moveTo(x: int, y: int):
+    actuator_manager.move_to(x, y)
+
+
+def _click(x: int, y: int, button: str):
+    actuator_manager.click(x, y, button)
+
+
+def _mouseDown(x: int, y: int, button: str):
+    actuator_manager.mouse_down(x, y, button)
+
+
+def _mouseUp(x: int, y: int, button: str):
+    actuator_manager.mouse_up(x, y, button)
+
+
+def _vscroll(clicks: int, x: int, y: int):
+    actuator_manager.vscroll(clicks, x, y)
+
+
 CursorPosition = tuple[int, int]
 
 
@@ -42,11 +45,20 @@ def safe_division(a, b) -> float:
     return a / b if b != 0 else a / 0.1
 
 
+def _use_motion() -> bool:
+    # 绑定了独立后端的流程直接输出，输出线程只服务全局光标
+    return cursor_motion.running and not actuator_manager.bound
+
+
 def current_position() -> CursorPosition:
+    if _use_motion():
+        return cursor_motion.position
     return _position()
 
 
 def move(dx: int, dy: int) -> CursorPosition:
+    if _use_motion():
+        return cursor_motion.move(dx, dy)
     pos = _position()
     _moveTo(pos[0] + dx, pos[1] + dy)
     return _position()
@@ -61,23 +73,29 @@ def move(dx: int, dy: int) -> CursorPosition:
 
 class MoveToHandler(CursorHandler):
     def __call__(self, x: int, y: int):
+        if _use_motion():
+            cursor_motion.jump(x, y)
+            return x, y
         _moveTo(x, y)
         return _position()
 
 
 class LeftButtonHandler:
     def __init__(self) -> None:
-        self._down = False
+        # 按下状态按后端分别记录，多路流程各自绑定后端时互不影响
+        self._down: set[int] = set()
 
     def down(self, x: int, y: int):
-        if not self._down:
+        key = id(actuator_manager.backend)
+        if key not in self._down:
             _mouseDown(x, y, "left")
-            self._down = True
+            self._down.add(key)
 
     def up(self, x: int, y: int):
-        if self._down:
+        key = id(actuator_manager.backend)
+        if key in self._down:
             _mouseUp(x, y, "left")
-            self._down = False
+            self._down.discard(key)
 
 
 left_button_handler = LeftButtonHandler()
@@ -0,0 +1,168 @@
+import threading
+import time
+
+from typing import Any, Callable, NamedTuple
+
+from controllers.actuator import actuator_manager
+
+from utils import logger
+from utils.threading import set_thread_priority_to_high
+
+
+class MotionTarget(NamedTuple):
+    x: float
+    y: float
+    ctime: float
+    seq: int
+    origin: tuple[int, int] | None = None
+
+
+class CursorMotion:
+    def __init__(
+        self,
+        rate: float = 0,
+        idle_resync: float = 0.5,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """
+        独占光标的输出线程：识别线程只提交目标位移，输出线程按固定频率插值移动光标，
+        光标位置在本地记录，空闲一段时间后再从系统重新读取。
+        clock 是插值使用的时钟，测试时可以传入假时钟再直接调用 _tick
+        """
+        self.rate = rate
+        self.clock = clock
+        self.idle_resync = idle_resync
+        self.position: tuple[int, int] = (0, 0)
+        self.update_interval = 1 / 30
+        self.submits = 0
+        self.ticks = 0
+        self.moves = 0
+        # 单生产者写入的最新目标，赋值是原子的，两个线程之间不需要锁
+        self._target = MotionTarget(0, 0, 0, 0)
+        # 输出线程插值到的位置和已经处理的目标序号
+        self._x = 0.0
+        self._y = 0.0
+        self._seq = -1
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, rate: float | None = None):
+        if rate is not None:
+            self.rate = rate
+        if self.rate <= 0:
+            raise ValueError("motion rate must be positive")
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._reset()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._loop, name="cursor-motion", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"cursor motion start at {self.rate} Hz")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._running = False
+        self._wake.set()
+        self._thread.join(1)
+        self._thread = None
+        logger.info("cursor motion stop")
+
+    def _reset(self):
+        x, y = actuator_manager.position()
+        self.position = (x, y)
+        self._x, self._y = x, y
+        self._seq = -1
+        self._target = MotionTarget(x, y, self.clock(), 0, (x, y))
+
+    def _submit(self, x: float, y: float, origin: tuple[int, int] | None = None):
+        now = self.clock()
+        last = self._target
+        interval = now - last.ctime
+        if interval < self.idle_resync:
+            self.update_interval = self.update_interval * 0.8 + interval * 0.2
+        self._target = MotionTarget(x, y, now, last.seq + 1, origin)
+        self.submits += 1
+        self._wake.set()
+
+    def move(self, dx: int, dy: int) -> tuple[int, int]:
+        last = self._target
+        origin = None
+        base_x, base_y = last.x, last.y
+        if self.clock() - last.ctime > self.idle_resync:
+            origin = actuator_manager.position()
+            base_x, base_y = origin
+        x, y = base_x + dx, base_y + dy
+        self._submit(x, y, origin)
+        return round(x), round(y)
+
+    def jump(self, x: int, y: int):
+        self._submit(x, y, (x, y))
+
+    def _tick(self, now: float) -> bool:
+        """
+        按 now 时刻插值走一步，返回是否已经停在目标上并且空闲
+        """
+        period = 1 / self.rate
+        target = self._target
+        if target.seq != self._seq:
+            self._seq = target.seq
+            if target.origin is not None:
+                self._x, self._y = target.origin
+        # 在下一次识别结果到来之前正好走完这一段位移
+        remain = max(target.ctime + self.update_interval - now, period)
+        frac = min(period / remain, 1.0)
+        self._x += (target.x - self._x) * frac
+        self._y += (target.y - self._y) * frac
+        pos = (round(self._x), round(self._y))
+        if pos != self.position:
+            actuator_manager.move_to(*pos)
+            self.position = pos
+            self.moves += 1
+        self.ticks += 1
+        return pos == (round(target.x), round(target.y)) and (
+            now - target.ctime > self.idle_resync
+        )
+
+    def _loop(self):
+        set_thread_priority_to_high()
+        next_tick = time.perf_counter()
+        try:
+            while self._running:
+                if self._tick(self.clock()):
+                    self._wake.clear()
+                    if self._target.seq == self._seq:
+                        self._wake.wait(self.idle_resync)
+                    next_tick = time.perf_counter()
+                    continue
+                next_tick += 1 / self.rate
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        except Exception as err:
+            logger.exception(err)
+        finally:
+            self._running = False
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "running": self._running,
+            "rate": self.rate,
+            "updateInterval": round(self.update_interval, 4),
+            "submits": self.submits,
+            "ticks": self.ticks,
+            "moves": self.moves,
+        }
+
+
+cursor_motion = CursorMotion()
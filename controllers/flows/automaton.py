@@ -0,0 +1,204 @@
+from collections import deque
+from typing import Any, Callable, Iterable
+
+from controllers.cursor_handle import current_position
+from controllers.flows.control_flow import (
+    GestureMatcherCompose,
+    GestureTiming,
+    stop_cursor_when_active,
+)
+from controllers.flows.node import FlowNodeBase, NoResult, _NoResult
+from controllers.flows.window import IncrementalWindowHandler, WindowHandler
+from controllers.hand_info import HandInfo
+from controllers.hand_move import HandMoveHandler, hand_move_handler
+from controllers.landmark_match import GestureMatch
+
+from utils.types import Position3D
+
+
+class SharedWindow:
+    def __init__(self, n: int) -> None:
+        """
+        同一份历史数据上的多个窗口判断共用一个 deque，每个增量 handler 各自保存状态
+        """
+        self.n = n
+        self.items: deque[Any] = deque(maxlen=n)
+        self.handlers: list[WindowHandler] = []
+        self.states: list[Any] = []
+        self.results: list[Any] = []
+
+    def add_handler(self, handler: WindowHandler) -> int:
+        if handler in self.handlers:
+            return self.handlers.index(handler)
+        self.handlers.append(handler)
+        self.states.append(
+            handler.create_state(self.n)
+            if isinstance(handler, IncrementalWindowHandler)
+            else None
+        )
+        self.results.append(NoResult)
+        return len(self.handlers) - 1
+
+    def push(self, it: Any):
+        items = self.items
+        full = len(items) == self.n
+        evicted = items[0] if full else None
+        items.append(it)
+        results = self.results
+        for idx, (handler, state) in enumerate(zip(self.handlers, self.states)):
+            if state is None:
+                results[idx] = handler(items)
+                continue
+            inc: IncrementalWindowHandler = handler  # type: ignore
+            if full:
+                inc.evict(state, evicted)
+            inc.push(state, it)
+            results[idx] = inc.result(state)
+
+    def result(self, idx: int) -> Any:
+        """
+        窗口未填满时返回 NoResult，与 PreResultWindowNode 一致
+        """
+        if len(self.items) < self.n:
+            return NoResult
+        return self.results[idx]
+
+
+class _TimingState:
+    __slots__ = ("since", "fired", "last_value", "last_edge", "anchor")
+
+    def __init__(self) -> None:
+        self.since = 0.0
+        self.fired = False
+        self.last_value = False
+        self.last_edge = -1.0
+        self.anchor: Position3D | None = None
+
+
+def _apply_timing(
+    timing: GestureTiming, state: _TimingState, value: bool, hand: HandInfo
+) -> bool:
+    t = hand.c_time
+    rising = value and not state.last_value
+    state.last_value = value
+    if timing.kind == "doubleTap":
+        if not rising:
+            return False
+        if state.last_edge >= 0 and t - state.last_edge <= timing.duration:
+            state.last_edge = -1.0
+            return True
+        state.last_edge = t
+        return False
+
+    if not value:
+        state.fired = False
+        return False
+    anchor = hand.anchor
+    if rising:
+        state.since = t
+        state.fired = False
+        state.anchor = anchor
+    elif timing.kind == "dwell" and state.anchor is not None:
+        dx, dy = float(anchor[0] - state.anchor[0]), float(anchor[1] - state.anchor[1])
+        if dx * dx + dy * dy > timing.radius * timing.radius:
+            # 手移动了，从当前位置重新计时
+            state.since = t
+            state.fired = False
+            state.anchor = anchor
+    if state.fired or t - state.since < timing.duration:
+        return False
+    state.fired = True
+    return True
+
+
+class _Rule:
+    __slots__ = ("compose", "window", "check_idx", "pos_window", "move_idx", "timing")
+
+    def __init__(
+        self,
+        compose: GestureMatcherCompose,
+        window: SharedWindow,
+        check_idx: int,
+        pos_window: SharedWindow | None,
+        move_idx: int,
+    ) -> None:
+        self.compose = compose
+        self.window = window
+        self.check_idx = check_idx
+        self.pos_window = pos_window
+        self.move_idx = move_idx
+        self.timing = _TimingState()
+
+
+class GestureAutomatonNode(FlowNodeBase[HandInfo, _NoResult]):
+    def __init__(
+        self,
+        composes: Iterable[GestureMatcherCompose],
+        cursor_pos_func: Callable[[], tuple[int, int]] = current_position,
+        pos_window_len: int = 6,
+        move_handler: HandMoveHandler = hand_move_handler,
+    ) -> None:
+        """
+        把 gesture_handle_set 中所有的手势映射编译成一个状态机节点：
+        每个 GestureMatch 每帧只匹配一次，相同手势和长度的结果窗口、位置窗口在映射之间共享，
+        代替每个映射一个 CombineFlowNode 子图
+        """
+        super().__init__()
+        self.cursor_pos_func = cursor_pos_func
+        self.move_handler = move_handler
+        self.matches: list[GestureMatch] = []
+        self.match_windows: list[tuple[int, SharedWindow]] = []
+        self.pos_window: SharedWindow | None = None
+        self.rules: list[_Rule] = []
+
+        windows: dict[tuple[GestureMatch, int], SharedWindow] = {}
+        for compose in composes:
+            gesture = compose.gesture_matcher
+            if gesture not in self.matches:
+                self.matches.append(gesture)
+            key = (gesture, compose.window_len)
+            window = windows.get(key)
+            if window is None:
+                window = windows[key] = SharedWindow(compose.window_len)
+                self.match_windows.append((self.matches.index(gesture), window))
+            check_idx = window.add_handler(compose.check_func)
+
+            pos_window, move_idx = None, -1
+            if compose.move_check is not None:
+                if self.pos_window is None:
+                    self.pos_window = SharedWindow(pos_window_len)
+                pos_window = self.pos_window
+                move_idx = pos_window.add_handler(compose.move_check)
+            self.rules.append(_Rule(compose, window, check_idx, pos_window, move_idx))
+
+    def forward(self, hand: HandInfo) -> _NoResult:
+        matched = [gesture.match(hand) for gesture in self.matches]
+        for match_idx, window in self.match_windows:
+            window.push(matched[match_idx])
+        if self.pos_window is not None:
+            self.pos_window.push(hand.anchor)
+
+        pos: tuple[int, int] | None = None
+        for rule in self.rules:
+            compose = rule.compose
+            active = rule.window.result(rule.check_idx)
+            if rule.pos_window is not None:
+                move = rule.pos_window.result(rule.move_idx)
+                if move is NoResult:
+                    continue
+                active = move and active == True
+                if compose.stop_move_cursor_when_active:
+                    stop_cursor_when_active(active, self.move_handler)
+            elif active is NoResult:
+                continue
+            if compose.timing is not None:
+                active = _apply_timing(compose.timing, rule.timing, active, hand)
+            if active:
+                if pos is None:
+                    pos = self.cursor_pos_func()
+                compose.cursor_handle.execute(pos[0], pos[1])
+        return NoResult
+
+    @property
+    def label(self) -> str:
+        return f"{type(self).__name__}[{len(self.rules)}]"
@@ -0,0 +1,219 @@
+import asyncio
+import time
+
+from typing import Any, AsyncIterator, Callable
+
+import cv2
+import numpy as np
+
+from controllers.camera import camera
+from controllers.flows.channel import OutputChannel, Subscription
+from controllers.flows.flow import camera_node, flow_manager
+from controllers.flows.node import FlowNode
+from controllers.types import FrameSource, FrameTuple
+
+from utils import logger
+from utils.frame_pool import hold_frame, release_frame
+
+
+def hold_frame_tuple(frame: FrameTuple):
+    hold_frame(frame.frame)
+
+
+def release_frame_tuple(frame: FrameTuple):
+    release_frame(frame.frame)
+
+
+def subscribe_frames(
+    node: FlowNode[Any, FrameTuple], maxsize: int = 1
+) -> Subscription[FrameTuple]:
+    """
+    订阅画面节点的输出；画面在流程线程中被持有，取出的帧用完后需要 release_frame_tuple
+    """
+    return node.channel.subscribe(maxsize, hold_frame_tuple, release_frame_tuple)
+
+
+def read_held(source: FrameSource) -> FrameTuple:
+    """
+    在线程中读取一帧并立即持有，之后交给其他线程编码也不会被覆盖
+    """
+    frame = source.read()
+    hold_frame_tuple(frame)
+    return frame
+
+
+def multipart_jpeg(jpeg: bytes) -> bytes:
+    return b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+
+class FrameBroadcaster:
+    def __init__(
+        self,
+        node: FlowNode[Any, FrameTuple],
+        source: FrameSource,
+        is_flow_running: Callable[[], bool],
+    ) -> None:
+        """
+        所有需要原始画面的客户端共用一路读取：流程运行时订阅摄像头节点的输出，
+        否则自己在线程中读取摄像头，没有订阅者时不读取。
+        每一帧发给所有订阅者，客户端之间、客户端和流程之间不会互相抢帧
+        """
+        self.node = node
+        self.source = source
+        self.is_flow_running = is_flow_running
+        self.channel: OutputChannel[FrameTuple] = OutputChannel()
+        self.mode = "idle"
+        self._task: asyncio.Task | None = None
+
+    async def _next_frame(self, tap: Subscription[FrameTuple] | None) -> FrameTuple:
+        if tap is not None:
+            return await tap.get(0.2)
+        try:
+            return await asyncio.to_thread(read_held, self.source)
+        except RuntimeError:
+            # 摄像头还没有打开，等待打开或者流程启动
+            await asyncio.sleep(0.5)
+            raise TimeoutError("camera is not opened")
+
+    async def _pump(self):
+        tap: Subscription[FrameTuple] | None = None
+        try:
+            while self.channel.subscribers:
+                running = self.is_flow_running()
+                if running and tap is None:
+                    tap = subscribe_frames(self.node)
+                elif not running and tap is not None:
+                    tap.close()
+                    tap = None
+                self.mode = "flow" if running else "camera"
+                try:
+                    frame = await self._next_frame(tap)
+                except TimeoutError:
+                    continue
+                try:
+                    # 每个订阅者各自持有这一帧
+                    self.channel.publish(frame)
+                finally:
+                    release_frame_tuple(frame)
+        except Exception as err:
+            logger.exception(err)
+        finally:
+            if tap is not None:
+                tap.close()
+            self.mode = "idle"
+
+    def subscribe(self, maxsize: int = 1) -> Subscription[FrameTuple]:
+        """
+        需要在事件循环中调用；取出的帧用完后需要 release_frame_tuple
+        """
+        sub = self.channel.subscribe(maxsize, hold_frame_tuple, release_frame_tuple)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+        return sub
+
+
+class JpegBroadcaster:
+    def __init__(
+        self,
+        frames: FrameBroadcaster,
+        quality: int = 80,
+        scale: float = 1.0,
+    ) -> None:
+        """
+        从 FrameBroadcaster 取画面，每帧只编码一次，编码结果通过 channel 分发给所有客户端，
+        没有客户端时不编码也不订阅画面。慢的客户端只会丢帧，不会拖慢流程和其他客户端
+        """
+        self.frames = frames
+        self.quality = quality
+        self.scale = scale
+        self.channel: OutputChannel[bytes] = OutputChannel()
+        self.encoded = 0
+        self.encode_ms = 0.0
+        self._task: asyncio.Task | None = None
+        self._buf: np.ndarray | None = None
+
+    def configure(self, quality: int | None = None, scale: float | None = None):
+        if quality is not None:
+            if not 1 <= quality <= 100:
+                raise ValueError("jpeg quality must be in [1, 100]")
+            self.quality = quality
+        if scale is not None:
+            if not 0 < scale <= 1:
+                raise ValueError("jpeg scale must be in (0, 1]")
+            self.scale = scale
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        t_start = time.perf_counter()
+        height, width = frame.shape[:2]
+        size = (width, height)
+        if self.scale < 1:
+            size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        shape = (size[1], size[0], *frame.shape[2:])
+        if self._buf is None or self._buf.shape != shape:
+            self._buf = np.empty(shape, np.uint8)
+        # 帧是 RGB，imencode 需要 BGR；缩小时在缩小后的缓冲上原地转换
+        if self.scale < 1:
+            frame = cv2.resize(frame, size, dst=self._buf, interpolation=cv2.INTER_AREA)
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=frame)
+        else:
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self._buf)
+        ret, jpeg = cv2.imencode(
+            ".jpeg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        )
+        if not ret:
+            raise RuntimeError("convert raw video to jpg failed")
+        self.encoded += 1
+        cost = (time.perf_counter() - t_start) * 1000
+        self.encode_ms = (
+            cost if self.encoded == 1 else self.encode_ms * 0.9 + cost * 0.1
+        )
+        return jpeg.tobytes()
+
+    async def _pump(self):
+        try:
+            with self.frames.subscribe() as frames:
+                while self.channel.subscribers:
+                    try:
+                        frame = await frames.get(0.2)
+                    except TimeoutError:
+                        continue
+                    try:
+                        jpeg = await asyncio.to_thread(self.encode, frame.frame)
+                    finally:
+                        release_frame_tuple(frame)
+                    self.channel.publish(jpeg)
+        except Exception as err:
+            logger.exception(err)
+
+    def subscribe(self, maxsize: int = 1) -> Subscription[bytes]:
+        """
+        需要在事件循环中调用，第一个订阅者到来时启动编码任务，最后一个离开后任务自己结束
+        """
+        sub = self.channel.subscribe(maxsize)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+        return sub
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        with self.subscribe() as sub:
+            while True:
+                try:
+                    jpeg = await sub.get(2)
+                except TimeoutError:
+                    continue
+                yield multipart_jpeg(jpeg)
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "mode": self.frames.mode,
+            "quality": self.quality,
+            "scale": self.scale,
+            "encoded": self.encoded,
+            "encodeMs": round(self.encode_ms, 3),
+            **self.channel.state,
+        }
+
+
+frame_broadcaster = FrameBroadcaster(camera_node, camera, lambda: flow_manager.running)
+jpeg_broadcaster = JpegBroadcaster(frame_broadcaster)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+
+from collections import deque
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_Nothing = object()
+
+
+class Subscription(Generic[T]):
+    def __init__(
+        self,
+        maxsize: int = 4,
+        channel: "OutputChannel | None" = None,
+        hold: Callable[[T], Any] | None = None,
+        release: Callable[[T], Any] | None = None,
+    ):
+        """
+        在 asyncio 中创建，push 可以在任意线程调用；队列满时丢弃最旧的值，
+        慢的订阅者只会丢帧，不会阻塞流程。
+        hold 在发布线程中、值进入队列之前调用，值被丢弃或者订阅关闭时调用 release；
+        get 取出的值由订阅者用完后自己 release
+        """
+        self.loop = asyncio.get_running_loop()
+        self.channel = channel
+        self.items: deque[T] = deque(maxlen=maxsize)
+        self.drops = 0
+        self.hold = hold
+        self.release = release
+        self._event = asyncio.Event()
+        self._lock = threading.Lock()
+        self._notified = False
+        self._closed = False
+
+    def push(self, value: T):
+        if self.hold is not None:
+            self.hold(value)
+        dropped: Any = _Nothing
+        with self._lock:
+            if self._closed:
+                dropped, notify = value, False
+            else:
+                if len(self.items) == self.items.maxlen:
+                    self.drops += 1
+                    dropped = self.items[0]
+                self.items.append(value)
+                notify = not self._notified
+                self._notified = True
+        if dropped is not _Nothing and self.release is not None:
+            self.release(dropped)
+        # 队列里已经有值时不再重复唤醒，避免每帧都往事件循环里塞回调
+        if notify:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        with self._lock:
+            self._notified = False
+        self._event.set()
+
+    async def get(self, timeout: float | None = None) -> T:
+        while True:
+            with self._lock:
+                if self.items:
+                    return self.items.popleft()
+                self._event.clear()
+            await asyncio.wait_for(self._event.wait(), timeout)
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.unsubscribe(self)
+            self.channel = None
+        with self._lock:
+            self._closed = True
+            left = list(self.items)
+            self.items.clear()
+        if self.release is not None:
+            for it in left:
+                self.release(it)
+
+    def __enter__(self) -> "Subscription[T]":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class OutputChannel(Generic[T]):
+    __slots__ = ("subscribers", "published", "_lock")
+
+    def __init__(self) -> None:
+        """
+        节点输出的发布订阅通道，由 forward_node 在节点产生结果后发布；
+        没有订阅者时只有一次列表判空的开销
+        """
+        self.subscribers: tuple[Subscription[T], ...] = ()
+        self.published = 0
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        maxsize: int = 4,
+        hold: Callable[[T], Any] | None = None,
+        release: Callable[[T], Any] | None = None,
+    ) -> Subscription[T]:
+        sub: Subscription[T] = Subscription(maxsize, self, hold, release)
+        with self._lock:
+            self.subscribers = (*self.subscribers, sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription[T]):
+        with self._lock:
+            self.subscribers = tuple(it for it in self.subscribers if it is not sub)
+
+    def publish(self, value: T):
+        self.published += 1
+        # subscribers 整体替换，发布时不需要加锁
+        for sub in self.subscribers:
+            sub.push(value)
+
+    @property
+    def state(self) -> dict[str, Any]:
+        subscribers = self.subscribers
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "drops": sum(sub.drops for sub in subscribers),
+        }
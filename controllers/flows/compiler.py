@@ -0,0 +1,102 @@
+import time
+
+from typing import Any
+
+from controllers.flows.node import (
+    CombineFlowNode,
+    FlowNode,
+    FlowNodeBase,
+    NoResult,
+    _run_normal_node,
+    forward_node,
+)
+from controllers.flows.profiler import flow_profiler
+
+_MAX_STEPS = 4096
+
+# 普通节点；自定义了 gen_forward_next 的节点，后继由它在运行时决定；
+# 内联的 CombineFlowNode 在内部子图执行完后同步 output
+_NORMAL, _DYNAMIC, _COMBINE_OUTPUT = 0, 1, 2
+
+# (node, step index, parent step index, node whose enable gates this step, kind)
+_Step = tuple[FlowNode, int, int, FlowNode | None, int]
+
+
+class FlowPlan:
+    def __init__(self, begin_node: FlowNode[Any, Any]) -> None:
+        """
+        把 next_nodes 组成的图（包括 CombineFlowNode 内部的子图）按 run_flow 的执行顺序
+        展开成静态的执行表，每一步的输出写入预先分配好的 slots，每帧不再创建列表
+        """
+        self.begin_node = begin_node
+        steps: list[_Step] = []
+        _compile_level([(begin_node, -1, None)], steps)
+        self.steps: tuple[_Step, ...] = tuple(steps)
+        self.slots: list[Any] = [NoResult] * len(steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def run(self, _in=None):
+        profile = flow_profiler.enabled
+        t_start = time.perf_counter() if profile else 0
+        slots = self.slots
+        for node, idx, parent_idx, gate, kind in self.steps:
+            if parent_idx >= 0:
+                val = slots[parent_idx]
+                if val is NoResult or not gate.enable:  # type: ignore
+                    slots[idx] = NoResult
+                    continue
+            else:
+                val = _in
+            if kind == _COMBINE_OUTPUT:
+                node.output = node.end.output  # type: ignore
+                slots[idx] = NoResult
+                continue
+            forward_node(node, val)
+            if kind == _DYNAMIC:
+                next_gen = node.gen_forward_next()
+                while next_gen:
+                    next_gen = _run_normal_node(next_gen)
+                slots[idx] = NoResult
+                continue
+            slots[idx] = node.output if node.forward_next else NoResult  # type: ignore
+        if profile:
+            flow_profiler.record_flow(self.begin_node, time.perf_counter() - t_start)
+
+
+def _compile_level(
+    level: list[tuple[FlowNode, int, FlowNode | None]], steps: list[_Step]
+):
+    """
+    与 run_flow 一样按层展开；遇到 CombineFlowNode 时先把它内部的整张子图展开，
+    内部起点由 CombineFlowNode 的 enable 控制。自定义了 gen_forward_next 的节点不展开后继，
+    运行时按它返回的结果解释执行
+    """
+    while level:
+        next_level: list[tuple[FlowNode, int, FlowNode | None]] = []
+        for node, parent_idx, gate in level:
+            if len(steps) >= _MAX_STEPS:
+                raise RuntimeError("flow graph is too large or has a cycle")
+            inner = node.inner_nodes()
+            if inner:
+                _compile_level([(n, parent_idx, gate) for n in inner], steps)
+                if isinstance(node, CombineFlowNode):
+                    steps.append((node, len(steps), parent_idx, gate, _COMBINE_OUTPUT))
+                continue
+            idx = len(steps)
+            if _has_custom_forward_next(node):
+                steps.append((node, idx, parent_idx, gate, _DYNAMIC))
+                continue
+            steps.append((node, idx, parent_idx, gate, _NORMAL))
+            next_level.extend((n, idx, n) for n in node.next_nodes)
+        level = next_level
+
+
+def _has_custom_forward_next(node: FlowNode) -> bool:
+    forward_next = getattr(type(node), "gen_forward_next", None)
+    return forward_next is not FlowNodeBase.gen_forward_next
+
+
+def compile_flow(begin_node: FlowNode[Any, Any]) -> FlowPlan:
+    return FlowPlan(begin_node)
@@ -1,9 +1,11 @@
+import threading
+
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Optional
 
 from controllers.landmark_match import GestureMatch
 from controllers.hand_info import HandInfo
-from controllers.hand_move import hand_move_handler
+from controllers.hand_move import HandMoveHandler, hand_move_handler
 from controllers.cursor_handle import CursorHandleEnum, current_position
 from controllers.flows.window import (
     WindowHandler,
@@ -26,6 +28,21 @@ from controllers.flows.node import (
 from utils.types import Position3D
 
 
+@dataclass(frozen=True)
+class GestureTiming:
+    """
+    hold：条件持续成立 duration 秒后触发一次；dwell：在 hold 的基础上要求手基本不动；
+    doubleTap：duration 秒内条件两次从不成立变为成立
+    """
+
+    kind: str
+    duration: float = 0.5
+    radius: float = 15
+
+
+timing_kinds = ("hold", "dwell", "doubleTap")
+
+
 # tuple[GestureMatch, WindowHandler[bool]]
 @dataclass
 class GestureMatcherCompose:
@@ -35,10 +52,14 @@ class GestureMatcherCompose:
     window_len: int = 3
     move_check: Optional[WindowHandler[Position3D, bool]] = None
     stop_move_cursor_when_active: bool = False
+    timing: Optional[GestureTiming] = None
 
     def __hash__(self) -> int:
         return (
-            hash(self.gesture_matcher) ^ hash(self.check_func) ^ hash(self.move_check)
+            hash(self.gesture_matcher)
+            ^ hash(self.check_func)
+            ^ hash(self.move_check)
+            ^ hash(self.timing)
         )
 
 
@@ -69,39 +90,84 @@ gesture_handle_set: set[GestureMatcherCompose] = {
 }
 
 
+_mapping_lock = threading.Lock()
+mapping_version = 0
+
+
+def gesture_mapping_snapshot() -> tuple[int, tuple[GestureMatcherCompose, ...]]:
+    with _mapping_lock:
+        return mapping_version, tuple(gesture_handle_set)
+
+
 def gen_gesture_and_cursor_handle_mapping_list() -> list[dict]:
-    res = [
-        {
+    res = []
+    _, composes = gesture_mapping_snapshot()
+    for ges in composes:
+        item = {
             "match": ges.gesture_matcher.name,
             "matchFunc": ges.check_func.name,
             "handle": ges.cursor_handle.name,
         }
-        for ges in gesture_handle_set
-    ]
+        if ges.timing is not None:
+            item["timing"] = ges.timing.kind
+            item["duration"] = ges.timing.duration
+        res.append(item)
     return res
 
 
-def set_gesture_and_cursor_handle_mapping(data: list[dict]):
-    # if flow_manager.running or _inited:
-    #     raise RuntimeError("can not change during running")
-
-    gesture_handle_set.clear()
+def check_subgraph_mapping(composes: Iterable[GestureMatcherCompose]):
+    """
+    只有自动机实现了 timing，旧的子图会忽略它，所以子图模式下拒绝带 timing 的映射
+    """
+    for compose in composes:
+        if compose.timing is not None:
+            raise ValueError(
+                f"timing {compose.timing.kind} of {compose.gesture_matcher.name} "
+                "requires the automaton graph"
+            )
+
+
+def set_gesture_and_cursor_handle_mapping(
+    data: list[dict], allow_timing: bool = True
+) -> int:
+    """
+    先完整地构建并校验新的映射，再在锁内整体替换并增加版本号，
+    正在运行的图通过版本号判断是否需要重新生成手势节点；
+    allow_timing 为 False 时（子图模式运行中）拒绝带 timing 的映射
+    """
+    global mapping_version
+    new_set: set[GestureMatcherCompose] = set()
     for t in data:
         gesture_matcher = GestureMatch[t["match"]]
         match_func = handle_dict[t["matchFunc"]]
         handler = CursorHandleEnum[t["handle"]]
-        gesture_handle_set.add(
-            GestureMatcherCompose(gesture_matcher, match_func, handler)
+        timing = None
+        if t.get("timing"):
+            if t["timing"] not in timing_kinds:
+                raise ValueError(f"unknown timing {t['timing']}")
+            timing = GestureTiming(t["timing"], t.get("duration") or 0.5)
+        new_set.add(
+            GestureMatcherCompose(gesture_matcher, match_func, handler, timing=timing)
         )
+    if not allow_timing:
+        check_subgraph_mapping(new_set)
+    with _mapping_lock:
+        gesture_handle_set.clear()
+        gesture_handle_set.update(new_set)
+        mapping_version += 1
+        return mapping_version
 
 
-def stop_cursor_when_active(_in: bool) -> None:
-    if hand_move_handler.enable_move == _in:
-        hand_move_handler.enable_move = not _in
-        hand_move_handler.last_hand = None
+def stop_cursor_when_active(
+    _in: bool, handler: HandMoveHandler = hand_move_handler
+) -> None:
+    if handler.enable_move == _in:
+        handler.enable_move = not _in
+        handler.last_hand = None
 
 
 def gen_gesture_and_cursor_combine_node(gesture_matcher: GestureMatcherCompose):
+    check_subgraph_mapping([gesture_matcher])
     gesture, fn = gesture_matcher.gesture_matcher, gesture_matcher.check_func
 
     def get_handinfo_pos(hand: HandInfo) -> Position3D:
@@ -140,5 +206,6 @@ def gen_gesture_and_cursor_combine_node(gesture_matcher: GestureMatcherCompose):
 
 
 def gen_all_cursor_control_node():
-    for it in gesture_handle_set:
+    _, composes = gesture_mapping_snapshot()
+    for it in composes:
         yield gen_gesture_and_cursor_combine_node(it)
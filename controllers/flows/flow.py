@@ -1,4 +1,5 @@
 import asyncio
+import threading
 import time
 from typing import Any
 
@@ -7,14 +8,32 @@ from controllers.flows.node import (
     CursorMoveHandleNode,
     FlowNode,
     LandMarkFilterNode,
+    LandMarkSmoothNode,
     GestureRecognizeNode,
     ShowFrameNode,
     DrawLandMarkNode,
+    FrameRateGovernorNode,
+    LandMarkFeedNode,
     LandMarkV2Node,
+    OperationMapNode,
+    RoiCropNode,
+    RoiStatsNode,
     run_flow,
     NoResult,
 )
-from controllers.flows.control_flow import gen_all_cursor_control_node
+from controllers.flows.control_flow import (
+    check_subgraph_mapping,
+    gen_gesture_and_cursor_combine_node,
+    gesture_mapping_snapshot,
+)
+from controllers.flows.automaton import GestureAutomatonNode
+from controllers.flows.swap import SwapFlowNode
+from controllers.flows.compiler import compile_flow
+from controllers.flows.pipeline import FlowPipeline
+from controllers.flows.profiler import flow_profiler
+from controllers.hand_info import HandInfo
+from controllers.model.process import ProcessModelPool, create_process_model
+from controllers.model.registry import model_registry
 
 
 from utils import config, logger
@@ -25,33 +44,121 @@ camera_node = CameraNode()
 
 land_mark_model_node = GestureRecognizeNode()
 hands_filter_node = LandMarkFilterNode()
+landmark_smooth_node = LandMarkSmoothNode()
 cursor_move_handle_node = CursorMoveHandleNode()
 show_frame_node = ShowFrameNode()
 draw_node = DrawLandMarkNode(camera_node)
+roi_crop_node = RoiCropNode(hands_filter_node)
+roi_stats_node = RoiStatsNode(roi_crop_node)
+governor_node = FrameRateGovernorNode(hands_filter_node, camera_node.source)
+landmark_feed_node = LandMarkFeedNode(hands_filter_node)
+gesture_control_node = SwapFlowNode("gesture")
 
 
 _inited = False
+_use_automaton = True
+# init_graph、clean_graph 和 update_gesture_control 可能在不同线程中调用
+_graph_lock = threading.Lock()
 
 
-def init_graph():
-    global _inited
-    if _inited:
-        return
-    _inited = True
-    camera_node.add_next(land_mark_model_node)
+def _use_hand(hand: HandInfo) -> HandInfo:
+    return hand
+
+
+def _use_hands(hands: list[HandInfo]) -> list[HandInfo]:
+    return hands
+
+
+# 执行阶段的起点：过滤节点和关键点推送并排在它后面，推送读取过滤节点的结果时
+# 两者总在同一个线程中
+hands_node = OperationMapNode(_use_hands)
+hands_node.add_next(hands_filter_node)
+hands_node.add_next(landmark_feed_node)
+
+
+def build_gesture_control(automaton: bool) -> tuple[int, FlowNode]:
+    """
+    按当前的手势映射生成手势控制子图，返回映射的版本号和子图
+    """
+    version, composes = gesture_mapping_snapshot()
+    if automaton:
+        return version, GestureAutomatonNode(composes)
+    begin = OperationMapNode(_use_hand)
+    for compose in composes:
+        begin.add_next(gen_gesture_and_cursor_combine_node(compose))
+    return version, begin
+
+
+def update_gesture_control() -> int:
+    """
+    在调用线程中生成新的手势子图并发布，运行中的图在下一帧开始前替换，不需要重启流程
+    """
+    with _graph_lock:
+        version, node = build_gesture_control(_use_automaton)
+        if _inited:
+            gesture_control_node.publish(node, version)
+    return version
+
+
+def build_pipeline(roi: bool = False) -> FlowPipeline:
+    return FlowPipeline(
+        [
+            ("camera", camera_node),
+            ("inference", roi_crop_node if roi else land_mark_model_node),
+            ("actuation", hands_node),
+        ]
+    )
+
+
+def init_graph(
+    pipeline: FlowPipeline | None = None,
+    roi: bool = False,
+    automaton: bool = True,
+    governor: bool = False,
+):
+    global _inited, _use_automaton
+    with _graph_lock:
+        if _inited:
+            return
+        _inited = True
+        _use_automaton = automaton
+
+    def connect(node: FlowNode, next_node: FlowNode):
+        if pipeline is None:
+            node.add_next(next_node)
+        else:
+            node.add_next(pipeline.handoff(next_node))
+
+    frame_node: FlowNode = camera_node
+    if governor:
+        camera_node.add_next(governor_node)
+        frame_node = governor_node
 
-    land_mark_model_node.add_next(hands_filter_node)
+    if roi:
+        connect(frame_node, roi_crop_node)
+        # 裁剪画面交给单独的 IMAGE 模式模型，不打乱整帧模型的帧间跟踪
+        land_mark_model_node.separate_crops = True
+        roi_crop_node.add_next(land_mark_model_node)
+        land_mark_model_node.add_next(roi_stats_node)
+        connect(roi_stats_node, hands_node)
+    else:
+        connect(frame_node, land_mark_model_node)
+        connect(land_mark_model_node, hands_node)
 
-    hands_filter_node.add_next(cursor_move_handle_node)
+    hands_filter_node.add_next(landmark_smooth_node)
+
+    landmark_smooth_node.add_next(cursor_move_handle_node)
 
     if "is_server" not in config:
         logger.info("no server")
-        hands_filter_node.add_next(draw_node)
+        landmark_smooth_node.add_next(draw_node)
         camera_node.add_next(show_frame_node)
         # draw_node.add_next(show_frame_node)
 
-    for control_node in gen_all_cursor_control_node():
-        hands_filter_node.add_next(control_node)
+    with _graph_lock:
+        version, node = build_gesture_control(automaton)
+        gesture_control_node.publish(node, version)
+    landmark_smooth_node.add_next(gesture_control_node)
 
 
 def _clear_next_nodes(*nodes: FlowNode):
@@ -61,14 +168,22 @@ def _clear_next_nodes(*nodes: FlowNode):
 
 def clean_graph():
     global _inited
-    if not _inited:
-        return
-    _inited = False
+    with _graph_lock:
+        if not _inited:
+            return
+        _inited = False
+        # 在锁内清空，之后 update_gesture_control 不会再发布新的子图
+        gesture_control_node.clear()
 
+    land_mark_model_node.separate_crops = False
     _clear_next_nodes(
         camera_node,
+        governor_node,
         land_mark_model_node,
+        roi_crop_node,
+        roi_stats_node,
         hands_filter_node,
+        landmark_smooth_node,
         draw_node,
         cursor_move_handle_node,
     )
@@ -79,34 +194,103 @@ class FlowManage:
         self.start_node = start_node
         self._running = False
         self.task: asyncio.Task | None = None
+        self.use_pipeline = False
+        self.use_compiled = False
+        self.use_roi = False
+        self.use_automaton = True
+        self.use_governor = False
+        self.inference_workers = 0
+        self.pipeline: FlowPipeline | None = None
+        self.inference_pool: ProcessModelPool | None = None
+
+    def _is_running(self) -> bool:
+        return self._running
 
     def _start(self):
         set_thread_priority_to_high()
         logger.info("flow start")
-        init_graph()
-        self.start_node.init()
-        while self._running:
-            run_flow(self.start_node, None)
-        self.start_node.clean_effect()
+        if self.inference_workers > 0:
+            # 一路视频的帧必须按顺序交给同一个 VIDEO 模式的模型，多开子进程没有用处
+            if self.inference_workers > 1:
+                logger.warning("a single flow uses one inference worker")
+            pool = self.inference_pool = create_process_model("gesture", 1)
+            land_mark_model_node.model = pool
+        pipeline = self.pipeline = (
+            build_pipeline(self.use_roi) if self.use_pipeline else None
+        )
+        init_graph(pipeline, self.use_roi, self.use_automaton, self.use_governor)
+        if pipeline is None:
+            self.start_node.init()
+            if self.use_compiled:
+                plan = compile_flow(self.start_node)
+                logger.info(f"flow compiled to {len(plan)} steps")
+                while self._running:
+                    plan.run(None)
+            else:
+                while self._running:
+                    run_flow(self.start_node, None)
+            self.start_node.clean_effect()
+        else:
+            pipeline.run(self._is_running, self.use_compiled)
         clean_graph()
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+            self.inference_pool = None
+            land_mark_model_node.model = None
         logger.info("flow stop")
 
     @property
     def running(self):
         return self._running and (self.task is None or not self.task.done())
 
-    async def wait_node_has_value(self, node: FlowNode, max_wait: int = 60):
-        t_start = time.time()
-        while True:
-            if node.output is not NoResult:
-                break
-            if time.time() - t_start > max_wait:
-                raise TimeoutError("wait_node_has_value time out")
-            await asyncio.sleep(0.5)
+    async def wait_node_has_value(self, node: FlowNode, max_wait: float = 60):
+        """
+        订阅节点的输出并等待下一个值；需要在 start 之后、第一次 await 之前调用，
+        流程线程提前退出时抛出它的异常
+        """
+        with node.channel.subscribe(1) as sub:
+            get = asyncio.ensure_future(sub.get())
+            waits: set[asyncio.Future] = {get}
+            if self.task is not None:
+                waits.add(self.task)
+            done, _ = await asyncio.wait(
+                waits, timeout=max_wait, return_when=asyncio.FIRST_COMPLETED
+            )
+            if get in done:
+                return get.result()
+            get.cancel()
+            if self.task in done:
+                self.task.result()
+                raise RuntimeError("flow stopped before first output")
+            raise TimeoutError("wait_node_has_value time out")
 
-    def start(self, in_async: bool = False):
+    def start(
+        self,
+        in_async: bool = False,
+        pipeline: bool | None = None,
+        compiled: bool | None = None,
+        roi: bool | None = None,
+        automaton: bool | None = None,
+        workers: int | None = None,
+        governor: bool | None = None,
+    ):
         if self.running:
             raise RuntimeError("网络已经在运行")
+        if not (self.use_automaton if automaton is None else automaton):
+            # 在启动前拒绝子图不支持的映射，而不是在流程线程中才失败
+            check_subgraph_mapping(gesture_mapping_snapshot()[1])
+        if pipeline is not None:
+            self.use_pipeline = pipeline
+        if compiled is not None:
+            self.use_compiled = compiled
+        if roi is not None:
+            self.use_roi = roi
+        if automaton is not None:
+            self.use_automaton = automaton
+        if workers is not None:
+            self.inference_workers = workers
+        if governor is not None:
+            self.use_governor = governor
         self._running = True
         if in_async:
             cor = asyncio.to_thread(self._start)
@@ -122,11 +306,38 @@ class FlowManage:
 
     @property
     def state(self):
-        return {"running": self._running}
+        res: dict[str, Any] = {
+            "running": self._running,
+            "pipeline": self.use_pipeline,
+            "compiled": self.use_compiled,
+            "roi": self.use_roi,
+            "automaton": self.use_automaton,
+            "governor": self.use_governor,
+            "gestureControl": gesture_control_node.state,
+            "inferenceWorkers": self.inference_workers,
+            "models": model_registry.state,
+        }
+        if self.inference_pool is not None:
+            res["inference"] = self.inference_pool.state
+        if self.use_governor:
+            res["governorStats"] = governor_node.state
+        if self.use_roi:
+            res["roiStats"] = roi_crop_node.state
+        if self.pipeline is not None:
+            res["stages"] = self.pipeline.state
+        return res
 
 
 flow_manager = FlowManage(camera_node)
 
 
+def gen_profile_report() -> dict[str, Any]:
+    pipeline = flow_manager.pipeline
+    heads: list[FlowNode] = (
+        [stage.head for stage in pipeline.stages] if pipeline else [camera_node]
+    )
+    return flow_profiler.report(heads)
+
+
 def start_flow():
     flow_manager.start()
@@ -1,20 +1,30 @@
+import threading
+import time
+
 from collections import deque
 from functools import partial
 from typing import Any, Callable, Generic, Iterable, NewType, Protocol, TypeVar
 
+import cv2
+import numpy as np
+
 from controllers.camera import camera
 from controllers.cursor_handle import CursorHandleEnum
 from controllers.hand_info import HandInfo
-from controllers.hand_move import hand_move_handler
+from controllers.hand_move import HandMoveHandler, hand_move_handler
 from controllers.landmark_match import GestureMatch
 from controllers.show_local import close, draw_circle, show_frame_local
-from controllers.types import FrameTuple, Position
+from controllers.recording import HandInfoRecordSource, HandInfoRecorder
+from controllers.types import FrameSource, FrameTuple, Position, RoiTuple
 
-from controllers.model.landmark import HandLandMarkModel
-from controllers.model.landmark_v2 import HandLandMarkModelV2
-from controllers.model.gesture import GestureModel, global_gesture_model
+from controllers.model.base import HandModel
+from controllers.model.registry import model_registry
+from controllers.flows.channel import OutputChannel
+from controllers.flows.profiler import flow_profiler
+from controllers.flows.window import IncrementalWindowHandler
 
 from utils import logger
+from utils.frame_pool import FramePool
 from utils.iter import min_item
 
 _Output = TypeVar("_Output")
@@ -29,6 +39,7 @@ class FlowNode(Protocol, Generic[_InPut, _Output]):
     output: _Output
     next_nodes: list["FlowNode"]
     enable: bool
+    channel: OutputChannel[_Output]
 
     def init(self):
         raise NotImplementedError()
@@ -45,21 +56,47 @@ class FlowNode(Protocol, Generic[_InPut, _Output]):
     def clean_effect(self):
         raise NotImplementedError()
 
+    @property
+    def label(self) -> str:
+        raise NotImplementedError()
+
+    def inner_nodes(self) -> list["FlowNode"]:
+        raise NotImplementedError()
+
+    def profile_nodes(self) -> list["FlowNode"]:
+        raise NotImplementedError()
+
 
 _FlowExecTuple = tuple[FlowNode, _Output]
 
 
+def forward_node(node: FlowNode[_InPut, _Output], _in: _InPut) -> _Output:
+    if not flow_profiler.enabled:
+        res = node.forward(_in)
+    else:
+        t_start = time.perf_counter()
+        res = node.forward(_in)
+        flow_profiler.record(node, time.perf_counter() - t_start)
+    if node.channel.subscribers and node.output is not NoResult:
+        node.channel.publish(node.output)
+    return res
+
+
 def run_flow(begin_node: FlowNode[Any, Any], _in=None):
-    begin_node.forward(_in)
+    profile = flow_profiler.enabled
+    t_start = time.perf_counter() if profile else 0
+    forward_node(begin_node, _in)
     next_gen: list[_FlowExecTuple] = begin_node.gen_forward_next()
     while len(next_gen) > 0:
         next_gen = _run_normal_node(next_gen)
+    if profile:
+        flow_profiler.record_flow(begin_node, time.perf_counter() - t_start)
 
 
 def _run_normal_node(node_tuple: list[_FlowExecTuple]) -> list[_FlowExecTuple]:
     res = []
     for next_node, val in node_tuple:
-        next_node.forward(val)
+        forward_node(next_node, val)
         res.extend(next_node.gen_forward_next())
     return res
 
@@ -70,6 +107,7 @@ class FlowNodeBase(FlowNode[_InPut, _Output]):
         self.next_nodes = []
         self.enable = True
         self.forward_next = True
+        self.channel: OutputChannel[_Output] = OutputChannel()
 
     def init(self):
         for next_node in self.next_nodes:
@@ -91,19 +129,37 @@ class FlowNodeBase(FlowNode[_InPut, _Output]):
         for next_node in self.next_nodes:
             next_node.clean_effect()
 
+    @property
+    def label(self) -> str:
+        return type(self).__name__
+
+    def inner_nodes(self) -> list[FlowNode]:
+        return []
+
+    def profile_nodes(self) -> list[FlowNode]:
+        """
+        性能报告中展示在 inner 下的节点，默认与 inner_nodes 相同；
+        编译器只展开 inner_nodes，自己执行内部图的节点可以只在这里暴露
+        """
+        return self.inner_nodes()
+
 
 class CameraNode(FlowNodeBase[None, FrameTuple]):
+    def __init__(self, source: FrameSource | None = None) -> None:
+        super().__init__()
+        self.source: FrameSource = camera if source is None else source
+
     def init(self):
-        camera.open()
+        self.source.open()
         super().init()
 
     def forward(self, _):
-        t = camera.read()
+        t = self.source.read()
         self.output = t
         return t
 
     def clean_effect(self):
-        camera.close()
+        self.source.close()
         super().clean_effect()
 
 
@@ -113,8 +169,7 @@ class LandMarkModelNode(FlowNodeBase[FrameTuple, list[HandInfo]]):
         self.land_mark = None
 
     def init(self):
-
-        self.land_mark = HandLandMarkModel()
+        self.land_mark = model_registry.acquire("landmark")
 
     def forward(self, frame_info: FrameTuple) -> list[HandInfo]:
         assert self.land_mark is not None
@@ -124,8 +179,9 @@ class LandMarkModelNode(FlowNodeBase[FrameTuple, list[HandInfo]]):
         return t
 
     def clean_effect(self):
-        assert self.land_mark is not None
-        self.land_mark.close()
+        if self.land_mark is not None:
+            model_registry.release(self.land_mark)
+            self.land_mark = None
 
         super().clean_effect()
 
@@ -152,9 +208,28 @@ class LandMarkFilterNode(FlowNodeBase[list[HandInfo], HandInfo]):
         return t
 
 
+class LandMarkSmoothNode(FlowNodeBase[HandInfo, HandInfo]):
+    """
+    按照 /mouse/state 中选择的滤波器平滑当前手的关键点
+    """
+
+    def __init__(self, handler: HandMoveHandler | None = None) -> None:
+        super().__init__()
+        self.handler = hand_move_handler if handler is None else handler
+
+    def forward(self, hand_info: HandInfo) -> HandInfo:
+        res = self.handler.smooth(hand_info)
+        self.output = res
+        return res
+
+
 class CursorMoveHandleNode(FlowNodeBase[HandInfo, Position]):
+    def __init__(self, handler: HandMoveHandler | None = None) -> None:
+        super().__init__()
+        self.handler = hand_move_handler if handler is None else handler
+
     def forward(self, hand_info: HandInfo) -> Position:
-        pos = hand_move_handler.forward(hand_info)
+        pos = self.handler.forward(hand_info)
         self.output = pos
         return pos
 
@@ -170,6 +245,10 @@ class GestureMatchNode(FlowNodeBase[HandInfo, bool]):
         self.output = t
         return t
 
+    @property
+    def label(self) -> str:
+        return f"{type(self).__name__}[{self.matcher.name}]"
+
 
 _WindowItemType = TypeVar("_WindowItemType")
 
@@ -187,16 +266,32 @@ class PreResultWindowNode(FlowNodeBase[_InPut, _Output]):
         self.n = n
         self.pre_result: deque[_InPut] = deque(maxlen=n)
         self.fn = fn
+        self.window_state = (
+            fn.create_state(n) if isinstance(fn, IncrementalWindowHandler) else None
+        )
 
     def forward(self, _in: _InPut) -> _Output:
-        self.pre_result.append(_in)
-        t = self.fn(self.pre_result)
+        pre_result = self.pre_result
+        if self.window_state is None:
+            pre_result.append(_in)
+            t = self.fn(pre_result)
+        else:
+            fn: IncrementalWindowHandler = self.fn  # type: ignore
+            if len(pre_result) == self.n:
+                fn.evict(self.window_state, pre_result[0])
+            pre_result.append(_in)
+            fn.push(self.window_state, _in)
+            t = fn.result(self.window_state)
         if len(self.pre_result) < self.n:
             self.output = NoResult
         else:
             self.output = t
         return t
 
+    @property
+    def label(self) -> str:
+        return f"{type(self).__name__}[{getattr(self.fn, 'name', self.n)}]"
+
 
 class CursorHandleNode(FlowNodeBase[bool, _NoResult]):
     def __init__(
@@ -214,6 +309,10 @@ class CursorHandleNode(FlowNodeBase[bool, _NoResult]):
             self.cursor_handle.execute(pos[0], pos[1])
         return NoResult
 
+    @property
+    def label(self) -> str:
+        return f"{type(self).__name__}[{self.cursor_handle.name}]"
+
 
 class ShowFrameNode(FlowNodeBase[FrameTuple, _NoResult]):
     def forward(self, _in: FrameTuple) -> _NoResult:
@@ -252,18 +351,27 @@ class CombineFlowNode(FlowNodeBase[_InPut, _Output]):
     def init(self):
         self.start.init()
 
+    def inner_nodes(self) -> list[FlowNode]:
+        return [self.start]
+
 
 class DrawLandMarkNode(FlowNodeBase[HandInfo, FrameTuple]):
     def __init__(self, camera_node: FlowNode[Any, FrameTuple]) -> None:
+        """
+        在自己的画布上绘制关键点，不修改相机节点输出的共享帧
+        """
         super().__init__()
         self.camera_node = camera_node
+        self._pool = FramePool(2)
 
     def forward(self, _in: HandInfo) -> FrameTuple:
         frame = self.camera_node.output
-        for p in _in.hand_landmark_pos:
-            draw_circle(frame.frame, int(p[0]), int(p[1]))
-        self.output = frame
-        return frame
+        canvas = self._pool.acquire(frame.frame.shape)
+        np.copyto(canvas, frame.frame)
+        for x, y in _in.landmarks[:, :2].astype(int).tolist():
+            draw_circle(canvas, x, y)
+        self.output = frame._replace(frame=canvas)
+        return self.output
 
 
 class LogAnyNode(FlowNodeBase[Any, _NoResult]):
@@ -273,12 +381,17 @@ class LogAnyNode(FlowNodeBase[Any, _NoResult]):
 
 
 class LandMarkV2Node(FlowNodeBase[FrameTuple, list[HandInfo]]):
-    def __init__(self) -> None:
+    def __init__(self, model: HandModel | None = None) -> None:
+        """
+        model 可以传入 ProcessModelPool 等有相同接口的对象，不传时从 model_registry 借用
+        """
         super().__init__()
-        self.land_mark_v2 = None
+        self.land_mark_v2 = model
+        self._owned = model is None
 
     def init(self):
-        self.land_mark_v2 = HandLandMarkModelV2()
+        if self._owned and self.land_mark_v2 is None:
+            self.land_mark_v2 = model_registry.acquire("landmarkV2")
         super().init()
 
     def forward(self, _in: FrameTuple) -> list[HandInfo]:
@@ -288,29 +401,55 @@ class LandMarkV2Node(FlowNodeBase[FrameTuple, list[HandInfo]]):
         return res
 
     def clean_effect(self):
-        assert self.land_mark_v2 is not None
-        self.land_mark_v2.close()
+        if self._owned and self.land_mark_v2 is not None:
+            model_registry.release(self.land_mark_v2)
+            self.land_mark_v2 = None
         super().clean_effect()
 
 
 class GestureRecognizeNode(FlowNodeBase[FrameTuple, list[HandInfo]]):
-    def __init__(self) -> None:
+    def __init__(
+        self, model: HandModel | None = None, crop_model: HandModel | None = None
+    ) -> None:
+        """
+        VIDEO 模式的模型会在帧之间跟踪，只接收整帧；带 roi 的裁剪画面交给 crop_model。
+        separate_crops 为 True 且没有传入 crop_model 时，从 model_registry 借用一个 IMAGE 模式的模型
+        """
         super().__init__()
-        self.model = global_gesture_model
+        self.model = model
+        self.crop_model = crop_model
+        self.separate_crops = False
+        self._acquired = False
+        self._crop_acquired = False
 
     def init(self):
-        # self.model = GestureModel()
+        if self.model is None:
+            self.model = model_registry.acquire("gesture")
+            self._acquired = True
+        if self.separate_crops and self.crop_model is None:
+            self.crop_model = model_registry.acquire("gesture", video=False)
+            self._crop_acquired = True
         super().init()
 
     def forward(self, _in: FrameTuple) -> list[HandInfo]:
-        assert self.model is not None
-        res = self.model.forward(_in)
+        model = self.model
+        if _in.roi is not None and self.crop_model is not None:
+            model = self.crop_model
+        assert model is not None
+        res = model.forward(_in)
         self.output = res
         return res
 
     def clean_effect(self):
-        assert self.model is not None
-        # self.model.close()
+        # 借用的模型放回 model_registry，下一次启动直接复用
+        if self._acquired and self.model is not None:
+            model_registry.release(self.model)
+            self.model = None
+            self._acquired = False
+        if self._crop_acquired and self.crop_model is not None:
+            model_registry.release(self.crop_model)
+            self.crop_model = None
+            self._crop_acquired = False
         super().clean_effect()
 
 
@@ -333,3 +472,269 @@ class OperationMapNode(FlowNodeBase[_InPut, _Output]):
     def forward(self, _in: _InPut) -> _Output:
         self.output = self.fn(_in)
         return self.output
+
+
+class RecordedLandMarkNode(FlowNodeBase[Any, list[HandInfo]]):
+    def __init__(self, source: HandInfoRecordSource) -> None:
+        """
+        回放录制好的关键点，替代摄像头和模型节点作为图的起点
+        """
+        super().__init__()
+        self.source = source
+
+    def init(self):
+        self.source.open()
+        super().init()
+
+    def forward(self, _in: Any) -> list[HandInfo]:
+        res = self.source.read()
+        self.output = res
+        return res
+
+    def clean_effect(self):
+        self.source.close()
+        super().clean_effect()
+
+
+class LandMarkRecordNode(FlowNodeBase[list[HandInfo], _NoResult]):
+    def __init__(self, recorder: HandInfoRecorder) -> None:
+        super().__init__()
+        self.recorder = recorder
+
+    def init(self):
+        self.recorder.open()
+        super().init()
+
+    def forward(self, _in: list[HandInfo]) -> _NoResult:
+        self.recorder.write(_in)
+        return NoResult
+
+    def clean_effect(self):
+        self.recorder.close()
+        super().clean_effect()
+
+
+class RoiCropNode(FlowNodeBase[FrameTuple, FrameTuple]):
+    def __init__(
+        self,
+        hand_node: FlowNode[Any, HandInfo],
+        padding: float = 0.5,
+        max_side: int = 256,
+        min_side: int = 160,
+    ) -> None:
+        """
+        根据上一帧跟踪到的手，只把手附近的区域（必要时缩小）交给模型，
+        手丢失或者裁剪区域接近整帧时退回整帧检测；裁剪结果写入按 max_side 分配的复用缓冲
+        """
+        super().__init__()
+        self.hand_node = hand_node
+        self.padding = padding
+        self.max_side = max_side
+        self.min_side = min_side
+        self._pool = FramePool(4)
+        self.crop_done = 0.0
+        self.frames = 0
+        self.roi_frames = 0
+        self.full_ms = 0.0
+        self.roi_ms = 0.0
+
+    def crop_box(self, hand: HandInfo, width: int, height: int) -> RoiTuple | None:
+        pos = hand.landmarks[:, :2]
+        (x_min, y_min), (x_max, y_max) = pos.min(axis=0), pos.max(axis=0)
+        side = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        half = max(side, self.min_side) / 2
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0, y0 = max(int(cx - half), 0), max(int(cy - half), 0)
+        x1, y1 = min(int(cx + half), width), min(int(cy + half), height)
+        w, h = x1 - x0, y1 - y0
+        if w < 32 or h < 32 or w * h > width * height * 0.6:
+            return None
+        return RoiTuple(x0, y0, w, h, width, height)
+
+    def forward(self, _in: FrameTuple) -> FrameTuple:
+        self.frames += 1
+        hand = self.hand_node.output
+        roi = (
+            None
+            if hand is NoResult
+            else self.crop_box(hand, _in.width, _in.height)  # type: ignore
+        )
+        if roi is None:
+            self.output = _in
+        else:
+            self.roi_frames += 1
+            crop = _in.frame[roi.y : roi.y + roi.height, roi.x : roi.x + roi.width]
+            channels = crop.shape[2:]
+            capacity = self.max_side * self.max_side * int(np.prod(channels))
+            scale = self.max_side / max(roi.width, roi.height)
+            if scale < 1:
+                size = (round(roi.width * scale), round(roi.height * scale))
+                dst = self._pool.acquire_prefix((size[1], size[0], *channels), capacity)
+                crop = cv2.resize(crop, size, dst=dst, interpolation=cv2.INTER_AREA)
+            else:
+                dst = self._pool.acquire_prefix(crop.shape, capacity)
+                np.copyto(dst, crop)
+                crop = dst
+            self.output = FrameTuple(crop, crop.shape[1], crop.shape[0], _in.ctime, roi)
+        self.crop_done = time.perf_counter()
+        return self.output
+
+    def record_model_time(self, dt: float):
+        ms = dt * 1000
+        if self.output is not NoResult and self.output.roi is not None:  # type: ignore
+            self.roi_ms = ms if self.roi_ms == 0 else self.roi_ms * 0.95 + ms * 0.05
+        else:
+            self.full_ms = ms if self.full_ms == 0 else self.full_ms * 0.95 + ms * 0.05
+
+    @property
+    def state(self) -> dict[str, Any]:
+        saved = self.full_ms - self.roi_ms if self.full_ms and self.roi_ms else 0.0
+        roi_rate = self.roi_frames / self.frames if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "roiFrames": self.roi_frames,
+            "fullMs": round(self.full_ms, 3),
+            "roiMs": round(self.roi_ms, 3),
+            "savedMs": round(saved, 3),
+            "savedMsPerFrame": round(saved * roi_rate, 3),
+        }
+
+
+class RoiStatsNode(FlowNodeBase[list[HandInfo], list[HandInfo]]):
+    def __init__(self, crop_node: RoiCropNode) -> None:
+        """
+        放在模型节点之后，统计模型在整帧和裁剪画面上的耗时
+        """
+        super().__init__()
+        self.crop_node = crop_node
+
+    def forward(self, _in: list[HandInfo]) -> list[HandInfo]:
+        self.crop_node.record_model_time(time.perf_counter() - self.crop_node.crop_done)
+        self.output = _in
+        return _in
+
+
+LandMarkFeed = tuple[list[HandInfo], HandInfo | None]
+
+
+class LandMarkFeedNode(FlowNodeBase[list[HandInfo], LandMarkFeed]):
+    def __init__(self, filter_node: FlowNode[Any, HandInfo]) -> None:
+        """
+        与过滤节点同层并排在它后面执行，必须和过滤节点在同一个流水线阶段，
+        每帧把所有手和当前手作为输出，由 forward_node 发布到 channel
+        """
+        super().__init__()
+        self.filter_node = filter_node
+
+    def forward(self, _in: list[HandInfo]) -> LandMarkFeed:
+        current = self.filter_node.output
+        self.output = (_in, None if current is NoResult else current)  # type: ignore
+        return self.output
+
+
+class FrameRateGovernorNode(FlowNodeBase[FrameTuple, FrameTuple]):
+    def __init__(
+        self,
+        hand_node: FlowNode[Any, HandInfo],
+        source: FrameSource | None = None,
+        idle_after: float = 3.0,
+        idle_fps: int = 5,
+        active_fps: int = 30,
+    ) -> None:
+        """
+        放在摄像头和模型之间：一段时间没有检测到手后进入空闲模式，
+        降低摄像头帧率，只按 idle_fps 把画面交给模型；检测到手的下一帧立即恢复全速。
+        VIDEO 模式的模型在帧间跟踪，空闲时只降低帧率，不改变画面大小
+        """
+        super().__init__()
+        self.hand_node = hand_node
+        self.source = source
+        self.idle_after = idle_after
+        self.idle_fps = idle_fps
+        self.active_fps = active_fps
+        self.mode = "active"
+        # 模式和累计时间只在流程线程中修改，state 在 api 线程中加锁读取
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        now = time.perf_counter()
+        self.last_hand = now
+        self.last_pass = 0.0
+        self.idle_frames = 0
+        self.skipped_frames = 0
+        self.switches = 0
+        with self._lock:
+            # 每个模式下累计的墙上时间和进程 cpu 时间
+            self.wall = {"active": 0.0, "idle": 0.0}
+            self.cpu = {"active": 0.0, "idle": 0.0}
+            self._mode_since = (now, time.process_time())
+
+    def init(self):
+        self.mode = "active"
+        self._reset()
+        super().init()
+
+    def _set_mode(self, mode: str):
+        now, cpu = time.perf_counter(), time.process_time()
+        with self._lock:
+            wall_start, cpu_start = self._mode_since
+            self.wall[self.mode] += now - wall_start
+            self.cpu[self.mode] += cpu - cpu_start
+            self._mode_since = (now, cpu)
+            self.mode = mode
+        self.switches += 1
+        set_fps = getattr(self.source, "set_fps", None)
+        if set_fps is not None:
+            set_fps(self.idle_fps if mode == "idle" else self.active_fps)
+        logger.info(f"frame rate governor {mode}")
+
+    def forward(self, _in: FrameTuple) -> FrameTuple | _NoResult:
+        now = time.perf_counter()
+        if self.hand_node.output is not NoResult:
+            self.last_hand = now
+            if self.mode == "idle":
+                self._set_mode("active")
+        elif self.mode == "active" and now - self.last_hand > self.idle_after:
+            self._set_mode("idle")
+
+        if self.mode == "active":
+            self.output = _in
+            return _in
+        if now - self.last_pass < 1 / self.idle_fps:
+            self.skipped_frames += 1
+            self.output = NoResult
+            return NoResult
+        self.last_pass = now
+        self.idle_frames += 1
+        self.output = _in
+        return _in
+
+    def clean_effect(self):
+        if self.mode == "idle":
+            self._set_mode("active")
+        super().clean_effect()
+
+    @property
+    def state(self) -> dict[str, Any]:
+        # 只读：当前模式还没有累计的时间加在副本上
+        now, cpu_now = time.perf_counter(), time.process_time()
+        with self._lock:
+            mode = self.mode
+            wall, cpu = dict(self.wall), dict(self.cpu)
+            wall_start, cpu_start = self._mode_since
+        wall[mode] += now - wall_start
+        cpu[mode] += cpu_now - cpu_start
+        active_load = cpu["active"] / wall["active"] if wall["active"] else 0.0
+        idle_load = cpu["idle"] / wall["idle"] if wall["idle"] else 0.0
+        saved = (active_load - idle_load) * wall["idle"] if active_load else 0.0
+        return {
+            "mode": mode,
+            "switches": self.switches,
+            "idleFrames": self.idle_frames,
+            "skippedFrames": self.skipped_frames,
+            "idleSeconds": round(wall["idle"], 2),
+            "activeCpu": round(active_load, 3),
+            "idleCpu": round(idle_load, 3),
+            "cpuSavedSeconds": round(max(saved, 0.0), 2),
+        }
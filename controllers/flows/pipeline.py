@@ -0,0 +1,154 @@
+import threading
+import time
+
+from typing import Any, Callable
+
+from controllers.flows.compiler import FlowPlan, compile_flow
+from controllers.flows.node import FlowNode, FlowNodeBase, NoResult, _NoResult, run_flow
+from controllers.types import FrameTuple
+
+from utils import logger
+from utils.frame_pool import hold_frame, release_frame
+from utils.slot import LatestSlot
+from utils.threading import set_thread_priority_to_high
+
+
+def _hold(value: Any):
+    if isinstance(value, FrameTuple):
+        hold_frame(value.frame)
+
+
+def _release(value: Any):
+    if isinstance(value, FrameTuple):
+        release_frame(value.frame)
+
+
+class SlotWriterNode(FlowNodeBase[Any, _NoResult]):
+    """
+    流水线阶段之间的交接节点，把上一个阶段的输出写入下一个阶段的 inbox；
+    画面在下一个阶段处理完或者被丢弃之前一直持有，上游的 FramePool 不会覆盖它
+    """
+
+    def __init__(self, slot: LatestSlot) -> None:
+        super().__init__()
+        self.slot = slot
+
+    def forward(self, _in: Any) -> _NoResult:
+        _hold(_in)
+        self.slot.put(_in)
+        return NoResult
+
+
+class PipelineStage:
+    def __init__(self, name: str, head: FlowNode, inbox: LatestSlot | None) -> None:
+        self.name = name
+        self.head = head
+        self.inbox = inbox
+        self.plan: FlowPlan | None = None
+        self.frames = 0
+        self.busy_time = 0.0
+        self.started_at = 0.0
+
+    def reset(self):
+        self.frames = 0
+        self.busy_time = 0.0
+        self.started_at = time.perf_counter()
+        if self.inbox is not None:
+            self.inbox.clear()
+            self.inbox.puts = 0
+            self.inbox.drops = 0
+
+    def run_once(self, _in: Any = None):
+        t_start = time.perf_counter()
+        if self.plan is not None:
+            self.plan.run(_in)
+        else:
+            run_flow(self.head, _in)
+        self.busy_time += time.perf_counter() - t_start
+        self.frames += 1
+
+    @property
+    def occupancy(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return min(self.busy_time / elapsed, 1.0) if elapsed > 0 else 0.0
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "frames": self.frames,
+            "occupancy": round(self.occupancy, 3),
+            "drops": self.inbox.drops if self.inbox is not None else 0,
+        }
+
+
+class FlowPipeline:
+    def __init__(self, heads: list[tuple[str, FlowNode]]) -> None:
+        """
+        把图按 heads 切分成多个阶段，每个阶段在自己的线程里运行，
+        阶段之间通过只保留最新值的 LatestSlot 交接，上游不会被下游阻塞
+        """
+        self.stages: list[PipelineStage] = []
+        for idx, (name, head) in enumerate(heads):
+            inbox = LatestSlot(_release) if idx > 0 else None
+            self.stages.append(PipelineStage(name, head, inbox))
+        self._stop = threading.Event()
+
+    def handoff(self, head: FlowNode) -> SlotWriterNode:
+        for stage in self.stages:
+            if stage.head is head and stage.inbox is not None:
+                return SlotWriterNode(stage.inbox)
+        raise KeyError("node is not the head of a pipeline stage")
+
+    def _run_stage(self, stage: PipelineStage, is_running: Callable[[], bool]):
+        set_thread_priority_to_high()
+        inbox = stage.inbox
+        try:
+            while is_running() and not self._stop.is_set():
+                if inbox is None:
+                    stage.run_once()
+                    continue
+                try:
+                    _in = inbox.get(0.1)
+                except TimeoutError:
+                    continue
+                try:
+                    stage.run_once(_in)
+                finally:
+                    _release(_in)
+        except Exception as err:
+            logger.exception(err)
+            self._stop.set()
+
+    def run(self, is_running: Callable[[], bool], compiled: bool = False):
+        self._stop.clear()
+        for stage in self.stages:
+            stage.head.init()
+            stage.plan = compile_flow(stage.head) if compiled else None
+            stage.reset()
+
+        workers = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, is_running),
+                name=f"flow-{stage.name}",
+                daemon=True,
+            )
+            for stage in self.stages[1:]
+        ]
+        for worker in workers:
+            worker.start()
+
+        self._run_stage(self.stages[0], is_running)
+        self._stop.set()
+
+        for worker in workers:
+            worker.join()
+        for stage in self.stages:
+            if stage.inbox is not None:
+                stage.inbox.clear()
+            stage.head.clean_effect()
+
+    @property
+    def state(self) -> list[dict[str, Any]]:
+        return [stage.state for stage in self.stages]
@@ -0,0 +1,122 @@
+import threading
+import weakref
+
+from typing import Any
+
+import numpy as np
+
+
+class NodeLatency:
+    __slots__ = ("ring", "idx", "calls", "total")
+
+    def __init__(self, size: int) -> None:
+        self.ring = [0.0] * size
+        self.idx = 0
+        self.calls = 0
+        self.total = 0.0
+
+    def record(self, dt: float):
+        ring = self.ring
+        ring[self.idx] = dt
+        self.idx = (self.idx + 1) % len(ring)
+        self.calls += 1
+        self.total += dt
+
+    def summary(self) -> dict[str, Any]:
+        n = min(self.calls, len(self.ring))
+        if n == 0:
+            return {"calls": 0, "totalMs": 0.0}
+        p50, p95, p99 = np.percentile(np.asarray(self.ring[:n]) * 1000, [50, 95, 99])
+        return {
+            "calls": self.calls,
+            "totalMs": round(self.total * 1000, 3),
+            "meanMs": round(self.total * 1000 / self.calls, 4),
+            "p50Ms": round(float(p50), 4),
+            "p95Ms": round(float(p95), 4),
+            "p99Ms": round(float(p99), 4),
+        }
+
+
+class FlowProfiler:
+    def __init__(self, ring_size: int = 1024) -> None:
+        """
+        记录每个节点 forward 的耗时，默认关闭，关闭时只多一次属性判断；
+        统计只弱引用节点，节点被回收或者 forget 后统计随之删除。
+        各阶段线程可能同时插入，插入和删除在锁内进行
+        """
+        self.enabled = False
+        self.ring_size = ring_size
+        self._nodes: weakref.WeakKeyDictionary[Any, NodeLatency] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._flows: weakref.WeakKeyDictionary[Any, NodeLatency] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _get(self, store: weakref.WeakKeyDictionary, node: Any) -> NodeLatency:
+        stat = store.get(node)
+        if stat is None:
+            with self._lock:
+                stat = store.get(node)
+                if stat is None:
+                    stat = store[node] = NodeLatency(self.ring_size)
+        return stat
+
+    def record(self, node: Any, dt: float):
+        self._get(self._nodes, node).record(dt)
+
+    def record_flow(self, begin_node: Any, dt: float):
+        self._get(self._flows, begin_node).record(dt)
+
+    def reset(self):
+        with self._lock:
+            self._nodes.clear()
+            self._flows.clear()
+
+    def forget(self, node: Any):
+        """
+        删除 node 所在子图中所有节点的统计，用于被替换掉的子图
+        """
+        stack, seen = [node], set()
+        with self._lock:
+            while stack:
+                it = stack.pop()
+                if id(it) in seen:
+                    continue
+                seen.add(id(it))
+                self._nodes.pop(it, None)
+                self._flows.pop(it, None)
+                stack.extend(it.profile_nodes())
+                stack.extend(it.next_nodes)
+
+    def node_summary(self, node: Any) -> dict[str, Any]:
+        stat = self._nodes.get(node)
+        return stat.summary() if stat is not None else {"calls": 0, "totalMs": 0.0}
+
+    def tree(self, node: Any) -> dict[str, Any]:
+        """
+        按照 next_nodes 的拓扑生成树状报告，CombineFlowNode 等节点的内部节点（profile_nodes）放在 inner 中
+        """
+        res: dict[str, Any] = {"name": node.label, **self.node_summary(node)}
+        inner = node.profile_nodes()
+        if inner:
+            res["inner"] = [self.tree(n) for n in inner]
+        if node.next_nodes:
+            res["next"] = [self.tree(n) for n in node.next_nodes]
+        return res
+
+    def report(self, begin_nodes: list[Any]) -> dict[str, Any]:
+        graphs = []
+        for node in begin_nodes:
+            flow_stat = self._flows.get(node)
+            graphs.append(
+                {
+                    "flow": flow_stat.summary() if flow_stat else {"calls": 0},
+                    "tree": self.tree(node),
+                }
+            )
+        return {"enabled": self.enabled, "graphs": graphs}
+
+
+flow_profiler = FlowProfiler()
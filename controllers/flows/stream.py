@@ -0,0 +1,362 @@
+import os
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, NamedTuple
+
+from controllers.actuator import Actuator, actuator_manager, create_actuator
+from controllers.camera import CameraHelper
+from controllers.flows.automaton import GestureAutomatonNode
+from controllers.flows.compiler import FlowPlan, compile_flow
+from controllers.flows.control_flow import gesture_mapping_snapshot
+from controllers.flows.node import (
+    CursorMoveHandleNode,
+    FlowNode,
+    GestureRecognizeNode,
+    LandMarkFilterNode,
+    LandMarkSmoothNode,
+)
+from controllers.hand_move import HandMoveHandler, hand_move_handler
+from controllers.model.base import HandModel
+from controllers.model.process import (
+    ProcessModelLease,
+    ProcessModelPool,
+    create_process_model,
+)
+from controllers.model.registry import model_registry
+from controllers.recording import (
+    EndOfRecording,
+    HandInfoRecordSource,
+    ImageDirSource,
+    VideoFileSource,
+)
+from controllers.types import FrameSource
+
+from utils import logger
+
+
+class StreamConfig(NamedTuple):
+    name: str
+    # 摄像头编号，或者视频文件、图片目录、关键点录制 (.jsonl) 的路径；
+    # 0 号摄像头由主流程使用，不能作为一路流的输入
+    source: int | str
+    # 为 None 时使用全局后端
+    actuator: str | None = None
+    loop: bool = False
+    # 模型在独占的子进程中运行
+    process: bool = False
+
+
+def _camera_index(source: int | str) -> int | None:
+    if isinstance(source, int) or source.isdigit():
+        return int(source)
+    return None
+
+
+def _open_source(source: int | str, loop: bool):
+    index = _camera_index(source)
+    if index is not None:
+        if index == 0:
+            raise ValueError("camera 0 is used by the main flow")
+        return CameraHelper.for_index(index)
+    if source.endswith(".jsonl"):
+        return HandInfoRecordSource(source, loop)
+    if os.path.isdir(source):
+        return ImageDirSource(source, loop)
+    return VideoFileSource(source, loop)
+
+
+def _copy_move_handler(handler: HandMoveHandler) -> HandMoveHandler:
+    res = HandMoveHandler()
+    res.base_speed = handler.base_speed
+    res.acceleration = handler.acceleration
+    res.set_filter(handler.filter_name)
+    res.predict = handler.predict
+    return res
+
+
+class StreamFlow:
+    def __init__(
+        self, config: StreamConfig, pool: ProcessModelPool | None = None
+    ) -> None:
+        """
+        一路独立的流程：自己的输入源、模型实例、滤波状态、手势状态机和光标后端，
+        由 StreamManager 的线程池每次调度执行一帧；传入 pool 时模型独占其中一个子进程
+        """
+        self.config = config
+        self.pool = pool
+        self.name = config.name
+        self.source: FrameSource | HandInfoRecordSource = _open_source(
+            config.source, config.loop
+        )
+        self.actuator: Actuator | None = (
+            create_actuator(config.actuator) if config.actuator else None
+        )
+        self.move_handler = _copy_move_handler(hand_move_handler)
+        self.begin: FlowNode | None = None
+        self.plan: FlowPlan | None = None
+        self.model: HandModel | ProcessModelLease | None = None
+        self.mapping_version = -1
+        # 只关闭自己打开的输入源
+        self._owns_source = False
+
+        self.running = False
+        self.finished = False
+        self.error: str | None = None
+        self.frames = 0
+        self.fps = 0.0
+        self.latency = 0.0
+        self._last_frame = 0.0
+
+    @property
+    def from_landmarks(self) -> bool:
+        return isinstance(self.source, HandInfoRecordSource)
+
+    def build(self) -> FlowNode:
+        """
+        与 init_graph 相同的结构，输入源不在图中，由 step 读取后交给图的起点
+        """
+        hands_filter = LandMarkFilterNode()
+        smooth = LandMarkSmoothNode(self.move_handler)
+        hands_filter.add_next(smooth)
+        smooth.add_next(CursorMoveHandleNode(self.move_handler))
+        self.mapping_version, composes = gesture_mapping_snapshot()
+        smooth.add_next(GestureAutomatonNode(composes, move_handler=self.move_handler))
+        if self.from_landmarks:
+            return hands_filter
+        if self.model is None:
+            self.model = (
+                self.pool.lease()
+                if self.pool is not None
+                else model_registry.acquire("gesture")
+            )
+        model_node = GestureRecognizeNode(self.model)
+        model_node.add_next(hands_filter)
+        return model_node
+
+    def open(self):
+        try:
+            if not self.source.is_opened:
+                self.source.open()
+                self._owns_source = True
+            self.begin = self.build()
+            self.begin.init()
+            self.plan = compile_flow(self.begin)
+        except Exception:
+            # 已经打开的输入源和借到的模型都要还回去
+            self.close()
+            raise
+        self.frames = 0
+        self.fps = 0.0
+        self.latency = 0.0
+        self.finished = False
+        self.error = None
+        self._last_frame = time.perf_counter()
+
+    def close(self):
+        if self.begin is not None:
+            self.begin.clean_effect()
+            self.begin = None
+            self.plan = None
+        if self._owns_source:
+            self._owns_source = False
+            if self.source.is_opened:
+                self.source.close()
+        if isinstance(self.model, ProcessModelLease):
+            self.model.close()
+        elif self.model is not None:
+            model_registry.release(self.model)
+        self.model = None
+
+    def step(self) -> bool:
+        """
+        读取并处理一帧，输入结束时返回 False
+        """
+        assert self.plan is not None
+        try:
+            _in = self.source.read()
+        except EndOfRecording:
+            self.finished = True
+            return False
+        t_read = time.perf_counter()
+        binding = (
+            actuator_manager.bind(self.actuator)
+            if self.actuator is not None
+            else nullcontext()
+        )
+        with binding:
+            self.plan.run(_in)
+        now = time.perf_counter()
+        # 延迟只统计读到输入之后的处理时间，不包括等待摄像头的时间
+        self.latency = self.latency * 0.9 + (now - t_read) * 0.1
+        interval = now - self._last_frame
+        self._last_frame = now
+        if interval > 0:
+            fps = 1 / interval
+            self.fps = fps if self.frames == 0 else self.fps * 0.9 + fps * 0.1
+        self.frames += 1
+        return True
+
+    @property
+    def state(self) -> dict[str, Any]:
+        source = self.config.source
+        return {
+            "name": self.name,
+            "source": source,
+            "actuator": self.actuator.name if self.actuator else None,
+            "process": self.config.process,
+            "running": self.running,
+            "finished": self.finished,
+            "error": self.error,
+            "frames": self.frames,
+            "fps": round(self.fps, 2),
+            "latencyMs": round(self.latency * 1000, 3),
+            "mappingVersion": self.mapping_version,
+        }
+
+
+class StreamManager:
+    def __init__(
+        self, max_workers: int | None = None, inference_model: str = "gesture"
+    ) -> None:
+        """
+        管理多路 StreamFlow：每路一次只有一帧在执行，执行完后重新提交到线程池，
+        路数多于线程数时各路轮流执行；process 的流共用一个子进程池，每路独占一个子进程
+        """
+        self.max_workers = max_workers or max(2, os.cpu_count() or 1)
+        self.inference_model = inference_model
+        self.inference_pool: ProcessModelPool | None = None
+        self.streams: dict[str, StreamFlow] = {}
+        self._futures: dict[str, Future] = {}
+        # stop 等待超时、还在执行最后一帧的流，这一帧结束后才关闭
+        self._closing: dict[str, Future] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="stream"
+            )
+        return self._executor
+
+    def add(self, config: StreamConfig) -> StreamFlow:
+        with self._lock:
+            if config.name in self.streams:
+                raise ValueError(f"stream {config.name} already exists")
+            index = _camera_index(config.source)
+            if index is not None and any(
+                _camera_index(stream.config.source) == index
+                for stream in self.streams.values()
+            ):
+                raise ValueError(f"camera {index} is used by another stream")
+            pool = None
+            if config.process:
+                if self.inference_pool is None:
+                    # 子进程在每一路第一次启动时按需创建
+                    self.inference_pool = create_process_model(self.inference_model, 0)
+                pool = self.inference_pool
+            stream = self.streams[config.name] = StreamFlow(config, pool)
+        return stream
+
+    def get(self, name: str) -> StreamFlow:
+        if name not in self.streams:
+            raise KeyError(f"stream {name} not found")
+        return self.streams[name]
+
+    def remove(self, name: str):
+        self.stop(name)
+        with self._lock:
+            self.streams.pop(name, None)
+
+    def start(self, name: str):
+        stream = self.get(name)
+        with self._lock:
+            if stream.running:
+                raise RuntimeError(f"stream {name} is running")
+            if name in self._closing:
+                raise RuntimeError(f"stream {name} is stopping")
+            stream.open()
+            stream.running = True
+            try:
+                self._submit(stream)
+            except Exception:
+                stream.running = False
+                stream.close()
+                raise
+        logger.info(f"stream {name} start")
+
+    def _submit(self, stream: StreamFlow):
+        self._futures[stream.name] = self._get_executor().submit(self._run_step, stream)
+
+    def _run_step(self, stream: StreamFlow):
+        try:
+            ok = stream.step()
+        except Exception as err:
+            logger.exception(err)
+            stream.error = str(err)
+            ok = False
+        with self._lock:
+            if not stream.running:
+                return
+            if ok:
+                self._submit(stream)
+                return
+            # 输入结束或出错，自己停下
+            stream.running = False
+            self._futures.pop(stream.name, None)
+        stream.close()
+        logger.info(f"stream {stream.name} finished")
+
+    def stop(self, name: str, timeout: float = 10):
+        stream = self.get(name)
+        with self._lock:
+            if not stream.running:
+                return
+            stream.running = False
+            future = self._futures.pop(name, None)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except TimeoutError:
+                # 读取一直阻塞时不能在这里关闭，否则模型和输入源会在使用中被释放
+                logger.warning(f"stream {name} step not finished in {timeout}s")
+                with self._lock:
+                    self._closing[name] = future
+                future.add_done_callback(lambda _: self._close_later(stream))
+                return
+        stream.close()
+        logger.info(f"stream {name} stop")
+
+    def _close_later(self, stream: StreamFlow):
+        try:
+            stream.close()
+        finally:
+            with self._lock:
+                self._closing.pop(stream.name, None)
+        logger.info(f"stream {stream.name} stop")
+
+    def shutdown(self):
+        for name in list(self.streams):
+            self.stop(name)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+            self.inference_pool = None
+
+    @property
+    def state(self) -> dict[str, Any]:
+        res: dict[str, Any] = {
+            "workers": self.max_workers,
+            "streams": [stream.state for stream in self.streams.values()],
+        }
+        if self.inference_pool is not None:
+            res["inference"] = self.inference_pool.state
+        return res
+
+
+stream_manager = StreamManager()
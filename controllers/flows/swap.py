@@ -0,0 +1,91 @@
+import threading
+
+from typing import Any
+
+from controllers.flows.compiler import FlowPlan, compile_flow
+from controllers.flows.node import FlowNode, FlowNodeBase, NoResult, _NoResult
+from controllers.flows.profiler import flow_profiler
+
+
+class SwapFlowNode(FlowNodeBase[Any, _NoResult]):
+    def __init__(self, name: str = "") -> None:
+        """
+        持有一个可以在运行中替换的子图：新子图在其他线程中构建、init 并编译好后发布，
+        在下一帧开始执行前原子地替换掉旧子图，不需要停止整个流程
+        """
+        super().__init__()
+        self.name = name
+        self.inner: FlowNode | None = None
+        self.plan: FlowPlan | None = None
+        self.version = -1
+        self.swaps = 0
+        self._pending: tuple[int, FlowNode, FlowPlan] | None = None
+        self._lock = threading.Lock()
+
+    def publish(self, inner: FlowNode, version: int) -> bool:
+        """
+        可以在任意线程调用，版本号不比当前和待替换的新时忽略
+        """
+        inner.init()
+        plan = compile_flow(inner)
+        with self._lock:
+            pending = self._pending
+            latest = max(self.version, pending[0] if pending else -1)
+            if version <= latest:
+                return False
+            self._pending = (version, inner, plan)
+        return True
+
+    def _swap(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        old = self.inner
+        self.version, self.inner, self.plan = pending
+        self.swaps += 1
+        if old is not None:
+            old.clean_effect()
+            flow_profiler.forget(old)
+
+    def forward(self, _in: Any) -> _NoResult:
+        if self._pending is not None:
+            self._swap()
+        if self.plan is not None:
+            self.plan.run(_in)
+        return NoResult
+
+    def clear(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        # 待替换的子图已经 init 过，丢弃前同样需要清理
+        if pending is not None:
+            pending[1].clean_effect()
+        if self.inner is not None:
+            flow_profiler.forget(self.inner)
+        self.inner = None
+        self.plan = None
+        self.version = -1
+
+    def clean_effect(self):
+        if self.inner is not None:
+            self.inner.clean_effect()
+        return super().clean_effect()
+
+    def profile_nodes(self) -> list[FlowNode]:
+        # 子图由自己的 plan 执行，只暴露给性能报告，不让编译器展开
+        inner = self.inner
+        return [inner] if inner is not None else []
+
+    @property
+    def label(self) -> str:
+        inner = self.inner.label if self.inner is not None else "empty"
+        return f"{type(self).__name__}[{self.name or inner}@{self.version}]"
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "pending": self._pending is not None,
+            "swaps": self.swaps,
+        }
@@ -1,4 +1,5 @@
-from typing import Generic, Iterable, Protocol, TypeVar, Callable
+from collections import deque
+from typing import Any, Generic, Iterable, Protocol, TypeVar, Callable
 
 from controllers.hand_info import Position3D, distance_nd
 
@@ -37,51 +38,142 @@ class FuncWindowHandler(WindowHandlerBase[T, P]):
         return self.func(it)
 
 
-def _all(it: Iterable[bool]) -> bool:
-    return all(it)
+class IncrementalWindowHandler(WindowHandlerBase[T, P]):
+    """
+    增量维护窗口状态的 handler：窗口每滑动一次只调用 push/evict 更新状态，
+    result 以 O(1) 给出结果，窗口再长也不会增加每帧的开销；
+    handler 是共享的，状态由 create_state 为每个窗口单独创建
+    """
 
+    def create_state(self, n: int) -> Any:
+        raise NotImplementedError
 
-def _all_not(it: Iterable[bool]) -> bool:
-    return all(not i for i in it)
+    def push(self, state: Any, it: T):
+        raise NotImplementedError
 
+    def evict(self, state: Any, it: T):
+        raise NotImplementedError
 
-def _jump_true(it: Iterable[bool]) -> bool:
-    it = iter(it)
-    return not next(it) and _all(it)
+    def result(self, state: Any) -> P:
+        raise NotImplementedError
 
+    def __call__(self, it: Iterable[T]) -> P:
+        items = list(it)
+        state = self.create_state(len(items))
+        for i in items:
+            self.push(state, i)
+        return self.result(state)
 
-def _jump_false(it: Iterable[bool]) -> bool:
-    it = iter(it)
-    return next(it) and _all_not(it)
 
+class _FlipState:
+    __slots__ = ("idx", "size", "last_true", "last_false")
+
+    def __init__(self) -> None:
+        self.idx = 0
+        self.size = 0
+        self.last_true = -1
+        self.last_false = -1
+
+
+class _FlipWindowHandler(IncrementalWindowHandler[bool, bool]):
+    """
+    只记录最后一次出现 true 和 false 的位置，窗口的起点是 idx - size
+    """
+
+    def create_state(self, n: int) -> _FlipState:
+        return _FlipState()
+
+    def push(self, state: _FlipState, it: bool):
+        if it:
+            state.last_true = state.idx
+        else:
+            state.last_false = state.idx
+        state.idx += 1
+        state.size += 1
+
+    def evict(self, state: _FlipState, it: bool):
+        state.size -= 1
+
+
+class AllTrueHandler(_FlipWindowHandler):
+    def result(self, state: _FlipState) -> bool:
+        return state.last_false < state.idx - state.size
 
-def _move_dir(
-    dir: tuple[int, int], min_dis: float = 5
-) -> Callable[[Iterable[Position3D]], bool]:
-    def warp(it: Iterable[Position3D]) -> bool:
-        ite = iter(it)
-        first_pos = next(ite)
-        end_pos = first_pos
-        for i in ite:
-            end_pos = i
-            diff = (
-                end_pos[0] - first_pos[0],
-                end_pos[1] - first_pos[1],
-            )
-            if (dir[0] != 0 and diff[0] * dir[0] <= 0) or (
-                dir[1] != 0 and diff[1] * dir[1] <= 0
-            ):
-                return False
-        return distance_nd(end_pos, first_pos) >= min_dis
 
-    return warp
+class JumpHandler(_FlipWindowHandler):
+    def __init__(self, first: bool, name: str = "") -> None:
+        """
+        窗口第一个值为 first，之后全部是 not first
+        """
+        super().__init__(name)
+        self.first = first
+
+    def result(self, state: _FlipState) -> bool:
+        if state.size == 0:
+            return False
+        start = state.idx - state.size
+        last = state.last_true if self.first else state.last_false
+        return last == start
+
+
+class _MoveState:
+    __slots__ = ("idx", "window", "mins")
+
+    def __init__(self, axes: int) -> None:
+        self.idx = 0
+        self.window: deque[tuple[int, Position3D]] = deque()
+        # 每个需要检查的轴一个单调递增队列，队首是窗口内的最小值
+        self.mins: list[deque[tuple[int, float]]] = [deque() for _ in range(axes)]
+
+
+class MoveDirHandler(IncrementalWindowHandler[Position3D, bool]):
+    def __init__(self, dir: tuple[int, int], min_dis: float = 5, name: str = ""):
+        """
+        窗口内之后的每个位置相对第一个位置都在 dir 方向上，并且首尾距离不小于 min_dis；
+        对每个轴维护 pos * dir 的滑动最小值
+        """
+        super().__init__(name)
+        self.dir = dir
+        self.min_dis = min_dis
+        self.axes = [(a, d) for a, d in enumerate(dir) if d != 0]
+
+    def create_state(self, n: int) -> _MoveState:
+        return _MoveState(len(self.axes))
+
+    def push(self, state: _MoveState, it: Position3D):
+        idx = state.idx
+        state.idx += 1
+        state.window.append((idx, it))
+        for (axis, d), mins in zip(self.axes, state.mins):
+            val = float(it[axis]) * d
+            while mins and mins[-1][1] >= val:
+                mins.pop()
+            mins.append((idx, val))
+
+    def evict(self, state: _MoveState, it: Position3D):
+        idx, _ = state.window.popleft()
+        for mins in state.mins:
+            if mins and mins[0][0] == idx:
+                mins.popleft()
+
+    def result(self, state: _MoveState) -> bool:
+        window = state.window
+        if not window:
+            return False
+        start, first = window[0]
+        for (axis, d), mins in zip(self.axes, state.mins):
+            # 单调队列中排在窗口起点之后的第一个元素就是其余位置的最小值
+            rest = mins[1] if mins[0][0] == start and len(mins) > 1 else mins[0]
+            if rest[0] != start and rest[1] <= float(first[axis]) * d:
+                return False
+        return distance_nd(window[-1][1], first) >= self.min_dis
 
 
-jump_true = FuncWindowHandler(_jump_true, "JumpTrue")
-jump_false = FuncWindowHandler(_jump_false, "JumpFalse")
-all_true = FuncWindowHandler(_all, "AllTrue")
-move_down = FuncWindowHandler(_move_dir((0, -1)), "MoveDown")
-move_up = FuncWindowHandler(_move_dir((0, 1)), "MoveUp")
+jump_true = JumpHandler(False, "JumpTrue")
+jump_false = JumpHandler(True, "JumpFalse")
+all_true = AllTrueHandler("AllTrue")
+move_down = MoveDirHandler((0, -1), name="MoveDown")
+move_up = MoveDirHandler((0, 1), name="MoveUp")
 
 
 # def _add_handle(handle: WindowHandler):
@@ -1,11 +1,13 @@
 from enum import IntEnum
+from itertools import chain
 from math import sqrt
+from typing import Any, Sequence
 
-from dataclasses import dataclass, field
-from typing_extensions import Self
+import numpy as np
 
+from typing_extensions import Self
 
-from utils import distance
+from controllers.types import RoiTuple
 from utils.types import Position, Position3D
 
 
@@ -51,23 +53,111 @@ def distance_nd(pos1: tuple[float | int, ...], pos2: tuple[float | int, ...]):
     return sqrt(res)
 
 
-@dataclass
+LANDMARK_COUNT = 21
+
+
+def landmark_array(
+    points: Sequence[Any],
+    width: int,
+    height: int,
+    with_z: bool = True,
+    roi: RoiTuple | None = None,
+) -> np.ndarray:
+    """
+    把模型输出的归一化关键点一次性拷贝成 (21, 3) 的 float32 数组并换算成像素坐标，
+    如果输入是裁剪过的画面，同时映射回原始画面的坐标
+    """
+    landmarks = np.fromiter(
+        chain.from_iterable((p.x, p.y, p.z) for p in points),
+        dtype=np.float32,
+        count=len(points) * 3,
+    ).reshape(-1, 3)
+    if roi is None:
+        landmarks *= (width, height, width if with_z else 0)
+        return landmarks
+    landmarks *= (roi.width, roi.height, roi.width if with_z else 0)
+    landmarks[:, 0] += roi.x
+    landmarks[:, 1] += roi.y
+    return landmarks
+
+
+def _as_landmark_array(pos: Sequence[Sequence[float]] | np.ndarray) -> np.ndarray:
+    arr = np.asarray(pos, dtype=np.float32)
+    if arr.shape == (LANDMARK_COUNT, 3):
+        return np.ascontiguousarray(arr)
+    res = np.zeros((LANDMARK_COUNT, 3), dtype=np.float32)
+    n, dim = min(arr.shape[0], LANDMARK_COUNT), min(arr.shape[1], 3)
+    res[:n, :dim] = arr[:n, :dim]
+    return res
+
+
 class HandInfo:
-    hand_landmark_pos: list[Position3D]
-    camera_size: tuple[int, int]
-    c_time: float
-    gesture: Gesture | None = None
-    _unit: float = field(init=False)
+    __slots__ = (
+        "landmarks",
+        "camera_size",
+        "c_time",
+        "frame_time",
+        "gesture",
+        "match_cache",
+        "_unit",
+        "_pos_list",
+    )
+
+    def __init__(
+        self,
+        hand_landmark_pos: Sequence[Sequence[float]] | np.ndarray,
+        camera_size: tuple[int, int],
+        c_time: float,
+        gesture: Gesture | None = None,
+        frame_time: float | None = None,
+    ) -> None:
+        """
+        关键点保存在一个连续的 (21, 3) float32 数组 landmarks 中，
+        hand_landmark_pos 仍然以 list[Position3D] 的形式提供给旧的调用方，
+        传入 (21, 3) float32 数组时直接持有该数组，不再拷贝；
+        frame_time 是这只手所在画面的采集时间
+        """
+        self.landmarks = _as_landmark_array(hand_landmark_pos)
+        self.camera_size = camera_size
+        self.c_time = c_time
+        self.frame_time = c_time if frame_time is None else frame_time
+        self.gesture = gesture
+        self.match_cache: dict[Any, list[bool]] | None = None
+        self._pos_list: list[Position3D] | None = None
+        diff = (
+            self.landmarks[LandMark.WRIST] - self.landmarks[LandMark.MIDDLE_FINGER_MCP]
+        )
+        self._unit = sqrt(float(diff.dot(diff)))
+
+    def __repr__(self) -> str:
+        return (
+            f"HandInfo(camera_size={self.camera_size}, c_time={self.c_time}, "
+            f"gesture={self.gesture}, anchor={self.anchor})"
+        )
 
-    def __post_init__(self):
-        self._unit = distance_nd(self.hand_landmark_pos[0], self.anchor)
+    @property
+    def hand_landmark_pos(self) -> list[Position3D]:
+        if self._pos_list is None:
+            self._pos_list = list(map(tuple, self.landmarks.tolist()))
+        return self._pos_list
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HandInfo):
+            return NotImplemented
+        return (
+            self.camera_size == other.camera_size
+            and self.c_time == other.c_time
+            and self.frame_time == other.frame_time
+            and self.gesture == other.gesture
+            and np.array_equal(self.landmarks, other.landmarks)
+        )
 
     @property
     def anchor(self) -> Position3D:
         """
         获取中指根部的坐标，作为整个手掌的锚点
         """
-        return self.hand_landmark_pos[9]
+        return tuple(self.landmarks[LandMark.MIDDLE_FINGER_MCP].tolist())  # type: ignore
 
     @property
     def unit(self) -> float:
@@ -77,17 +167,19 @@ class HandInfo:
         return self.get_mark_distance(lt, rt) * 2.5 < self.unit
 
     def get_mark_distance(self, lt: LandMark, rt: LandMark) -> float:
-        return distance_nd(
-            self.hand_landmark_pos[lt.value], self.hand_landmark_pos[rt.value]
-        )
+        diff = self.landmarks[lt] - self.landmarks[rt]
+        return sqrt(float(diff.dot(diff)))
 
     def anchor_diff(self, other: "HandInfo") -> tuple[Position, float]:
-        p = self.anchor
-        t = other.anchor
-        return (p[0] - t[0], p[1] - t[1]), self.c_time - other.c_time
+        mcp = LandMark.MIDDLE_FINGER_MCP
+        dx, dy = (self.landmarks[mcp, :2] - other.landmarks[mcp, :2]).tolist()
+        return (dx, dy), self.c_time - other.c_time
 
     def distance(self, other: Self) -> float:
-        return distance_nd(self.anchor, other.anchor)
+        mcp = LandMark.MIDDLE_FINGER_MCP
+        diff = self.landmarks[mcp] - other.landmarks[mcp]
+        return sqrt(float(diff.dot(diff)))
 
     def encode_pos(self) -> str:
-        return "/".join(map(lambda x: f"{x[0]},{x[1]}", self.hand_landmark_pos))
+        # 不做取整，与原来直接输出坐标的精度一致
+        return "/".join([f"{x},{y}" for x, y in self.landmarks[:, :2].tolist()])
@@ -1,16 +1,34 @@
+import time
+
 from math import floor, sqrt
-from typing import NamedTuple
+from typing import Callable, NamedTuple
+
+import numpy as np
 
 from controllers.cursor_handle import move, current_position
+from controllers.cursor_motion import cursor_motion
 from controllers.hand_info import HandInfo
 from controllers.types import PositionTuple
-from filter import SlidingWindowMeanFilter
+from filter import KalmanFilter, OneEuroFilter, RunningMeanFilter
 
 
 class MouseState(NamedTuple):
     base_speed: float
     acceleration: float
     pos: PositionTuple
+    motion_rate: float = 0
+    filter: str = "mean"
+    predict: bool = False
+    latency_ms: float = 0
+
+
+# mean 只对锚点位移做滑动平均，其余对全部关键点滤波，none 不滤波
+landmark_filters: dict[str, Callable[[], OneEuroFilter | KalmanFilter] | None] = {
+    "none": None,
+    "mean": None,
+    "oneEuro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
 
 
 def direction(t: tuple[float, float]) -> tuple[float, float]:
@@ -21,13 +39,45 @@ def direction(t: tuple[float, float]) -> tuple[float, float]:
 
 class HandMoveHandler:
     def __init__(self) -> None:
-        self.pos_filter: SlidingWindowMeanFilter[int | float] = SlidingWindowMeanFilter(
-            5
-        )
+        self.pos_filter: RunningMeanFilter[int | float] = RunningMeanFilter(5)
         self.last_hand = None
         self.base_speed = 0.1
         self.acceleration = 0.1
         self.enable_move = True
+        self.filter_name = "mean"
+        self.landmark_filter: OneEuroFilter | KalmanFilter | None = None
+        self.predict = False
+        self.max_predict = 0.1
+        self.latency = 0.0
+
+    def set_filter(self, name: str):
+        if name not in landmark_filters:
+            raise ValueError(f"unknown filter {name}")
+        factory = landmark_filters[name]
+        self.landmark_filter = factory() if factory is not None else None
+        self.filter_name = name
+
+    def smooth(self, hand_info: HandInfo) -> HandInfo:
+        """
+        对当前手的全部关键点滤波，开启 predict 时按照测得的采集到输出的延迟向前外推
+        """
+        landmark_filter = self.landmark_filter
+        if landmark_filter is None:
+            return hand_info
+        if landmark_filter.t and hand_info.c_time - landmark_filter.t > 0.3:
+            landmark_filter.reset()
+        pos = landmark_filter.push(hand_info.landmarks, hand_info.c_time)
+        latency = min(max(time.time() - hand_info.frame_time, 0), self.max_predict)
+        self.latency = self.latency * 0.9 + latency * 0.1
+        if self.predict:
+            pos = landmark_filter.predict(self.latency)
+        return HandInfo(
+            pos.astype(np.float32),
+            hand_info.camera_size,
+            hand_info.c_time,
+            hand_info.gesture,
+            hand_info.frame_time,
+        )
 
     def forward(self, hand_info: HandInfo):
         if not self.enable_move:
@@ -41,7 +91,9 @@ class HandMoveHandler:
         pos_filter = self.pos_filter
         (dx, dy), dt = cur_hand.anchor_diff(last_hand)
         dt = max(dt, 0.01)
-        dx, dy = map(int, pos_filter.push((dx, dy)))
+        if self.filter_name == "mean":
+            dx, dy = pos_filter.push((dx, dy))
+        dx, dy = int(dx), int(dy)
         x_dir, y_dir = direction((dx, dy))
         speed = sqrt(dx**2 + dy**2) / max(dt, 0.001)
         scale = speed * self.base_speed * pow(max(speed, 0.0001), self.acceleration)
@@ -51,7 +103,16 @@ class HandMoveHandler:
     @property
     def state(self) -> MouseState:
         cur_pos = current_position()
-        return MouseState(self.base_speed, self.acceleration, PositionTuple(*cur_pos))
+        motion_rate = cursor_motion.rate if cursor_motion.running else 0
+        return MouseState(
+            self.base_speed,
+            self.acceleration,
+            PositionTuple(*cur_pos),
+            motion_rate,
+            self.filter_name,
+            self.predict,
+            round(self.latency * 1000, 2),
+        )
 
     @state.setter
     def state(self, val: dict):
@@ -59,6 +120,17 @@ class HandMoveHandler:
             self.base_speed = float(val["baseSpeed"])
         if "acceleration" in val and val["acceleration"] is not None:
             self.acceleration = float(val["acceleration"])
+        if "filter" in val and val["filter"] is not None:
+            self.set_filter(val["filter"])
+        if "predict" in val and val["predict"] is not None:
+            self.predict = bool(val["predict"])
+        if "motionRate" in val and val["motionRate"] is not None:
+            rate = float(val["motionRate"])
+            if rate > 0:
+                cursor_motion.rate = rate
+                cursor_motion.start()
+            else:
+                cursor_motion.stop()
 
 
 hand_move_handler = HandMoveHandler()
@@ -0,0 +1,119 @@
+import struct
+
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from controllers.hand_info import HandInfo, LANDMARK_COUNT
+
+# 版本、标记、帧序号、画面宽高、手的数量
+_HEADER = struct.Struct("<BBIHHB")
+VERSION = 1
+FLAG_KEYFRAME = 1
+FLAG_CURRENT = 2
+# 坐标按 1/4 像素量化成 int16，差分帧用 int8
+SCALE = 4
+
+
+class LandmarkFrame(NamedTuple):
+    seq: int
+    width: int
+    height: int
+    # (n, 21, 2) 的像素坐标，有当前手时最后一只就是当前手
+    hands: np.ndarray
+    has_current: bool
+    keyframe: bool
+
+
+def _stack_hands(hands: list[HandInfo], current: HandInfo | None) -> np.ndarray:
+    all_hands = hands if current is None else [*hands, current]
+    pos = np.empty((len(all_hands), LANDMARK_COUNT, 2), np.float32)
+    for idx, hand in enumerate(all_hands):
+        pos[idx] = hand.landmarks[:, :2]
+    return pos
+
+
+class LandmarkEncoder:
+    def __init__(self, keyframe_interval: int = 30) -> None:
+        """
+        每个连接一个编码器：第一帧、手的数量变化、差分超出 int8 或者每隔 keyframe_interval 帧
+        发送关键帧，其余帧只发送和上一帧量化坐标的差
+        """
+        self.keyframe_interval = keyframe_interval
+        self._prev: np.ndarray | None = None
+        self._since_key = 0
+
+    def reset(self):
+        self._prev = None
+
+    def encode(
+        self,
+        seq: int,
+        hands: list[HandInfo],
+        current: HandInfo | None,
+        width: int,
+        height: int,
+    ) -> bytes:
+        pos = _stack_hands(hands, current)
+        quant = np.clip(np.rint(pos * SCALE), -32768, 32767).astype(np.int16)
+        prev = self._prev
+        self._prev = quant
+        flags = FLAG_CURRENT if current is not None else 0
+        if (
+            prev is not None
+            and prev.shape == quant.shape
+            and self._since_key < self.keyframe_interval
+        ):
+            delta = quant.astype(np.int32) - prev
+            if delta.size == 0 or (delta.min() >= -128 and delta.max() <= 127):
+                self._since_key += 1
+                header = _HEADER.pack(VERSION, flags, seq, width, height, len(quant))
+                return header + delta.astype(np.int8).tobytes()
+        self._since_key = 0
+        flags |= FLAG_KEYFRAME
+        header = _HEADER.pack(VERSION, flags, seq, width, height, len(quant))
+        return header + quant.tobytes()
+
+
+class LandmarkDecoder:
+    def __init__(self) -> None:
+        """
+        与 LandmarkEncoder 对应，前端按同样的格式解码
+        """
+        self._prev: np.ndarray | None = None
+
+    def decode(self, data: bytes) -> LandmarkFrame:
+        version, flags, seq, width, height, count = _HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"unknown landmark frame version {version}")
+        keyframe = bool(flags & FLAG_KEYFRAME)
+        shape = (count, LANDMARK_COUNT, 2)
+        if keyframe:
+            quant = np.frombuffer(data, np.int16, offset=_HEADER.size).reshape(shape)
+        else:
+            if self._prev is None or self._prev.shape != shape:
+                raise ValueError("delta frame without keyframe")
+            delta = np.frombuffer(data, np.int8, offset=_HEADER.size).reshape(shape)
+            quant = (self._prev + delta).astype(np.int16)
+        self._prev = quant
+        hands = quant.astype(np.float32) / SCALE
+        return LandmarkFrame(
+            seq, width, height, hands, bool(flags & FLAG_CURRENT), keyframe
+        )
+
+
+def landmark_json(
+    hands: list[HandInfo], current: HandInfo | None
+) -> dict[str, Any] | None:
+    """
+    原来的 json 格式，没有任何手时返回 None
+    """
+    res: dict[str, Any] = {"width": 1280, "height": 720}
+    pos_str = "|".join(map(lambda x: x.encode_pos(), hands))
+    if pos_str != "":
+        res["allHand"] = pos_str
+    if current is not None:
+        res["currentHand"] = current.encode_pos()
+        res["width"] = current.camera_size[0]
+        res["height"] = current.camera_size[1]
+    return res if len(res) > 2 else None
@@ -1,4 +1,6 @@
-from typing import Any, Protocol
+from typing import Any, Iterable, Protocol
+
+import numpy as np
 
 from controllers.hand_info import HandInfo, LandMark, Gesture
 
@@ -56,4 +58,74 @@ class GestureMatch(DictEnum):
         self.func = func
 
     def match(self, hand_info: HandInfo) -> bool:
-        return self.func(hand_info)
+        return gesture_batch_matcher.match(hand_info, self)
+
+
+class BatchGestureMatcher:
+    def __init__(self, members: Iterable[GestureMatch]) -> None:
+        """
+        一次计算所有参与匹配的关键点（指尖）两两之间的距离矩阵，
+        然后用一次 NumPy 运算得到所有 GestureMatch 的结果，结果缓存在 HandInfo 上
+        """
+        self.members = list(members)
+        self.index = {member: idx for idx, member in enumerate(self.members)}
+
+        touch = [
+            (idx, m.func)
+            for idx, m in enumerate(self.members)
+            if isinstance(m.func, LandMarkMatchGen)
+        ]
+        marks = sorted({mark for _, f in touch for mark in (f.lt, f.rt)})
+        mark_pos = {mark: pos for pos, mark in enumerate(marks)}
+        self.marks = np.array(marks, dtype=np.intp)
+        self.touch_idx = [idx for idx, _ in touch]
+        self.touch_lt = np.array([mark_pos[f.lt] for _, f in touch], dtype=np.intp)
+        self.touch_rt = np.array([mark_pos[f.rt] for _, f in touch], dtype=np.intp)
+
+        self.gesture = [
+            (idx, m.func.gesture)
+            for idx, m in enumerate(self.members)
+            if isinstance(m.func, GestureMatchGen)
+        ]
+        self.other = [
+            (idx, m.func)
+            for idx, m in enumerate(self.members)
+            if not isinstance(m.func, (LandMarkMatchGen, GestureMatchGen))
+        ]
+
+    def distance_matrix(self, hand_info: HandInfo, squared: bool = False):
+        pos = hand_info.landmarks[self.marks]
+        diff = pos[:, None, :] - pos[None, :, :]
+        dis = np.einsum("ijk,ijk->ij", diff, diff)
+        return dis if squared else np.sqrt(dis)
+
+    def evaluate(self, hand_info: HandInfo) -> list[bool]:
+        res = [False] * len(self.members)
+        if self.touch_idx:
+            dis = self.distance_matrix(hand_info, squared=True)
+            # 与 HandInfo.is_touched 相同：distance * 2.5 < unit，两边取平方比较
+            limit = (hand_info.unit / 2.5) ** 2
+            touched = (dis[self.touch_lt, self.touch_rt] < limit).tolist()
+            for idx, t in zip(self.touch_idx, touched):
+                res[idx] = t
+        gesture = hand_info.gesture
+        for idx, g in self.gesture:
+            res[idx] = g == gesture
+        for idx, func in self.other:
+            res[idx] = func(hand_info)
+        return res
+
+    def match_all(self, hand_info: HandInfo) -> list[bool]:
+        cache = hand_info.match_cache
+        if cache is None:
+            cache = hand_info.match_cache = {}
+        res = cache.get(self)
+        if res is None:
+            res = cache[self] = self.evaluate(hand_info)
+        return res
+
+    def match(self, hand_info: HandInfo, member: GestureMatch) -> bool:
+        return self.match_all(hand_info)[self.index[member]]
+
+
+gesture_batch_matcher = BatchGestureMatcher(GestureMatch)
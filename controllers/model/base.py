@@ -0,0 +1,46 @@
+import importlib
+
+from typing import Any, Protocol
+
+from controllers.hand_info import HandInfo
+from controllers.types import FrameTuple
+
+# 模型名到 "模块:类" 的映射，也可以直接传 "模块:类"
+model_factories: dict[str, str] = {
+    "gesture": "controllers.model.gesture:GestureModel",
+    "landmark": "controllers.model.landmark:HandLandMarkModel",
+    "landmarkV2": "controllers.model.landmark_v2:HandLandMarkModelV2",
+}
+
+
+class HandModel(Protocol):
+    """
+    模型节点使用的模型接口，mediapipe 模型和 ProcessModelPool 都实现了它；
+    引用这个接口不会导入 mediapipe
+    """
+
+    def forward(self, frame: FrameTuple) -> list[HandInfo]: ...
+
+    def close(self): ...
+
+
+def load_model(name: str, **options: Any) -> HandModel:
+    path = model_factories.get(name, name)
+    module, _, cls = path.partition(":")
+    return getattr(importlib.import_module(module), cls)(**options)
+
+
+class VideoTimestamp:
+    def __init__(self) -> None:
+        """
+        VIDEO 模式要求同一个模型实例的时间戳严格递增；模型在多次启停之间复用，
+        回放的时间戳可能比上一次运行的更早，这时接着上一次的时间戳往后排
+        """
+        self.last = -1
+
+    def next(self, ctime: float) -> int:
+        ts = int(ctime * 1000)
+        if ts <= self.last:
+            ts = self.last + 1
+        self.last = ts
+        return ts
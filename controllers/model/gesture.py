@@ -13,41 +13,59 @@ from mediapipe.tasks.python.vision.gesture_recognizer import (
 
 
 from controllers.types import FrameTuple
-from controllers.hand_info import HandInfo, Gesture
+from controllers.model.base import VideoTimestamp
+from controllers.hand_info import HandInfo, Gesture, landmark_array
 
 model_path = "./controllers/model/gesture_recognizer.task"
 
 
 class GestureModel:
-    def __init__(self) -> None:
-        with open(model_path, "rb") as file:
-            buffer = file.read()
+    def __init__(
+        self,
+        num_hands: int = 3,
+        min_hand_detection_confidence: float = 0.8,
+        min_hand_presence_confidence: float = 0.8,
+        min_tracking_confidence: float = 0.6,
+        video: bool = True,
+    ) -> None:
+        """
+        video 为 False 时使用 IMAGE 模式，每帧独立检测，不做帧间跟踪，
+        用于位置和大小每帧都在变化的裁剪画面
+        """
+        # 由 mediapipe 直接映射模型文件，不再先整个读进 python bytes
         options = GestureRecognizerOptions(
-            base_options=BaseOptions(model_asset_buffer=buffer),
-            running_mode=VisionTaskRunningMode.VIDEO,
-            num_hands=3,
-            min_hand_detection_confidence=0.8,
-            min_hand_presence_confidence=0.8,
-            min_tracking_confidence=0.6,
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=(
+                VisionTaskRunningMode.VIDEO if video else VisionTaskRunningMode.IMAGE
+            ),
+            num_hands=num_hands,
+            min_hand_detection_confidence=min_hand_detection_confidence,
+            min_hand_presence_confidence=min_hand_presence_confidence,
+            min_tracking_confidence=min_tracking_confidence,
         )
         self.landmarker = GestureRecognizer.create_from_options(options)
+        self._timestamp = VideoTimestamp()
+        self.video = video
 
     def forward(self, frame: FrameTuple) -> list[HandInfo]:
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame.frame)
-        hand_land_mark_result = self.landmarker.recognize_for_video(
-            mp_image, int(frame.ctime * 1000)
-        )
+        if self.video:
+            hand_land_mark_result = self.landmarker.recognize_for_video(
+                mp_image, self._timestamp.next(frame.ctime)
+            )
+        else:
+            hand_land_mark_result = self.landmarker.recognize(mp_image)
         res: list[HandInfo] = []
         width, height = frame.width, frame.height
+        camera_size = frame.full_size
         for hand_pos, gesture in zip(
             hand_land_mark_result.hand_landmarks, hand_land_mark_result.gestures
         ):
-            land_pos = [
-                (float(pos.x * width), float(pos.y * height), float(pos.z * width))
-                for pos in hand_pos
-            ]
+            land_pos = landmark_array(hand_pos, width, height, roi=frame.roi)
 
-            hand_info = HandInfo(land_pos, (width, height), time.time())
+            hand_info = HandInfo(
+                land_pos, camera_size, time.time(), frame_time=frame.ctime
+            )
             if gesture and gesture[0].category_name != "None":
                 hand_info.gesture = Gesture[gesture[0].category_name]
             res.append(hand_info)
@@ -55,6 +73,3 @@ class GestureModel:
 
     def close(self):
         self.landmarker.close()
-
-
-global_gesture_model = GestureModel()
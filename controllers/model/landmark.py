@@ -2,33 +2,43 @@ import time
 
 from mediapipe.python.solutions import hands as mhands
 
-from controllers.hand_info import HandInfo
-from controllers.types import Position, FrameTuple
+from controllers.hand_info import HandInfo, landmark_array
+from controllers.types import FrameTuple
 
 
 class HandLandMarkModel:
-    def __init__(self) -> None:
+    def __init__(
+        self, num_hands: int = 2, min_hand_detection_confidence: float = 0.8
+    ) -> None:
         self.hands = mhands.Hands(
             model_complexity=0,
             static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.8,
+            max_num_hands=num_hands,
+            min_detection_confidence=min_hand_detection_confidence,
         )
 
     def forward(self, frame_tuple: FrameTuple) -> list[HandInfo]:
-        frame, width, height, _ = frame_tuple
-        results = self.hands.process(frame[:, :, ::-1])
+        frame = frame_tuple.frame
+        camera_size = frame_tuple.full_size
+        results = self.hands.process(frame)
 
         hand_info_list: list[HandInfo] = []
         if results.multi_hand_landmarks:  # type: ignore
             for hand_landmarks in results.multi_hand_landmarks:  # type: ignore
-                hands_info: list[Position] = [(0, 0) for _ in range(22)]
-                for idx, landmark in enumerate(hand_landmarks.landmark):
-                    x = float(landmark.x * frame.shape[1])
-                    y = float(landmark.y * frame.shape[0])
-                    hands_info[idx] = (x, y)
+                hands_info = landmark_array(
+                    hand_landmarks.landmark,
+                    frame.shape[1],
+                    frame.shape[0],
+                    with_z=False,
+                    roi=frame_tuple.roi,
+                )
                 hand_info_list.append(
-                    HandInfo(hands_info, (width, height), time.time())
+                    HandInfo(
+                        hands_info,
+                        camera_size,
+                        time.time(),
+                        frame_time=frame_tuple.ctime,
+                    )
                 )
         return hand_info_list
 
@@ -13,35 +13,40 @@ from mediapipe.tasks.python.vision.hand_landmarker import (
 
 
 from controllers.types import FrameTuple
-from controllers.hand_info import HandInfo
+from controllers.model.base import VideoTimestamp
+from controllers.hand_info import HandInfo, landmark_array
 
 model_path = "./controllers/model/hand_landmarker.task"
 
 
 class HandLandMarkModelV2:
-    def __init__(self) -> None:
-        with open(model_path, "rb") as file:
-            buffer = file.read()
+    def __init__(
+        self, num_hands: int = 2, min_hand_detection_confidence: float = 0.7
+    ) -> None:
         options = HandLandmarkerOptions(
-            base_options=BaseOptions(model_asset_buffer=buffer),
+            base_options=BaseOptions(model_asset_path=model_path),
             running_mode=VisionTaskRunningMode.VIDEO,
-            num_hands=2,
-            min_hand_detection_confidence=0.7,
+            num_hands=num_hands,
+            min_hand_detection_confidence=min_hand_detection_confidence,
         )
         self.landmarker = HandLandmarker.create_from_options(options)
+        self._timestamp = VideoTimestamp()
 
     def forward(self, frame: FrameTuple) -> list[HandInfo]:
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame.frame)
         hand_land_mark_result = self.landmarker.detect_for_video(
-            mp_image, int(frame.ctime * 1000)
+            mp_image, self._timestamp.next(frame.ctime)
         )
         res: list[HandInfo] = []
         width, height = frame.width, frame.height
+        camera_size = frame.full_size
         for hand_pos in hand_land_mark_result.hand_landmarks:
-            land_pos = [
-                (float(pos.x * width), float(pos.y * height)) for pos in hand_pos
-            ]
-            res.append(HandInfo(land_pos, (width, height), time.time()))
+            land_pos = landmark_array(
+                hand_pos, width, height, with_z=False, roi=frame.roi
+            )
+            res.append(
+                HandInfo(land_pos, camera_size, time.time(), frame_time=frame.ctime)
+            )
         return res
 
     def close(self):
@@ -0,0 +1,369 @@
+import multiprocessing
+import threading
+
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+
+from controllers.hand_info import Gesture, HandInfo, LANDMARK_COUNT
+from controllers.model.base import load_model
+from controllers.types import FrameTuple
+
+from utils import logger
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def _pack_hands(hands: list[HandInfo]) -> tuple[np.ndarray, list[int], list[float]]:
+    landmarks = np.empty((len(hands), LANDMARK_COUNT, 3), np.float32)
+    for idx, hand in enumerate(hands):
+        landmarks[idx] = hand.landmarks
+    gestures = [-1 if hand.gesture is None else int(hand.gesture) for hand in hands]
+    return landmarks, gestures, [hand.c_time for hand in hands]
+
+
+def _worker_main(conn: Connection, model_name: str):
+    """
+    子进程入口：画面从共享内存读取，只把关键点数组通过 pipe 发回
+    """
+    try:
+        model = load_model(model_name)
+    except Exception as err:
+        conn.send(("error", f"{type(err).__name__}: {err}"))
+        return
+    conn.send(("ready",))
+    shm: SharedMemory | None = None
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            kind = msg[0]
+            if kind == "ping":
+                conn.send(("pong", msg[1]))
+            elif kind == "shm":
+                if shm is not None:
+                    shm.close()
+                shm = SharedMemory(msg[1])
+            elif kind == "infer":
+                _, seq, shape, width, height, ctime, roi = msg
+                assert shm is not None
+                frame = np.ndarray(shape, np.uint8, buffer=shm.buf)
+                hands = model.forward(FrameTuple(frame, width, height, ctime, roi))
+                conn.send(("ok", seq, *_pack_hands(hands)))
+                del frame
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if shm is not None:
+            shm.close()
+        model.close()
+
+
+class _Worker:
+    def __init__(self, model_name: str, idx: int) -> None:
+        self.model_name = model_name
+        self.idx = idx
+        self.lock = threading.Lock()
+        self.proc: multiprocessing.process.BaseProcess | None = None
+        self.conn: Connection | None = None
+        self.shm: SharedMemory | None = None
+        self.seq = 0
+        self.leased = False
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.is_alive()
+
+    def start(self, load_timeout: float):
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe()
+        self.proc = ctx.Process(
+            target=_worker_main,
+            args=(child, self.model_name),
+            name=f"inference-{self.idx}",
+            daemon=True,
+        )
+        self.proc.start()
+        child.close()
+        self.conn = parent
+        if not parent.poll(load_timeout):
+            self.stop()
+            raise WorkerError(f"inference worker {self.idx} load timeout")
+        try:
+            msg = parent.recv()
+        except EOFError:
+            msg = ("error", "process exited")
+        if msg[0] != "ready":
+            self.stop()
+            raise WorkerError(f"inference worker {self.idx} load failed: {msg[1]}")
+        if self.shm is not None:
+            parent.send(("shm", self.shm.name))
+
+    def stop(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.proc is not None:
+            self.proc.join(1)
+            if self.proc.is_alive():
+                self.proc.kill()
+                self.proc.join()
+            self.proc = None
+
+    def release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def _ensure_shm(self, nbytes: int):
+        if self.shm is not None and self.shm.size >= nbytes:
+            return
+        assert self.conn is not None
+        self.release_shm()
+        self.shm = SharedMemory(create=True, size=nbytes)
+        self.conn.send(("shm", self.shm.name))
+
+    def _recv(self, kind: str, seq: int, timeout: float) -> tuple:
+        assert self.conn is not None
+        while True:
+            if not self.conn.poll(timeout):
+                raise WorkerError(f"inference worker {self.idx} timeout")
+            msg = self.conn.recv()
+            # 超时后迟到的旧结果直接丢弃
+            if msg[0] == kind and msg[1] == seq:
+                return msg
+
+    def infer(self, frame: FrameTuple, timeout: float) -> list[HandInfo]:
+        assert self.conn is not None
+        data = frame.frame
+        self._ensure_shm(data.nbytes)
+        assert self.shm is not None
+        np.copyto(np.ndarray(data.shape, np.uint8, buffer=self.shm.buf), data)
+        self.seq += 1
+        self.conn.send(
+            (
+                "infer",
+                self.seq,
+                data.shape,
+                frame.width,
+                frame.height,
+                frame.ctime,
+                frame.roi,
+            )
+        )
+        _, _, landmarks, gestures, c_times = self._recv("ok", self.seq, timeout)
+        camera_size = frame.full_size
+        return [
+            HandInfo(
+                landmarks[idx],
+                camera_size,
+                c_times[idx],
+                None if gesture < 0 else Gesture(gesture),
+                frame_time=frame.ctime,
+            )
+            for idx, gesture in enumerate(gestures)
+        ]
+
+    def ping(self, timeout: float):
+        assert self.conn is not None
+        self.seq += 1
+        self.conn.send(("ping", self.seq))
+        self._recv("pong", self.seq, timeout)
+
+
+class ProcessModelPool:
+    def __init__(
+        self,
+        model_name: str = "gesture",
+        workers: int = 1,
+        timeout: float = 2.0,
+        load_timeout: float = 60.0,
+        health_interval: float = 5.0,
+    ) -> None:
+        """
+        在子进程中运行模型，避免推理和 api 进程争抢 GIL：画面通过共享内存传入，
+        只传回关键点数组；子进程退出或超时时重启。
+        VIDEO 模式的模型依赖帧的顺序和时间戳，一路视频的所有帧必须交给同一个子进程，
+        所以每一路通过 lease 独占一个子进程，多个子进程的并行来自多路视频；
+        池本身的 forward 使用一个默认的租约，可以直接交给单路流程的模型节点
+        """
+        self.model_name = model_name
+        self.timeout = timeout
+        self.load_timeout = load_timeout
+        self.health_interval = health_interval
+        self.workers = [_Worker(model_name, idx) for idx in range(workers)]
+        self.frames = 0
+        self.failures = 0
+        self.restarts = 0
+        self._default: ProcessModelLease | None = None
+        self._lease_lock = threading.Lock()
+        self._next_idx = workers
+        self._closed = False
+        self._health_thread: threading.Thread | None = None
+        self._wake = threading.Event()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start(self.load_timeout)
+        if self.health_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="inference-health", daemon=True
+            )
+            self._health_thread.start()
+        logger.info(f"inference pool start {len(self.workers)} {self.model_name}")
+
+    def lease(self) -> "ProcessModelLease":
+        """
+        独占一个空闲的子进程，没有空闲的子进程时启动一个新的；用完后调用租约的 close
+        """
+        if self._closed:
+            raise RuntimeError("inference pool is closed")
+        with self._lease_lock:
+            for worker in self.workers:
+                if not worker.leased:
+                    worker.leased = True
+                    return ProcessModelLease(self, worker)
+            worker = _Worker(self.model_name, self._next_idx)
+            worker.leased = True
+            self._next_idx += 1
+        # 加载模型可能要几十秒，在锁外启动，其他 lease 和归还不用等待
+        worker.start(self.load_timeout)
+        with self._lease_lock:
+            if not self._closed:
+                self.workers.append(worker)
+                return ProcessModelLease(self, worker)
+        worker.stop()
+        raise RuntimeError("inference pool is closed")
+
+    def _unlease(self, worker: _Worker):
+        with self._lease_lock:
+            worker.leased = False
+
+    def _restart(self, worker: _Worker, reason: str):
+        logger.warning(f"restart inference worker {worker.idx}: {reason}")
+        worker.stop()
+        self.restarts += 1
+        worker.start(self.load_timeout)
+
+    def _try_restart(self, worker: _Worker, reason: str):
+        """
+        重启失败时不再抛出，进程保持停止状态，之后的调用会再次尝试重启
+        """
+        try:
+            self._restart(worker, reason)
+        except (WorkerError, OSError) as err:
+            worker.stop()
+            logger.error(f"inference worker {worker.idx} is dead: {err}")
+
+    def _forward(self, worker: _Worker, frame: FrameTuple) -> list[HandInfo]:
+        with worker.lock:
+            if self._closed:
+                raise RuntimeError("inference pool is closed")
+            if not worker.alive:
+                self._try_restart(worker, "process exited")
+                if not worker.alive:
+                    self.failures += 1
+                    return []
+            try:
+                res = worker.infer(frame, self.timeout)
+            except (WorkerError, EOFError, OSError) as err:
+                # 这一帧当作没有检测到手，下一帧使用重启后的进程
+                self.failures += 1
+                self._try_restart(worker, str(err))
+                return []
+            self.frames += 1
+            return res
+
+    def forward(self, frame: FrameTuple) -> list[HandInfo]:
+        if self._default is None:
+            self._default = self.lease()
+        return self._default.forward(frame)
+
+    def check_health(self):
+        """
+        空闲的进程发送一次 ping，正在推理的进程由 forward 的超时负责
+        """
+        for worker in self.workers:
+            if not worker.lock.acquire(blocking=False):
+                continue
+            try:
+                if self._closed:
+                    return
+                try:
+                    if not worker.alive:
+                        raise WorkerError("process exited")
+                    worker.ping(self.timeout)
+                except (WorkerError, EOFError, OSError) as err:
+                    self._try_restart(worker, str(err))
+            finally:
+                worker.lock.release()
+
+    def _health_loop(self):
+        while not self._wake.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as err:
+                logger.exception(err)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._health_thread is not None:
+            self._health_thread.join(self.timeout + 1)
+            self._health_thread = None
+        for worker in self.workers:
+            with worker.lock:
+                worker.stop()
+                worker.release_shm()
+        logger.info("inference pool stop")
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "workers": len(self.workers),
+            "leased": sum(worker.leased for worker in self.workers),
+            "alive": sum(worker.alive for worker in self.workers),
+            "frames": self.frames,
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "shmBytes": sum(w.shm.size for w in self.workers if w.shm is not None),
+        }
+
+
+class ProcessModelLease:
+    def __init__(self, pool: ProcessModelPool, worker: _Worker) -> None:
+        """
+        独占池中一个子进程的模型，与模型对象有相同的 forward/close 接口
+        """
+        self.pool = pool
+        self.worker = worker
+        self._closed = False
+
+    def forward(self, frame: FrameTuple) -> list[HandInfo]:
+        if self._closed:
+            raise RuntimeError("inference lease is closed")
+        return self.pool._forward(self.worker, frame)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.pool._unlease(self.worker)
+
+
+def create_process_model(model_name: str = "gesture", workers: int = 1, **kwargs):
+    pool = ProcessModelPool(model_name, workers, **kwargs)
+    pool.start()
+    return pool
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from typing import Any, Hashable
+
+import numpy as np
+
+from controllers.model.base import HandModel, load_model
+from controllers.types import FrameTuple
+
+from utils import logger
+
+ModelKey = tuple[str, tuple[tuple[str, Hashable], ...]]
+
+
+def model_key(name: str, options: dict[str, Any]) -> ModelKey:
+    return name, tuple(sorted(options.items()))
+
+
+class _IdleModel:
+    __slots__ = ("model", "since")
+
+    def __init__(self, model: HandModel, since: float) -> None:
+        self.model = model
+        self.since = since
+
+
+class ModelRegistry:
+    def __init__(self, idle_timeout: float = 300) -> None:
+        """
+        按模型类型和参数缓存已经创建好的模型：流程停止时模型放回空闲列表而不是关闭，
+        下一次启动直接取用；每个实例同一时间只借给一个使用者，空闲超过 idle_timeout 后关闭
+        """
+        self.idle_timeout = idle_timeout
+        self._idle: dict[ModelKey, list[_IdleModel]] = {}
+        self._in_use: dict[int, ModelKey] = {}
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.create_ms = 0.0
+
+    def acquire(self, name: str, **options: Any) -> HandModel:
+        key = model_key(name, options)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                model = idle.pop().model
+                self.hits += 1
+                self._in_use[id(model)] = key
+                return model
+            self.misses += 1
+        # 创建模型很慢，不占用锁
+        t_start = time.perf_counter()
+        model = load_model(name, **options)
+        self.create_ms = (time.perf_counter() - t_start) * 1000
+        logger.info(f"model {name} created in {self.create_ms:.1f}ms")
+        with self._lock:
+            self._in_use[id(model)] = key
+        return model
+
+    def release(self, model: HandModel):
+        with self._lock:
+            key = self._in_use.pop(id(model), None)
+            if key is None:
+                raise ValueError("model is not acquired from registry")
+            self._idle.setdefault(key, []).append(_IdleModel(model, time.monotonic()))
+            self._schedule()
+
+    def warm_up(self, name: str, **options: Any):
+        """
+        预先创建一个实例并用空画面推理一次，放进空闲列表
+        """
+        model = self.acquire(name, **options)
+        try:
+            blank = np.zeros((480, 640, 3), np.uint8)
+            model.forward(FrameTuple(blank, 640, 480, 0.0))
+        finally:
+            self.release(model)
+
+    def warm_up_in_background(self, name: str, **options: Any) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.warm_up,
+            args=(name,),
+            kwargs=options,
+            name="model-warm-up",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _schedule(self):
+        if self.idle_timeout <= 0 or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.idle_timeout, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.evict_idle()
+        with self._lock:
+            if any(self._idle.values()):
+                self._schedule()
+
+    def evict_idle(self, max_idle: float | None = None) -> int:
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        expired: list[HandModel] = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = [it for it in idle if now - it.since < max_idle]
+                expired.extend(it.model for it in idle if now - it.since >= max_idle)
+                self._idle[key] = keep
+            self.evictions += len(expired)
+        for model in expired:
+            model.close()
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.evict_idle(0)
+
+    @property
+    def state(self) -> dict[str, Any]:
+        with self._lock:
+            idle = sum(len(it) for it in self._idle.values())
+            in_use = len(self._in_use)
+        total = self.hits + self.misses
+        return {
+            "idle": idle,
+            "inUse": in_use,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "createMs": round(self.create_ms, 1),
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,210 @@
+import json
+import os
+import time
+
+from typing import Any, Iterable, TextIO
+
+import cv2
+
+from controllers.hand_info import Gesture, HandInfo
+from controllers.types import FrameTuple, SizeTuple
+from utils.frame_pool import mirror_rgb
+
+_IMAGE_SUFFIX = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class EndOfRecording(RuntimeError):
+    pass
+
+
+class _ReplayClock:
+    def __init__(self, fps: float) -> None:
+        """
+        回放时使用固定步长的时间戳，保证最大速度回放时时间依然单调递增且可复现
+        """
+        self.fps = fps
+        self.t_start = time.time()
+        self.idx = 0
+
+    def tick(self) -> float:
+        t = self.t_start + self.idx / self.fps
+        self.idx += 1
+        return t
+
+
+class VideoFileSource:
+    def __init__(self, path: str, loop: bool = False, mirror: bool = True) -> None:
+        self.path = path
+        self.loop = loop
+        self.mirror = mirror
+        self.cap: cv2.VideoCapture | None = None
+        self.clock = _ReplayClock(30)
+        self.size = SizeTuple(0, 0)
+
+    @property
+    def is_opened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+
+    def open(self):
+        if self.is_opened:
+            return
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"open video {self.path} failed")
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.clock = _ReplayClock(fps if fps > 0 else 30)
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def read(self, auto_open: bool = False) -> FrameTuple:
+        if not self.is_opened:
+            if auto_open:
+                self.open()
+            else:
+                raise RuntimeError("video is not opened")
+        assert self.cap is not None
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            raise EndOfRecording(self.path)
+        frame = (
+            mirror_rgb(frame) if self.mirror else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        )
+        height, width = frame.shape[0], frame.shape[1]
+        self.size = SizeTuple(width, height)
+        return FrameTuple(frame, width, height, self.clock.tick())
+
+
+class ImageDirSource:
+    def __init__(
+        self, path: str, loop: bool = False, mirror: bool = True, fps: float = 30
+    ) -> None:
+        self.path = path
+        self.loop = loop
+        self.mirror = mirror
+        self.fps = fps
+        self.files: list[str] = []
+        self.idx = 0
+        self.clock = _ReplayClock(fps)
+        self.size = SizeTuple(0, 0)
+
+    @property
+    def is_opened(self) -> bool:
+        return len(self.files) > 0
+
+    def open(self):
+        self.files = sorted(
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path)
+            if name.lower().endswith(_IMAGE_SUFFIX)
+        )
+        if not self.files:
+            raise RuntimeError(f"no image in {self.path}")
+        self.idx = 0
+        self.clock = _ReplayClock(self.fps)
+
+    def close(self):
+        self.files = []
+
+    def read(self, auto_open: bool = False) -> FrameTuple:
+        if not self.is_opened:
+            if auto_open:
+                self.open()
+            else:
+                raise RuntimeError("image dir is not opened")
+        if self.idx >= len(self.files):
+            if not self.loop:
+                raise EndOfRecording(self.path)
+            self.idx = 0
+        frame = cv2.imread(self.files[self.idx])
+        self.idx += 1
+        if frame is None:
+            raise RuntimeError(f"read {self.files[self.idx - 1]} failed")
+        frame = (
+            mirror_rgb(frame) if self.mirror else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        )
+        height, width = frame.shape[0], frame.shape[1]
+        self.size = SizeTuple(width, height)
+        return FrameTuple(frame, width, height, self.clock.tick())
+
+
+def hand_info_to_dict(hand: HandInfo) -> dict[str, Any]:
+    return {
+        "pos": hand.landmarks.tolist(),
+        "size": list(hand.camera_size),
+        "time": hand.c_time,
+        "gesture": hand.gesture.name if hand.gesture is not None else None,
+    }
+
+
+def hand_info_from_dict(data: dict[str, Any], c_time: float | None = None) -> HandInfo:
+    hand = HandInfo(
+        data["pos"],
+        tuple(data["size"]),  # type: ignore
+        data["time"] if c_time is None else c_time,
+    )
+    if data.get("gesture"):
+        hand.gesture = Gesture[data["gesture"]]
+    return hand
+
+
+class HandInfoRecordSource:
+    def __init__(self, path: str, loop: bool = False) -> None:
+        """
+        读取 HandInfoRecorder 录制的 jsonl 文件，每一行是一帧中所有手的关键点
+        """
+        self.path = path
+        self.loop = loop
+        self.frames: list[list[dict[str, Any]]] = []
+        self.idx = 0
+        self.clock = _ReplayClock(30)
+
+    @property
+    def is_opened(self) -> bool:
+        return len(self.frames) > 0
+
+    def open(self):
+        with open(self.path, encoding="utf-8") as file:
+            self.frames = [json.loads(line)["hands"] for line in file if line.strip()]
+        if not self.frames:
+            raise RuntimeError(f"{self.path} is empty")
+        self.idx = 0
+        self.clock = _ReplayClock(30)
+
+    def close(self):
+        self.frames = []
+
+    def read(self) -> list[HandInfo]:
+        if self.idx >= len(self.frames):
+            if not self.loop:
+                raise EndOfRecording(self.path)
+            self.idx = 0
+        frame = self.frames[self.idx]
+        self.idx += 1
+        c_time = self.clock.tick()
+        return [hand_info_from_dict(hand, c_time) for hand in frame]
+
+
+class HandInfoRecorder:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file: TextIO | None = None
+
+    def open(self):
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, hands: Iterable[HandInfo]):
+        assert self.file is not None
+        line = {"hands": [hand_info_to_dict(hand) for hand in hands]}
+        self.file.write(json.dumps(line) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -2,7 +2,7 @@ import cv2
 
 
 def show_frame_local(frame: cv2.typing.MatLike) -> bool:
-    cv2.imshow("test", frame)
+    cv2.imshow("test", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
     key = cv2.waitKey(1) & 0xFF
     if key == ord("q"):
         return False
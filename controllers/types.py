@@ -1,25 +1,59 @@
 import cv2
-from typing import NamedTuple, Optional
+from typing import NamedTuple, Optional, Protocol
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+
+class SizeTuple(NamedTuple):
+    width: int
+    height: int
+
+
+class RoiTuple(NamedTuple):
+    """
+    裁剪区域在原始画面中的位置和大小，裁剪后的画面可能又被缩小过
+    """
+
+    x: int
+    y: int
+    width: int
+    height: int
+    full_width: int
+    full_height: int
 
 
 class FrameTuple(NamedTuple):
+    # 水平镜像后的 RGB 画面，编码和显示之前再转换成 BGR
     frame: cv2.typing.MatLike
     width: int
     height: int
     ctime: float
+    roi: Optional[RoiTuple] = None
 
+    @property
+    def full_size(self) -> SizeTuple:
+        if self.roi is None:
+            return SizeTuple(self.width, self.height)
+        return SizeTuple(self.roi.full_width, self.roi.full_height)
 
-class SizeTuple(NamedTuple):
-    width: int
-    height: int
+
+class FrameSource(Protocol):
+    def open(self): ...
+
+    def close(self): ...
+
+    def read(self, auto_open: bool = False) -> FrameTuple: ...
 
 
 class CameraState(NamedTuple):
     is_opened: bool
     size: SizeTuple
     exposure: int
+    grabber: bool = False
+    skipped_frames: int = 0
+    frame_allocations: int = 0
+    frames_read: int = 0
+    fps: int = 30
 
 
 Position = tuple[int | float, int | float]
@@ -32,18 +66,47 @@ class PositionTuple(NamedTuple):
 
 class CameraSettingModel(BaseModel):
     exposure: Optional[int] = None
+    grabber: Optional[bool] = None
+
+
+class CameraFeedSettingModel(BaseModel):
+    quality: Optional[int] = Field(None, ge=1, le=100)
+    scale: Optional[float] = Field(None, gt=0, le=1)
 
 
 class MouseStateModel(BaseModel):
     baseSpeed: Optional[float] = None
     acceleration: Optional[float] = None
+    motionRate: Optional[float] = None
+    filter: Optional[str] = None
+    predict: Optional[bool] = None
+
+
+class ActuatorModel(BaseModel):
+    backend: Optional[str] = None
+    reset: Optional[bool] = None
 
 
 class FlowConnectItemModel(BaseModel):
     match: str
     matchFunc: str
     handle: str
+    timing: Optional[str] = None
+    duration: Optional[float] = None
 
 
 class FlowConnectModel(BaseModel):
     data: list[FlowConnectItemModel]
+
+
+class StreamConfigModel(BaseModel):
+    name: str
+    source: int | str
+    actuator: Optional[str] = None
+    loop: bool = False
+    process: bool = False
+
+
+class FlowProfileModel(BaseModel):
+    enable: Optional[bool] = None
+    reset: Optional[bool] = None
@@ -27,7 +27,169 @@ class SlidingWindowMeanFilter(typing.Generic[T]):
             sy = np.mean(self.data[:, 1])
             return (sx.astype(float), sy.astype(float))
         else:
-            return self.data[self.idx]
+            x, y = self.data[self.idx].tolist()
+            return (x, y)
+
+
+class RunningMeanFilter(typing.Generic[T]):
+    def __init__(self, window_size: int = 12) -> None:
+        """
+        与 SlidingWindowMeanFilter 相同的窗口均值，但维护滑动和，每次 push 都是 O(1)，
+        只用 python 浮点运算，没有 numpy 调用开销。
+        预热阶段与 SlidingWindowMeanFilter 一样，不到半个窗口时直接返回输入；
+        之后未填满时只对已有的数据求平均，不像 SlidingWindowMeanFilter 那样把空位当作 0，
+        光标的位移不会在预热时被缩小
+        """
+        self.window_size = window_size
+        self.data: list[tuple[float, float]] = [(0.0, 0.0)] * window_size
+        self.idx = 0
+        self.size = 0
+        self.sx = 0.0
+        self.sy = 0.0
+        self._pushes = 0
+
+    def _resum(self):
+        # 定期重新求和，避免浮点加减累积误差
+        data = self.data[: self.size] if self.size < self.window_size else self.data
+        self.sx = sum(p[0] for p in data)
+        self.sy = sum(p[1] for p in data)
+
+    def push(self, point: tuple[T, T]) -> tuple[float, float]:
+        x, y = float(point[0]), float(point[1])
+        if self.size == self.window_size:
+            ox, oy = self.data[self.idx]
+            self.sx -= ox
+            self.sy -= oy
+        else:
+            self.size += 1
+        self.data[self.idx] = (x, y)
+        self.sx += x
+        self.sy += y
+        self.idx = (self.idx + 1) % self.window_size
+        self._pushes += 1
+        if self._pushes % (self.window_size * 64) == 0:
+            self._resum()
+        if self.size * 2 >= self.window_size:
+            return (self.sx / self.size, self.sy / self.size)
+        return (x, y)
+
+    def get(self) -> tuple[float, float]:
+        if self.size == 0:
+            return (0.0, 0.0)
+        if self.size * 2 >= self.window_size:
+            return (self.sx / self.size, self.sy / self.size)
+        return self.data[self.idx - 1]
+
+
+class RunningVarianceFilter(RunningMeanFilter[T]):
+    def __init__(self, window_size: int = 12) -> None:
+        """
+        在滑动和之外再维护平方和，push 返回均值，variance 为窗口内每个轴的方差
+        """
+        super().__init__(window_size)
+        self.sxx = 0.0
+        self.syy = 0.0
+
+    def _resum(self):
+        super()._resum()
+        data = self.data[: self.size] if self.size < self.window_size else self.data
+        self.sxx = sum(p[0] * p[0] for p in data)
+        self.syy = sum(p[1] * p[1] for p in data)
+
+    def push(self, point: tuple[T, T]) -> tuple[float, float]:
+        x, y = float(point[0]), float(point[1])
+        if self.size == self.window_size:
+            ox, oy = self.data[self.idx]
+            self.sxx -= ox * ox
+            self.syy -= oy * oy
+        self.sxx += x * x
+        self.syy += y * y
+        return super().push((x, y))
+
+    @property
+    def variance(self) -> tuple[float, float]:
+        n = self.size
+        if n == 0:
+            return (0.0, 0.0)
+        mx, my = self.sx / n, self.sy / n
+        return (max(self.sxx / n - mx * mx, 0.0), max(self.syy / n - my * my, 0.0))
+
+
+class EwmaFilter(typing.Generic[T]):
+    def __init__(self, alpha: float = 0.3) -> None:
+        """
+        指数加权的均值和方差，不需要保存窗口
+        """
+        self.alpha = alpha
+        self.mean: tuple[float, float] | None = None
+        self.var = (0.0, 0.0)
+
+    def push(self, point: tuple[T, T]) -> tuple[float, float]:
+        x, y = float(point[0]), float(point[1])
+        if self.mean is None:
+            self.mean = (x, y)
+            return self.mean
+        alpha = self.alpha
+        mx, my = self.mean
+        dx, dy = x - mx, y - my
+        self.mean = (mx + alpha * dx, my + alpha * dy)
+        vx, vy = self.var
+        self.var = (
+            (1 - alpha) * (vx + alpha * dx * dx),
+            (1 - alpha) * (vy + alpha * dy * dy),
+        )
+        return self.mean
+
+    def get(self) -> tuple[float, float]:
+        return self.mean if self.mean is not None else (0.0, 0.0)
+
+
+class BatchRunningMeanFilter:
+    def __init__(self, window_size: int, shape: tuple[int, ...]) -> None:
+        """
+        同时对 shape 形状的多路独立数据做窗口均值，例如所有手的全部关键点，
+        每次 push 的 numpy 调用次数与路数无关
+        """
+        self.window_size = window_size
+        self.data = np.zeros((window_size, *shape))
+        self.total = np.zeros(shape)
+        self.idx = 0
+        self.size = 0
+        self._pushes = 0
+
+    def push(self, values: np.ndarray) -> np.ndarray:
+        slot = self.data[self.idx]
+        if self.size == self.window_size:
+            self.total -= slot
+        else:
+            self.size += 1
+        slot[...] = values
+        self.total += slot
+        self.idx = (self.idx + 1) % self.window_size
+        self._pushes += 1
+        if self._pushes % (self.window_size * 64) == 0:
+            self.total = self.data[: self.size].sum(axis=0)
+        return self.total / self.size
+
+
+class BatchEwmaFilter:
+    def __init__(self, alpha: float, shape: tuple[int, ...]) -> None:
+        self.alpha = alpha
+        self.mean = np.zeros(shape)
+        self.var = np.zeros(shape)
+        self._inited = False
+
+    def push(self, values: np.ndarray) -> np.ndarray:
+        if not self._inited:
+            self.mean[...] = values
+            self._inited = True
+            return self.mean.copy()
+        diff = values - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var += diff * incr
+        self.var *= 1 - self.alpha
+        return self.mean.copy()
 
 
 class StepFilter(typing.Generic[T]):
@@ -41,3 +203,102 @@ class StepFilter(typing.Generic[T]):
         tx, ty = lp[0] + dx / self.smooth, lp[1] + dy / self.smooth
         self.last_pos = (tx, ty)
         return (tx, ty)
+
+
+def _smoothing_factor(dt: float, cutoff: float | np.ndarray) -> float | np.ndarray:
+    r = 2 * np.pi * cutoff * dt
+    return r / (r + 1)
+
+
+class OneEuroFilter:
+    def __init__(
+        self, min_cutoff: float = 1.0, beta: float = 0.01, d_cutoff: float = 1.0
+    ) -> None:
+        """
+        One Euro 滤波：速度低时截止频率低以消除抖动，速度高时截止频率升高以减小延迟；
+        对输入数组的每个元素独立滤波，可以一次处理全部 21 个关键点
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x: np.ndarray | None = None
+        self.dx: np.ndarray | None = None
+        self.t = 0.0
+
+    def reset(self):
+        self.x = None
+        self.dx = None
+        self.t = 0.0
+
+    def push(self, x: np.ndarray, t: float) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if self.x is None or self.dx is None or self.x.shape != x.shape:
+            self.x = x.copy()
+            self.dx = np.zeros_like(x)
+            self.t = t
+            return self.x.copy()
+        dt = max(t - self.t, 1e-3)
+        self.t = t
+        dx = (x - self.x) / dt
+        self.dx += _smoothing_factor(dt, self.d_cutoff) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        self.x += _smoothing_factor(dt, cutoff) * (x - self.x)
+        return self.x.copy()
+
+    def predict(self, dt: float) -> np.ndarray:
+        assert self.x is not None and self.dx is not None
+        return self.x + self.dx * dt
+
+
+class KalmanFilter:
+    def __init__(
+        self, process_noise: float = 2000.0, measure_noise: float = 4.0
+    ) -> None:
+        """
+        匀速模型的卡尔曼滤波，每个元素独立维护位置、速度和 2x2 协方差，
+        predict 可以按流水线延迟向前外推
+        """
+        self.q = process_noise
+        self.r = measure_noise
+        self.x: np.ndarray | None = None
+        self.v: np.ndarray | None = None
+        self.p00 = self.p01 = self.p11 = np.zeros(0)
+        self.t = 0.0
+
+    def reset(self):
+        self.x = None
+        self.v = None
+        self.t = 0.0
+
+    def push(self, z: np.ndarray, t: float) -> np.ndarray:
+        z = np.asarray(z, dtype=np.float64)
+        if self.x is None or self.v is None or self.x.shape != z.shape:
+            self.x = z.copy()
+            self.v = np.zeros_like(z)
+            self.p00 = np.full_like(z, self.r)
+            self.p01 = np.zeros_like(z)
+            self.p11 = np.full_like(z, self.q)
+            self.t = t
+            return self.x.copy()
+        dt = max(t - self.t, 1e-3)
+        self.t = t
+        q = self.q
+        # 预测
+        self.x += self.v * dt
+        self.p00 += dt * (2 * self.p01 + dt * self.p11) + q * dt**3 / 3
+        self.p01 += dt * self.p11 + q * dt**2 / 2
+        self.p11 += q * dt
+        # 更新
+        s = self.p00 + self.r
+        k0, k1 = self.p00 / s, self.p01 / s
+        y = z - self.x
+        self.x += k0 * y
+        self.v += k1 * y
+        self.p11 -= k1 * self.p01
+        self.p01 *= 1 - k0
+        self.p00 *= 1 - k0
+        return self.x.copy()
+
+    def predict(self, dt: float) -> np.ndarray:
+        assert self.x is not None and self.v is not None
+        return self.x + self.v * dt
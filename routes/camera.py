@@ -1,43 +1,99 @@
 import asyncio
+from contextlib import suppress
 
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from fastapi.exceptions import WebSocketException
 
-from controllers.types import CameraSettingModel
+from controllers.types import CameraFeedSettingModel, CameraSettingModel
 from utils import logger, convert_named_tuple_to_dict
-from controllers.camera import (
-    read_real_time_camera,
-    camera,
-    gen_jpeg_content,
+from controllers.camera import camera
+from controllers.camera_stream import encode_frame, encoded_size, negotiate
+from controllers.flows.broadcast import (
+    frame_broadcaster,
+    jpeg_broadcaster,
+    release_frame_tuple,
 )
-from controllers.flows.flow import flow_manager
 
 camera_api = APIRouter(prefix="/camera")
 
 
 @camera_api.websocket("/test")
-async def test_camera(websockt: WebSocket):
+async def test_camera(
+    websockt: WebSocket,
+    format: str = "raw",
+    fps: float = 15,
+    quality: int = 80,
+    scale: float = 1.0,
+):
+    """
+    画面来自共用的 frame_broadcaster，多个连接和流程不会互相抢帧；编码在线程中执行，
+    不阻塞事件循环。第一帧之前先发送一条 json 说明协商后的格式、帧率和画面大小，
+    之后每条消息是一帧
+    """
     await websockt.accept()
     try:
-        for frame in read_real_time_camera():
-            await websockt.send_bytes(frame.frame.tobytes())
-            await asyncio.sleep(0.01)
-    except WebSocketException as err:
-        logger.exception(err)
+        options = negotiate(format, fps, quality, scale, camera.fps)
+    except ValueError as err:
+        await websockt.close(1003, str(err))
+        return
+    loop = asyncio.get_running_loop()
+    interval = 1 / options.fps
+    next_time = loop.time()
+    described = False
+    # 客户端不会发送消息，receive 返回就说明连接已经断开
+    disconnect = asyncio.ensure_future(websockt.receive())
+    try:
+        with frame_broadcaster.subscribe() as sub:
+            while not disconnect.done():
+                try:
+                    frame = await sub.get(0.5)
+                except TimeoutError:
+                    continue
+                try:
+                    data = await asyncio.to_thread(encode_frame, frame.frame, options)
+                finally:
+                    release_frame_tuple(frame)
+                if not described:
+                    await websockt.send_json(
+                        options.describe(*encoded_size(frame, options))
+                    )
+                    described = True
+                await websockt.send_bytes(data)
+                # 按目标帧率节流，摄像头比目标慢时不再等待
+                next_time += interval
+                delay = next_time - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_time = loop.time()
+    except (WebSocketDisconnect, WebSocketException) as err:
+        logger.info(f"camera test close: {err}")
     finally:
-        await websockt.close()
+        disconnect.cancel()
+        with suppress(RuntimeError):
+            await websockt.close()
 
 
 @camera_api.get("/feed")
-def video_feed():
-    if flow_manager.running:
-        raise RuntimeError
+async def video_feed():
     return StreamingResponse(
-        gen_jpeg_content(), media_type="multipart/x-mixed-replace; boundary=frame"
+        jpeg_broadcaster.stream(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
     )
 
 
+@camera_api.get("/feed/state")
+async def get_feed_state():
+    return jpeg_broadcaster.state
+
+
+@camera_api.put("/feed/setting")
+async def update_feed_setting(setting: CameraFeedSettingModel):
+    jpeg_broadcaster.configure(setting.quality, setting.scale)
+    return jpeg_broadcaster.state
+
+
 @camera_api.get("/open")
 def open_camera():
     camera.open()
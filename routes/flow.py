@@ -1,27 +1,28 @@
 import asyncio
-from typing import cast, Any
 from contextlib import suppress
 
-from fastapi import APIRouter, WebSocket
-from fastapi.websockets import WebSocketState
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import WebSocketException
 
 from controllers.flows.flow import (
     flow_manager,
+    gen_profile_report,
     camera_node,
     draw_node,
-    land_mark_model_node,
-    hands_filter_node,
+    landmark_feed_node,
+    update_gesture_control,
 )
+from controllers.flows.channel import Subscription
 from controllers.flows.control_flow import (
     gen_gesture_and_cursor_handle_mapping_list,
     set_gesture_and_cursor_handle_mapping,
 )
 from controllers.flows.window import handle_dict
-from controllers.hand_info import HandInfo
-from controllers.flows.node import NoResult
+from controllers.flows.profiler import flow_profiler
 from controllers.cursor_handle import add_on_handle_execute, CursorHandleEnum
+from controllers.landmark_codec import LandmarkEncoder, landmark_json
 from controllers.landmark_match import GestureMatch
-from controllers.types import Position, FlowConnectModel
+from controllers.types import Position, FlowConnectModel, FlowProfileModel
 
 from utils import logger
 
@@ -34,8 +35,15 @@ async def get_flow_state():
 
 
 @flow_api.get("/start")
-async def start_flow():
-    flow_manager.start(True)
+async def start_flow(
+    pipeline: bool = False,
+    compiled: bool = False,
+    roi: bool = False,
+    automaton: bool = True,
+    workers: int = 0,
+    governor: bool = False,
+):
+    flow_manager.start(True, pipeline, compiled, roi, automaton, workers, governor)
     await flow_manager.wait_node_has_value(camera_node)
     return flow_manager.state
 
@@ -46,36 +54,60 @@ async def stop_flow():
     return flow_manager.state
 
 
+@flow_api.get("/profile")
+async def get_flow_profile():
+    return gen_profile_report()
+
+
+@flow_api.put("/profile")
+async def set_flow_profile(setting: FlowProfileModel):
+    if setting.reset:
+        flow_profiler.reset()
+    if setting.enable is not None:
+        flow_profiler.enabled = setting.enable
+    return gen_profile_report()
+
+
 @flow_api.websocket("/landMark/feed")
-async def gen_land_mark_sample(ws: WebSocket):
+async def gen_land_mark_sample(ws: WebSocket, format: str = "json"):
+    """
+    有新的推理结果时才推送；format=binary 时发送 landmark_codec 的差分二进制帧，
+    否则发送原来的 json
+    """
     await ws.accept()
-    wait_time = 0
-    while ws.client_state == WebSocketState.CONNECTED:
-        if wait_time >= 2:
-            await ws.receive()
-        if not flow_manager.running:
-            print("not running")
-            await asyncio.sleep(0.5)
-            wait_time += 0.5
-        try:
-            res: dict[str, Any] = {"width": 1280, "height": 720}
-            if land_mark_model_node.output is not NoResult:
-                hand_info_list = cast(list[HandInfo], land_mark_model_node.output)
-                pos_str = "|".join(map(lambda x: x.encode_pos(), hand_info_list))
-                if pos_str != "":
-                    res["allHand"] = pos_str
-
-            if hands_filter_node.output is not NoResult:
-                current_hand = cast(HandInfo, hands_filter_node.output)
-                res["currentHand"] = current_hand.encode_pos()
-                res["width"] = current_hand.camera_size[0]
-                res["height"] = current_hand.camera_size[1]
-
-            if len(res) > 2:
-                await ws.send_json(res)
-            await asyncio.sleep(0.03)
-        except:
-            break
+    encoder = LandmarkEncoder() if format == "binary" else None
+    seq = 0
+    sent_empty = False
+    # 客户端不会发送消息，receive 返回就说明连接已经断开，没有新结果时最多 2 秒后退出
+    disconnect = asyncio.ensure_future(ws.receive())
+    with landmark_feed_node.channel.subscribe(1) as sub:
+        while not disconnect.done():
+            try:
+                hands, current = await sub.get(2)
+            except TimeoutError:
+                continue
+            seq += 1
+            try:
+                if encoder is None:
+                    res = landmark_json(hands, current)
+                    if res is not None:
+                        await ws.send_json(res)
+                    continue
+                empty = not hands and current is None
+                if empty and sent_empty:
+                    continue
+                sent_empty = empty
+                first = hands[0] if hands else current
+                size = first.camera_size if first is not None else (1280, 720)
+                await ws.send_bytes(encoder.encode(seq, hands, current, *size))
+            except (WebSocketDisconnect, WebSocketException, RuntimeError) as err:
+                # 发送时连接已经关闭
+                logger.info(f"land mark disconnect: {err}")
+                break
+            except Exception as err:
+                logger.exception(err)
+                break
+    disconnect.cancel()
     logger.info("land mark close")
     with suppress(RuntimeError):
         await ws.close()
@@ -85,25 +117,26 @@ async def gen_land_mark_sample(ws: WebSocket):
 async def mouse_action_feed(ws: WebSocket):
     await ws.accept()
     logger.info("mouse action start")
-    que: asyncio.Queue[tuple[str, Position, float]] = asyncio.Queue()
-
-    def call_back(name: str, pos, t):
-        que.put_nowait((name, pos, t))
-
-    clean = add_on_handle_execute(call_back)
-
-    while ws.client_state == WebSocketState.CONNECTED:
-        with suppress(asyncio.exceptions.TimeoutError):
-            name, pos, t = await asyncio.wait_for(que.get(), 2)
-            await ws.send_json(
-                {
-                    "name": name,
-                    "time": t,
-                    "pos": {"x": pos[0], "y": pos[1]},
-                }
-            )
-
-    clean()
+    # 回调在流程线程中执行，通过 Subscription 转交给事件循环
+    sub: Subscription[tuple[str, Position, float]] = Subscription(64)
+    clean = add_on_handle_execute(lambda name, pos, t: sub.push((name, pos, t)))
+    disconnect = asyncio.ensure_future(ws.receive())
+    try:
+        while not disconnect.done():
+            with suppress(TimeoutError):
+                name, pos, t = await sub.get(2)
+                await ws.send_json(
+                    {
+                        "name": name,
+                        "time": t,
+                        "pos": {"x": pos[0], "y": pos[1]},
+                    }
+                )
+    except (WebSocketDisconnect, WebSocketException) as err:
+        logger.info(f"mouse action disconnect: {err}")
+    finally:
+        disconnect.cancel()
+        clean()
     logger.info("mouse action close")
     with suppress(RuntimeError):
         await ws.close()
@@ -122,5 +155,8 @@ async def get_gesture_and_cursor_connect():
 @flow_api.put("/connects")
 async def set_gesture_and_cursor_connect(data: FlowConnectModel):
     t = data.model_dump()
-    set_gesture_and_cursor_handle_mapping(t["data"])
-    return {"connect": gen_gesture_and_cursor_handle_mapping_list()}
+    # 子图模式运行中不能使用 timing，停止后可以设置，下次以 automaton=false 启动时会被拒绝
+    allow_timing = flow_manager.use_automaton or not flow_manager.running
+    set_gesture_and_cursor_handle_mapping(t["data"], allow_timing)
+    version = await asyncio.to_thread(update_gesture_control)
+    return {"connect": gen_gesture_and_cursor_handle_mapping_list(), "version": version}
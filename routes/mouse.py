@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
+from controllers.actuator import actuator_manager
+from controllers.cursor_motion import cursor_motion
 from controllers.hand_move import hand_move_handler, MouseState
-from controllers.types import MouseStateModel
+from controllers.types import ActuatorModel, MouseStateModel
 
 
 from utils import convert_named_tuple_to_dict
@@ -18,3 +20,17 @@ async def get_mouse_state():
 async def set_mouse_state(state: MouseStateModel):
     hand_move_handler.state = state.model_dump()
     return convert_named_tuple_to_dict(hand_move_handler.state)
+
+
+@mouse_api.get("/actuator")
+async def get_actuator_state():
+    return {**actuator_manager.state, "motion": cursor_motion.state}
+
+
+@mouse_api.put("/actuator")
+async def set_actuator(setting: ActuatorModel):
+    if setting.backend is not None:
+        actuator_manager.use(setting.backend)
+    if setting.reset:
+        actuator_manager.reset_latency()
+    return {**actuator_manager.state, "motion": cursor_motion.state}
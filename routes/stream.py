@@ -0,0 +1,40 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+
+from controllers.flows.stream import StreamConfig, stream_manager
+from controllers.types import StreamConfigModel
+
+stream_api = APIRouter(prefix="/stream")
+
+
+@stream_api.get("/state")
+async def get_stream_state():
+    return stream_manager.state
+
+
+@stream_api.put("/")
+async def add_stream(config: StreamConfigModel):
+    try:
+        stream = stream_manager.add(StreamConfig(**config.model_dump()))
+    except ValueError as err:
+        raise HTTPException(400, str(err))
+    return stream.state
+
+
+@stream_api.delete("/{name}")
+async def remove_stream(name: str):
+    await asyncio.to_thread(stream_manager.remove, name)
+    return stream_manager.state
+
+
+@stream_api.get("/{name}/start")
+async def start_stream(name: str):
+    await asyncio.to_thread(stream_manager.start, name)
+    return stream_manager.get(name).state
+
+
+@stream_api.get("/{name}/stop")
+async def stop_stream(name: str):
+    await asyncio.to_thread(stream_manager.stop, name)
+    return stream_manager.get(name).state
@@ -3,20 +3,34 @@ from fastapi import FastAPI
 from routes.camera import camera_api
 from routes.flow import flow_api
 from routes.mouse import mouse_api
+from routes.stream import stream_api
 
 from controllers.camera import CameraHelper
+from controllers.flows.stream import stream_manager
+from controllers.model.registry import model_registry
 
 from utils import config, logger
 
 
-on_shutdown = [CameraHelper.close_instance]
+def warm_up_model():
+    if config["warm_up"]:
+        model_registry.warm_up_in_background("gesture")
+
+
+on_startup = [warm_up_model]
+on_shutdown = [
+    stream_manager.shutdown,
+    CameraHelper.close_instance,
+    model_registry.clear,
+]
 config["is_server"] = True
 
 
-app = FastAPI(on_shutdown=on_shutdown)
+app = FastAPI(on_startup=on_startup, on_shutdown=on_shutdown)
 app.include_router(camera_api)
 app.include_router(flow_api)
 app.include_router(mouse_api)
+app.include_router(stream_api)
 
 if config["is_dev"]:
     from fastapi.middleware.cors import CORSMiddleware
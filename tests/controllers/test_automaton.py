@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+from benchmarks.synthetic import gen_synthetic_hand
+from controllers.cursor_handle import (
+    CursorHandleEnum,
+    add_on_handle_execute,
+    left_button_handler,
+)
+from controllers.flows.automaton import GestureAutomatonNode
+from controllers.flows.control_flow import (
+    GestureMatcherCompose,
+    GestureTiming,
+    gen_gesture_and_cursor_combine_node,
+    gesture_handle_set,
+    gesture_mapping_snapshot,
+    set_gesture_and_cursor_handle_mapping,
+)
+from controllers.flows.node import OperationMapNode, run_flow
+from controllers.flows.window import all_true
+from controllers.hand_info import Gesture
+from controllers.hand_move import hand_move_handler
+from controllers.landmark_match import GestureMatch
+from controllers.recording import hand_info_from_dict
+
+
+def gen_hands(frames: int):
+    hands = []
+    for i in range(frames):
+        hand = hand_info_from_dict(gen_synthetic_hand(i))
+        if (i // 20) % 3 == 0:
+            hand.gesture = Gesture.Victory
+        hands.append(hand)
+    return hands
+
+
+def record_events(begin, hands) -> list[str]:
+    events: list[str] = []
+    clean = add_on_handle_execute(lambda name, pos, t: events.append(name))
+    try:
+        for hand in hands:
+            run_flow(begin, hand)
+    finally:
+        clean()
+        hand_move_handler.enable_move = True
+        left_button_handler.up(0, 0)
+    return events
+
+
+class TestGestureAutomaton(TestCase):
+    def test_same_as_subgraphs(self):
+        hands = gen_hands(600)
+        legacy = OperationMapNode(lambda x: x)
+        for compose in gesture_handle_set:
+            legacy.add_next(gen_gesture_and_cursor_combine_node(compose))
+        automaton = GestureAutomatonNode(gesture_handle_set)
+
+        expected = record_events(legacy, hands)
+        res = record_events(automaton, hands)
+
+        assert len(expected) > 0
+        assert res == expected
+        # 两个 Victory 映射共用一个结果窗口，所有位置判断共用一个位置窗口
+        assert len(automaton.match_windows) == 3
+
+    def test_hold_timing(self):
+        compose = GestureMatcherCompose(
+            GestureMatch.Victory,
+            all_true,
+            CursorHandleEnum.RightClick,
+            timing=GestureTiming("hold", 1),
+        )
+        hands = gen_hands(60)
+        for hand in hands:
+            hand.gesture = Gesture.Victory
+        events = record_events(GestureAutomatonNode([compose]), hands)
+
+        assert events == ["RightClick"]
+
+    def test_subgraph_rejects_timing(self):
+        compose = GestureMatcherCompose(
+            GestureMatch.Victory,
+            all_true,
+            CursorHandleEnum.RightClick,
+            timing=GestureTiming("hold", 1),
+        )
+        with self.assertRaises(ValueError):
+            gen_gesture_and_cursor_combine_node(compose)
+        data = [
+            {
+                "match": "Victory",
+                "matchFunc": "AllTrue",
+                "handle": "RightClick",
+                "timing": "hold",
+            }
+        ]
+        version, composes = gesture_mapping_snapshot()
+        with self.assertRaises(ValueError):
+            set_gesture_and_cursor_handle_mapping(data, allow_timing=False)
+        # 被拒绝的映射不会替换当前映射
+        assert gesture_mapping_snapshot() == (version, composes)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+import cv2
+import numpy as np
+
+from controllers.flows.broadcast import (
+    FrameBroadcaster,
+    JpegBroadcaster,
+    release_frame_tuple,
+)
+from controllers.flows.node import CameraNode, forward_node
+from controllers.types import FrameTuple
+
+
+class _FakeCamera:
+    def __init__(self) -> None:
+        self.reads = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, auto_open: bool = False):
+        self.reads += 1
+        time.sleep(0.01)
+        frame = np.full((120, 160, 3), self.reads % 255, np.uint8)
+        return FrameTuple(frame, 160, 120, time.time())
+
+
+class TestJpegBroadcaster(TestCase):
+    def test_shared_encode_from_flow(self):
+        source = _FakeCamera()
+        node = CameraNode(source)  # type: ignore
+        running = threading.Event()
+        frames = FrameBroadcaster(node, source, lambda: True)
+        broadcaster = JpegBroadcaster(frames, 70, 0.5)
+
+        def run_flow():
+            while running.is_set():
+                forward_node(node, None)
+
+        async def run():
+            fast, slow = broadcaster.subscribe(4), broadcaster.subscribe(1)
+            running.set()
+            threading.Thread(target=run_flow).start()
+            try:
+                frames = [await fast.get(2) for _ in range(10)]
+            finally:
+                running.clear()
+            fast.close()
+            slow.close()
+            await asyncio.sleep(0.6)
+            return frames, slow.drops
+
+        frames, slow_drops = asyncio.run(run())
+        image = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape == (60, 80, 3)
+        # 两个客户端共用一次编码，没有读取的慢客户端只丢帧
+        assert broadcaster.encoded == broadcaster.channel.published
+        assert slow_drops >= 8
+        assert broadcaster.state["mode"] == "idle"
+        assert not node.channel.subscribers
+
+    def test_fallback_capture(self):
+        source = _FakeCamera()
+        node = CameraNode(source)  # type: ignore
+        broadcaster = JpegBroadcaster(FrameBroadcaster(node, source, lambda: False))
+
+        async def run():
+            with broadcaster.subscribe() as sub:
+                return await sub.get(2)
+
+        jpeg = asyncio.run(run())
+        assert jpeg[:2] == b"\xff\xd8" and source.reads >= 1
+        assert node.channel.published == 0
+
+
+class TestFrameBroadcaster(TestCase):
+    def test_clients_share_frames(self):
+        source = _FakeCamera()
+        node = CameraNode(source)  # type: ignore
+        broadcaster = FrameBroadcaster(node, source, lambda: False)
+
+        async def read(sub, n: int) -> list[int]:
+            res = []
+            for _ in range(n):
+                frame = await sub.get(2)
+                res.append(int(frame.frame[0, 0, 0]))
+                release_frame_tuple(frame)
+            return res
+
+        async def run():
+            with broadcaster.subscribe(8) as first, broadcaster.subscribe(8) as second:
+                return await asyncio.gather(read(first, 5), read(second, 5))
+
+        first, second = asyncio.run(run())
+        # 两个客户端拿到同样的帧，摄像头每帧只读一次
+        assert first == second
+        assert source.reads <= 7
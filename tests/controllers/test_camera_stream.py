@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+import cv2
+import numpy as np
+
+from controllers.camera_stream import (
+    FrameFormat,
+    encode_frame,
+    encoded_size,
+    negotiate,
+)
+from controllers.types import FrameTuple
+
+
+class TestCameraStream(TestCase):
+    def test_negotiate(self):
+        options = negotiate("downscaled", fps=60, quality=200, max_fps=30)
+        assert options.format == FrameFormat.downscaled
+        assert options.fps == 30 and options.quality == 100 and options.scale == 0.5
+        for bad in ({"format": "png"}, {"fps": 0}, {"scale": 1.5}):
+            with self.assertRaises(ValueError):
+                negotiate(**bad)  # type: ignore
+
+    def test_encode(self):
+        frame = np.random.randint(0, 255, (72, 128, 3), np.uint8)
+        tuple_frame = FrameTuple(frame, 128, 72, 0.0)
+        for name in ("raw", "jpeg", "webp", "downscaled"):
+            options = negotiate(name)
+            data = encode_frame(frame, options)
+            width, height = encoded_size(tuple_frame, options)
+            if name in ("raw", "downscaled"):
+                assert len(data) == width * height * 3
+            else:
+                image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                assert image.shape == (height, width, 3)
+        assert len(encode_frame(frame, negotiate("downscaled"))) == 64 * 36 * 3
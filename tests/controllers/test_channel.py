@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from controllers.flows.channel import OutputChannel
+from controllers.flows.node import CameraNode, NoResult, forward_node
+
+
+class _CountSource:
+    def __init__(self) -> None:
+        self.idx = 0
+
+    def read(self):
+        self.idx += 1
+        return self.idx
+
+
+class TestOutputChannel(TestCase):
+    def test_drop_oldest(self):
+        channel: OutputChannel[int] = OutputChannel()
+
+        async def run():
+            with channel.subscribe(2) as sub:
+                for idx in range(5):
+                    channel.publish(idx)
+                return [await sub.get(1), await sub.get(1)], sub.drops
+
+        res, drops = asyncio.run(run())
+        assert res == [3, 4] and drops == 3
+        assert channel.published == 5 and channel.state["subscribers"] == 0
+
+    def test_publish_from_thread(self):
+        node = CameraNode(_CountSource())  # type: ignore
+
+        def run_node():
+            for _ in range(10):
+                forward_node(node, None)
+
+        async def run():
+            with node.channel.subscribe(16) as sub:
+                threading.Thread(target=run_node).start()
+                return [await sub.get(2) for _ in range(10)]
+
+        assert asyncio.run(run()) == list(range(1, 11))
+
+    def test_no_subscriber(self):
+        node = CameraNode(_CountSource())  # type: ignore
+        forward_node(node, None)
+        assert node.output is not NoResult and node.channel.published == 0
@@ -0,0 +1,195 @@
+from unittest import TestCase
+
+from controllers.actuator import VirtualScreenActuator, actuator_manager
+from controllers.flows.automaton import GestureAutomatonNode
+from controllers.flows.compiler import compile_flow
+from controllers.flows.control_flow import (
+    gen_gesture_and_cursor_combine_node,
+    gesture_mapping_snapshot,
+)
+from controllers.flows.node import (
+    CombineFlowNode,
+    CursorMoveHandleNode,
+    FlowNodeBase,
+    LandMarkFilterNode,
+    LandMarkSmoothNode,
+    NoResult,
+    OperationMapNode,
+    run_flow,
+)
+from controllers.hand_info import HandInfo
+from controllers.hand_move import HandMoveHandler, hand_move_handler
+from controllers.recording import hand_info_from_dict
+
+from benchmarks.synthetic import gen_synthetic_hand
+
+
+class RecordNode(FlowNodeBase[int, int]):
+    def __init__(self, name: str, log: list, fn=lambda x: x) -> None:
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.fn = fn
+
+    def forward(self, _in: int) -> int:
+        self.log.append((self.name, _in))
+        self.output = self.fn(_in)
+        return self.output
+
+
+def build_graph(log: list):
+    begin = RecordNode("begin", log, lambda x: x + 1)
+    odd = RecordNode("odd", log, lambda x: x if x % 2 else NoResult)
+    odd_next = RecordNode("odd_next", log)
+    disabled = RecordNode("disabled", log)
+    disabled.enable = False
+    inner_start = RecordNode("inner_start", log, lambda x: x * 10)
+    inner_a = RecordNode("inner_a", log)
+    inner_b = RecordNode("inner_b", log, lambda x: -x)
+    inner_end = RecordNode("inner_end", log)
+    inner_start.add_next(inner_a)
+    inner_start.add_next(inner_b)
+    inner_b.add_next(inner_end)
+    after = RecordNode("after", log)
+
+    begin.add_next(odd)
+    begin.add_next(disabled)
+    begin.add_next(CombineFlowNode(inner_start, inner_end))
+    begin.add_next(after)
+    odd.add_next(odd_next)
+    disabled.add_next(RecordNode("never", log))
+    return begin
+
+
+class HandsNode(FlowNodeBase[None, list[HandInfo]]):
+    def __init__(self, frames: int) -> None:
+        super().__init__()
+        self.hands = [
+            [hand_info_from_dict(gen_synthetic_hand(i))] for i in range(frames)
+        ]
+        self.idx = 0
+
+    def forward(self, _in) -> list[HandInfo]:
+        self.output = self.hands[self.idx]
+        self.idx += 1
+        return self.output
+
+
+class DispatchNode(FlowNodeBase[int, int]):
+    """
+    自定义 gen_forward_next：偶数交给第一个后继，奇数交给第二个
+    """
+
+    def forward(self, _in: int) -> int:
+        self.output = _in
+        return _in
+
+    def gen_forward_next(self):
+        return [(self.next_nodes[self.output % 2], self.output)]
+
+
+def build_default_graph(frames: int, automaton: bool):
+    """
+    与 init_graph 相同的结构，光标状态使用独立的 HandMoveHandler
+    """
+    handler = HandMoveHandler()
+    begin = HandsNode(frames)
+    hands_filter = LandMarkFilterNode()
+    smooth = LandMarkSmoothNode(handler)
+    begin.add_next(hands_filter)
+    hands_filter.add_next(smooth)
+    smooth.add_next(CursorMoveHandleNode(handler))
+    _, composes = gesture_mapping_snapshot()
+    if automaton:
+        smooth.add_next(GestureAutomatonNode(composes, move_handler=handler))
+        return begin, [smooth]
+    control = OperationMapNode(lambda hand: hand)
+    combines = [gen_gesture_and_cursor_combine_node(it) for it in composes]
+    for node in combines:
+        control.add_next(node)
+    smooth.add_next(control)
+    return begin, [smooth, *combines]
+
+
+def run_default_graph(frames: int, automaton: bool, compiled: bool):
+    hand_move_handler.enable_move = True
+    hand_move_handler.last_hand = None
+    begin, watched = build_default_graph(frames, automaton)
+    plan = compile_flow(begin) if compiled else None
+    backend = VirtualScreenActuator()
+    outputs = []
+    with actuator_manager.bind(backend):
+        begin.init()
+        for _ in range(frames):
+            if plan is None:
+                run_flow(begin, None)
+            else:
+                plan.run(None)
+            outputs.append([node.output for node in watched])
+        begin.clean_effect()
+    events = [(e.kind, e.x, e.y, e.detail) for e in backend.events]
+    return outputs, events
+
+
+class TestFlowCompiler(TestCase):
+    def test_same_order_as_interpreter(self):
+        interpreter_log: list = []
+        compiled_log: list = []
+        interpreter = build_graph(interpreter_log)
+        plan = compile_flow(build_graph(compiled_log))
+
+        for i in range(6):
+            run_flow(interpreter, i)
+            plan.run(i)
+
+        assert compiled_log == interpreter_log
+        assert all(name != "never" for name, _ in compiled_log)
+
+    def test_steps(self):
+        plan = compile_flow(build_graph([]))
+
+        # combine 本身被内联，内部子图之后多一步同步它的 output
+        assert len(plan) == 11
+        assert plan.steps[0][2] == -1
+
+    def test_operation_map(self):
+        begin = OperationMapNode(lambda x: x * 2)
+        end = OperationMapNode(lambda x: x + 1)
+        begin.add_next(end)
+        plan = compile_flow(begin)
+
+        plan.run(3)
+        assert end.output == 7
+
+    def test_custom_forward_next(self):
+        log: list = []
+        begin = DispatchNode()
+        begin.add_next(RecordNode("even", log))
+        begin.add_next(RecordNode("odd", log))
+        plan = compile_flow(begin)
+
+        for i in range(4):
+            plan.run(i)
+        assert log == [("even", 0), ("odd", 1), ("even", 2), ("odd", 3)]
+
+    def test_default_graph_same_as_interpreter(self):
+        for automaton in (True, False):
+            interpreted = run_default_graph(150, automaton, False)
+            compiled = run_default_graph(150, automaton, True)
+
+            outputs, events = compiled
+            assert events and any(kind != "move" for kind, *_ in events)
+            assert outputs == interpreted[0]
+            assert events == interpreted[1]
+
+    def test_combine_output(self):
+        start = OperationMapNode(lambda x: x * 2)
+        end = OperationMapNode(lambda x: x + 1)
+        start.add_next(end)
+        combine = CombineFlowNode(start, end)
+        begin = OperationMapNode(lambda x: x)
+        begin.add_next(combine)
+        plan = compile_flow(begin)
+
+        plan.run(3)
+        assert combine.output == 7
@@ -1,8 +1,19 @@
+import threading
+import time
+
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 
-from controllers.cursor_handle import CursorHandleEnum
+from controllers.actuator import (
+    ActuatorManager,
+    VirtualScreenActuator,
+    actuator_manager,
+    create_actuator,
+    screen_size,
+)
+from controllers.cursor_handle import CursorHandleEnum, current_position, move
+from controllers.cursor_motion import CursorMotion, cursor_motion
 
 
 class TestCursorHandle(TestCase):
@@ -11,5 +22,121 @@ class TestCursorHandle(TestCase):
     @patch("controllers.cursor_handle._mouseDown")
     @patch("controllers.cursor_handle._position")
     @patch("controllers.cursor_handle._moveTo")
-    def test_cusor(self):
-        pass
+    def test_cusor(
+        self,
+        mock_move_to: MagicMock,
+        mock_position: MagicMock,
+        mock_mouse_down: MagicMock,
+        mock_vscroll: MagicMock,
+    ):
+        mock_position.return_value = (10, 10)
+        CursorHandleEnum.MoveTo.execute(100, 200)
+        CursorHandleEnum.ScrollUp.execute(100, 200)
+        CursorHandleEnum.LeftDown.execute(100, 200)
+        CursorHandleEnum.LeftUp.execute(100, 200)
+
+        mock_move_to.assert_called_once_with(100, 200)
+        mock_vscroll.assert_called_once_with(10, 100, 200)
+        mock_mouse_down.assert_called_once_with(100, 200, "left")
+
+    def test_virtual_actuator(self):
+        screen = VirtualScreenActuator(800, 600)
+        old = actuator_manager.backend
+        actuator_manager.use(screen)
+        actuator_manager.reset_latency()
+        try:
+            CursorHandleEnum.MoveTo.execute(100, 200)
+            assert move(1000, 0) == (799, 200)
+            CursorHandleEnum.LeftClick.execute(10, 20)
+
+            assert current_position() == (10, 20)
+            assert [e.kind for e in screen.events] == ["move", "move", "click"]
+            assert actuator_manager.state["latency"]["virtual"]["move_to"]["calls"] == 2
+        finally:
+            actuator_manager.use(old)
+
+    def test_state_not_create_backend(self):
+        manager = ActuatorManager()
+        with patch("controllers.actuator.create_actuator") as mock_create:
+            state = manager.state
+        mock_create.assert_not_called()
+        assert state["backend"] is None
+        assert state["configured"]
+        manager.use(VirtualScreenActuator())
+        assert manager.state["backend"] == "virtual"
+
+    def test_motion_interpolate(self):
+        now = 0.0
+        motion = CursorMotion(500, clock=lambda: now)
+        screen = VirtualScreenActuator(800, 600)
+        screen.move_to(100, 100)
+        with actuator_manager.bind(screen):
+            motion._reset()
+            for _ in range(3):
+                motion.move(30, 0)
+                # 两次识别结果之间输出线程以 500Hz 走 25 步
+                for _ in range(25):
+                    now += 0.002
+                    motion._tick(now)
+
+        assert motion.position == (190, 100)
+        assert screen.position() == (190, 100)
+        # 每次识别结果被拆成多次较小的移动
+        assert motion.moves > 4 * 3
+
+    def test_motion_thread(self):
+        screen = VirtualScreenActuator(800, 600)
+        old = actuator_manager.backend
+        actuator_manager.use(screen)
+        cursor_motion.start(500)
+        try:
+            CursorHandleEnum.MoveTo.execute(100, 100)
+            for _ in range(3):
+                move(30, 0)
+            deadline = time.monotonic() + 2
+            while screen.position() != (190, 100) and time.monotonic() < deadline:
+                time.sleep(0.005)
+
+            assert current_position() == (190, 100)
+            assert screen.position() == (190, 100)
+        finally:
+            cursor_motion.stop()
+            actuator_manager.use(old)
+
+    def test_backend_lock(self):
+        blocked = threading.Event()
+        release = threading.Event()
+
+        class SlowScreen(VirtualScreenActuator):
+            def move_to(self, x: int, y: int):
+                blocked.set()
+                release.wait(2)
+                super().move_to(x, y)
+
+        slow, fast = SlowScreen(800, 600), VirtualScreenActuator(800, 600)
+
+        def run_slow():
+            with actuator_manager.bind(slow):
+                actuator_manager.move_to(1, 1)
+
+        thread = threading.Thread(target=run_slow)
+        thread.start()
+        try:
+            assert blocked.wait(2)
+            # 另一个后端不用等待慢的后端
+            with actuator_manager.bind(fast):
+                actuator_manager.move_to(5, 5)
+            assert fast.position() == (5, 5)
+            assert slow.position() == (0, 0)
+        finally:
+            release.set()
+            thread.join()
+        assert slow.position() == (1, 1)
+
+    def test_screen_size(self):
+        with patch.dict("os.environ", {"VISION_MOUSE_SCREEN": "2560x1440"}):
+            assert screen_size() == (2560, 1440)
+            assert create_actuator("virtual").width == 2560
+        with patch.dict("os.environ", {"VISION_MOUSE_SCREEN": "wide"}):
+            with self.assertRaises(ValueError):
+                screen_size()
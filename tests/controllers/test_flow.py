@@ -1,24 +1,25 @@
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
-from controllers.flows.flow import _jump_false, _jump_true, flow_manager
+from controllers.flows.flow import flow_manager
+from controllers.flows.window import jump_false, jump_true
 
 
 class TestFlowNode(TestCase):
     def test_jump_func(self):
         data = [True, False, False]
 
-        assert _jump_true(data) == False
-        assert _jump_false(data) == True
+        assert jump_true(data) == False
+        assert jump_false(data) == True
 
         data = [False, True, True]
 
-        assert _jump_false(data) == False
-        assert _jump_true(data) == True
+        assert jump_false(data) == False
+        assert jump_true(data) == True
 
         data = [True, True, True]
 
-        assert _jump_false(data) == False
-        assert _jump_true(data) == False
+        assert jump_false(data) == False
+        assert jump_true(data) == False
 
     @patch("controllers.flow.run_flow")
     async def test_start_flow_async(self, mock_run_flow: MagicMock):
@@ -0,0 +1,56 @@
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from benchmarks.synthetic import gen_synthetic_hand
+from controllers.flows.node import FrameRateGovernorNode, LandMarkFilterNode, NoResult
+from controllers.recording import hand_info_from_dict
+from controllers.types import FrameTuple
+
+
+class FakeSource:
+    def __init__(self) -> None:
+        self.fps_history: list[int] = []
+
+    def set_fps(self, fps: int):
+        self.fps_history.append(fps)
+
+
+def gen_frame() -> FrameTuple:
+    return FrameTuple(np.zeros((720, 1280, 3), np.uint8), 1280, 720, time.time())
+
+
+class TestFrameRateGovernor(TestCase):
+    def test_idle_and_wake(self):
+        hand_node = LandMarkFilterNode()
+        source = FakeSource()
+        node = FrameRateGovernorNode(hand_node, source, idle_after=0.05, idle_fps=10)
+        node.init()
+
+        assert node.forward(gen_frame()).width == 1280
+        time.sleep(0.06)
+        frame = gen_frame()
+        assert node.forward(frame) is frame
+        assert node.mode == "idle" and source.fps_history == [10]
+        # 空闲模式下两次推理之间的帧直接跳过
+        assert node.forward(gen_frame()) is NoResult
+
+        hand_node.output = hand_info_from_dict(gen_synthetic_hand(0))
+        res = node.forward(gen_frame())
+        assert node.mode == "active" and source.fps_history == [10, 30]
+        assert res.width == 1280 and res.roi is None
+
+        state = node.state
+        assert state["switches"] == 2
+        assert state["idleFrames"] == 1 and state["skippedFrames"] == 1
+
+    def test_state_read_only(self):
+        node = FrameRateGovernorNode(LandMarkFilterNode(), FakeSource())
+        node.init()
+        since, wall = node._mode_since, dict(node.wall)
+        time.sleep(0.01)
+        state = node.state
+        # 读取状态不修改流程线程中累计的时间
+        assert node._mode_since == since and node.wall == wall
+        assert state["mode"] == "active"
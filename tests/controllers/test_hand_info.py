@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+import numpy as np
+
+from controllers.hand_info import HandInfo, LandMark, landmark_array
+
+
+def gen_points(n: int = 21) -> list[SimpleNamespace]:
+    return [SimpleNamespace(x=i / 100, y=i / 50, z=-i / 200) for i in range(n)]
+
+
+class TestHandInfo(TestCase):
+    def test_landmark_array(self):
+        landmarks = landmark_array(gen_points(), 1000, 500)
+
+        assert landmarks.shape == (21, 3)
+        assert landmarks.dtype == np.float32
+        assert landmarks.flags.c_contiguous
+        assert np.allclose(landmarks[10], (100, 100, -50))
+
+        flat = landmark_array(gen_points(), 1000, 500, with_z=False)
+        assert np.all(flat[:, 2] == 0)
+
+    def test_list_api(self):
+        pos = [(0, 0) for _ in range(21)]
+        pos[LandMark.MIDDLE_FINGER_MCP] = (30, 40)
+        pos[LandMark.THUMB_TIP] = (3, 4)
+        hand = HandInfo(pos, (128, 128), 0)
+
+        assert hand.landmarks.shape == (21, 3)
+        assert hand.unit == 50
+        assert hand.hand_landmark_pos[9] == (30, 40, 0)
+        assert hand.anchor == (30, 40, 0) and isinstance(hand.anchor, tuple)
+        assert hand.get_mark_distance(LandMark.THUMB_TIP, LandMark.WRIST) == 5
+        assert hand.is_touched(LandMark.THUMB_TIP, LandMark.WRIST)
+        assert hand.encode_pos().split("/")[9] == "30.0,40.0"
+        assert hand == HandInfo(pos, (128, 128), 0)
+        assert hand != HandInfo(pos, (128, 128), 1)
+
+    def test_anchor_diff(self):
+        pos = np.zeros((21, 3), dtype=np.float32)
+        pos[9] = (10, 20, 0)
+        other = HandInfo(pos, (128, 128), 1.0)
+        pos = pos.copy()
+        pos[9] = (13, 24, 0)
+        hand = HandInfo(pos, (128, 128), 1.5)
+
+        (dx, dy), dt = hand.anchor_diff(other)
+        assert (dx, dy, dt) == (3, 4, 0.5)
+        assert hand.distance(other) == 5
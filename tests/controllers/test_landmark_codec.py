@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+import numpy as np
+
+from benchmarks.synthetic import gen_synthetic_hand
+from controllers.flows.node import LandMarkFeedNode, LandMarkFilterNode, forward_node
+from controllers.landmark_codec import SCALE, LandmarkDecoder, LandmarkEncoder
+from controllers.recording import hand_info_from_dict
+
+
+def gen_hands(idx: int, count: int):
+    return [
+        hand_info_from_dict(gen_synthetic_hand(idx + i * 100)) for i in range(count)
+    ]
+
+
+class TestLandmarkCodec(TestCase):
+    def test_round_trip(self):
+        encoder, decoder = LandmarkEncoder(keyframe_interval=10), LandmarkDecoder()
+        keyframes = 0
+        for idx in range(60):
+            # 中途手的数量变化时必须发送关键帧
+            hands = gen_hands(idx, 1 if idx < 30 else 2)
+            data = encoder.encode(idx, hands, hands[0], 1280, 720)
+            frame = decoder.decode(data)
+            keyframes += frame.keyframe
+            if idx == 30:
+                assert frame.keyframe
+            assert frame.seq == idx and frame.has_current
+            assert frame.hands.shape == (len(hands) + 1, 21, 2)
+            expected = np.stack([h.landmarks[:, :2] for h in [*hands, hands[0]]])
+            assert np.abs(frame.hands - expected).max() <= 0.5 / SCALE + 1e-4
+        assert 6 <= keyframes < 60
+
+    def test_delta_without_keyframe(self):
+        encoder = LandmarkEncoder()
+        encoder.encode(0, gen_hands(0, 1), None, 1280, 720)
+        delta = encoder.encode(1, gen_hands(1, 1), None, 1280, 720)
+        with self.assertRaises(ValueError):
+            LandmarkDecoder().decode(delta)
+
+    def test_feed_wait(self):
+        filter_node = LandMarkFilterNode()
+        node = LandMarkFeedNode(filter_node)
+        hands = gen_hands(0, 1)
+
+        async def wait():
+            with node.channel.subscribe(1) as sub:
+                threading.Timer(0.05, forward_node, (node, hands)).start()
+                return await sub.get(2)
+
+        res, current = asyncio.run(wait())
+        assert res is hands and current is None
+        assert node.channel.published == 1 and not node.channel.subscribers
+
+    def test_feed_after_filter(self):
+        filter_node = LandMarkFilterNode()
+        node = LandMarkFeedNode(filter_node)
+        hands = gen_hands(0, 2)
+        forward_node(filter_node, hands)
+        res = forward_node(node, hands)
+        assert res == (hands, hands[0])
+        assert node.output is res
@@ -1,9 +1,11 @@
 from unittest import TestCase
 
+import numpy as np
+
 from utils import Position
 
 from controllers.landmark_match import GestureMatch
-from controllers.hand_info import HandInfo
+from controllers.hand_info import Gesture, HandInfo
 
 
 def gen_test_hand_info() -> HandInfo:
@@ -21,3 +23,14 @@ class TestLandMarkMatch(TestCase):
             res = matcher.match(hand_info)
 
             assert res == True
+
+    def test_batch_match_same_as_single(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            pos = rng.uniform(0, 100, (21, 3)).astype(np.float32)
+            hand_info = HandInfo(pos, (128, 128), 0, Gesture.Victory)
+            for matcher in GestureMatch:
+                assert matcher.match(hand_info) == matcher.func(hand_info)
+
+        assert hand_info.match_cache is not None
+        assert len(hand_info.match_cache) == 1
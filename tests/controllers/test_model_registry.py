@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from controllers.model.base import VideoTimestamp
+from controllers.model.registry import ModelRegistry
+
+SYNTHETIC = "benchmarks.synthetic:SyntheticHandModel"
+
+
+class TestModelRegistry(TestCase):
+    def test_reuse(self):
+        registry = ModelRegistry(idle_timeout=0)
+        first = registry.acquire(SYNTHETIC)
+        # 同时借出的实例互不共享
+        second = registry.acquire(SYNTHETIC)
+        assert first is not second
+        registry.release(first)
+        registry.release(second)
+
+        again = registry.acquire(SYNTHETIC)
+        assert again is first or again is second
+        state = registry.state
+        assert state["hits"] == 1 and state["misses"] == 2
+        assert state["inUse"] == 1 and state["idle"] == 1
+        registry.release(again)
+        with self.assertRaises(ValueError):
+            registry.release(again)
+
+        assert registry.evict_idle(0) == 2
+        assert registry.state["idle"] == 0
+        assert registry.state["evictions"] == 2
+
+    def test_video_timestamp(self):
+        ts = VideoTimestamp()
+        assert ts.next(10.0) == 10000
+        assert ts.next(10.0) == 10001
+        # 下一次启动回放的时间更早时仍然递增
+        assert ts.next(5.0) == 10002
+        assert ts.next(11.0) == 11000
@@ -0,0 +1,63 @@
+import threading
+from unittest import TestCase
+
+from controllers.flows.node import FlowNodeBase
+from controllers.flows.pipeline import FlowPipeline
+
+from utils.slot import LatestSlot
+
+
+class CountNode(FlowNodeBase[None, int]):
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.count = 0
+        self.limit = limit
+        self.done = threading.Event()
+
+    def forward(self, _in) -> int:
+        self.count += 1
+        if self.count >= self.limit:
+            self.done.set()
+        self.output = self.count
+        return self.count
+
+
+class CollectNode(FlowNodeBase[int, int]):
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: list[int] = []
+
+    def forward(self, _in: int) -> int:
+        self.values.append(_in)
+        self.output = _in
+        return _in
+
+
+class TestLatestSlot(TestCase):
+    def test_overwrite_counts_drop(self):
+        slot: LatestSlot[int] = LatestSlot()
+        slot.put(1)
+        slot.put(2)
+
+        assert slot.get(0) == 2
+        assert slot.drops == 1
+        assert slot.puts == 2
+
+        with self.assertRaises(TimeoutError):
+            slot.get(0.01)
+
+
+class TestFlowPipeline(TestCase):
+    def test_run_stages(self):
+        source = CountNode(200)
+        sink = CollectNode()
+        pipeline = FlowPipeline([("source", source), ("sink", sink)])
+        source.add_next(pipeline.handoff(sink))
+
+        pipeline.run(lambda: not source.done.is_set())
+
+        state = pipeline.state
+        assert len(sink.values) > 0
+        assert sink.values == sorted(sink.values)
+        assert state[0]["frames"] == 200
+        assert state[1]["frames"] + state[1]["drops"] <= 200
@@ -0,0 +1,110 @@
+import threading
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.synthetic import gen_synthetic_hand
+from controllers.hand_info import Gesture
+from controllers.model.process import WorkerError, _Worker, create_process_model
+from controllers.types import FrameTuple
+
+
+def gen_frame(idx: int) -> FrameTuple:
+    frame = np.zeros((72, 128, 3), np.uint8)
+    frame[0, 0, 0] = idx
+    return FrameTuple(frame, 128, 72, float(idx))
+
+
+class TestProcessModel(TestCase):
+    def setUp(self) -> None:
+        self.pool = create_process_model(
+            "benchmarks.synthetic:SyntheticHandModel", workers=2, health_interval=0
+        )
+
+    def tearDown(self) -> None:
+        self.pool.close()
+
+    def test_forward(self):
+        for idx in range(5):
+            hands = self.pool.forward(gen_frame(idx))
+            assert len(hands) == 1
+            hand = hands[0]
+            expected = np.array(gen_synthetic_hand(idx, 128, 72)["pos"], np.float32)
+            assert np.array_equal(hand.landmarks, expected)
+            assert hand.gesture == Gesture.Victory
+            assert hand.camera_size == (128, 72)
+            assert hand.frame_time == float(idx)
+        assert self.pool.state["frames"] == 5
+        assert self.pool.state["alive"] == 2
+
+    def test_restart(self):
+        self.pool.forward(gen_frame(1))
+        for worker in self.pool.workers:
+            assert worker.proc is not None
+            worker.proc.kill()
+            worker.proc.join()
+
+        self.pool.check_health()
+        assert self.pool.state["restarts"] == 2
+        hands = self.pool.forward(gen_frame(3))
+        assert len(hands) == 1
+        assert self.pool.state["alive"] == 2
+
+    def test_lease_per_stream(self):
+        first, second = self.pool.lease(), self.pool.lease()
+        assert first.worker is not second.worker
+        # 同一路的帧总是交给同一个子进程
+        for idx in range(3):
+            assert len(first.forward(gen_frame(idx))) == 1
+        assert first.worker.seq == 3 and second.worker.seq == 0
+
+        third = self.pool.lease()
+        assert len(self.pool.workers) == 3
+        assert len(third.forward(gen_frame(1))) == 1
+        second.close()
+        assert self.pool.lease().worker is second.worker
+        assert self.pool.state["leased"] == 3
+
+    def test_lease_start_outside_lock(self):
+        first, second = self.pool.lease(), self.pool.lease()
+        loading = threading.Event()
+        release = threading.Event()
+        start = _Worker.start
+
+        def slow_start(worker: _Worker, load_timeout: float):
+            loading.set()
+            release.wait(5)
+            start(worker, load_timeout)
+
+        leases = []
+        with patch.object(_Worker, "start", slow_start):
+            thread = threading.Thread(target=lambda: leases.append(self.pool.lease()))
+            thread.start()
+            try:
+                assert loading.wait(5)
+                # 新的子进程还在加载时，归还和借用空闲的子进程不用等待
+                second.close()
+                assert self.pool.lease().worker is second.worker
+            finally:
+                release.set()
+                thread.join()
+        assert len(self.pool.workers) == 3
+        assert leases[0].worker.idx == 2 and len(leases[0].forward(gen_frame(1))) == 1
+        first.close()
+
+    def test_restart_failure(self):
+        lease = self.pool.lease()
+        worker = lease.worker
+        assert worker.proc is not None
+        worker.proc.kill()
+        worker.proc.join()
+
+        with patch.object(worker, "start", side_effect=WorkerError("load failed")):
+            assert lease.forward(gen_frame(1)) == []
+            self.pool.check_health()
+        assert not worker.alive
+        assert self.pool.state["failures"] == 1
+        # 之后的调用重新启动子进程
+        assert len(lease.forward(gen_frame(2))) == 1
@@ -0,0 +1,64 @@
+from unittest import TestCase
+
+from controllers.flows.node import CombineFlowNode, OperationMapNode, run_flow
+from controllers.flows.profiler import flow_profiler
+from controllers.flows.swap import SwapFlowNode
+
+
+class TestFlowProfiler(TestCase):
+    def setUp(self) -> None:
+        flow_profiler.reset()
+        flow_profiler.enabled = True
+
+    def tearDown(self) -> None:
+        flow_profiler.enabled = False
+        flow_profiler.reset()
+
+    def test_profile_tree(self):
+        begin = OperationMapNode(lambda x: x + 1)
+        inner_start = OperationMapNode(lambda x: x * 2)
+        inner_end = OperationMapNode(lambda x: x - 1)
+        inner_start.add_next(inner_end)
+        combine = CombineFlowNode(inner_start, inner_end)
+        begin.add_next(combine)
+
+        for i in range(10):
+            run_flow(begin, i)
+
+        report = flow_profiler.report([begin])
+        graph = report["graphs"][0]
+        tree = graph["tree"]
+
+        assert graph["flow"]["calls"] == 10
+        assert tree["calls"] == 10
+        assert tree["next"][0]["name"] == "CombineFlowNode"
+        assert tree["next"][0]["inner"][0]["calls"] == 10
+        assert tree["next"][0]["inner"][0]["next"][0]["calls"] == 10
+        assert tree["p99Ms"] >= tree["p50Ms"]
+
+    def test_disabled(self):
+        flow_profiler.enabled = False
+        begin = OperationMapNode(lambda x: x)
+        run_flow(begin, 1)
+
+        assert flow_profiler.node_summary(begin)["calls"] == 0
+
+    def test_forget_swapped_graph(self):
+        swap_node = SwapFlowNode()
+        begin = OperationMapNode(lambda x: x)
+        begin.add_next(swap_node)
+        old = OperationMapNode(lambda x: x)
+        old.add_next(OperationMapNode(lambda x: x))
+        swap_node.publish(old, 1)
+        run_flow(begin, 0)
+        assert flow_profiler.node_summary(old)["calls"] == 1
+
+        swap_node.publish(OperationMapNode(lambda x: x), 2)
+        run_flow(begin, 1)
+        # 被替换掉的子图不再保留统计
+        assert flow_profiler.node_summary(old)["calls"] == 0
+        assert len(flow_profiler._nodes) == 3
+
+        del begin, old
+        swap_node.clear()
+        assert len(flow_profiler._nodes) == 1
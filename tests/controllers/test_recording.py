@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from controllers.hand_info import Gesture, HandInfo
+from controllers.recording import (
+    EndOfRecording,
+    HandInfoRecorder,
+    HandInfoRecordSource,
+    ImageDirSource,
+)
+
+
+class TestRecording(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_hand_info_record_replay(self):
+        path = os.path.join(self.tmp_dir, "hands.jsonl")
+        pos = [(float(i), float(i * 2), 0.0) for i in range(21)]
+        hand = HandInfo(pos, (1280, 720), 1.0, Gesture.Victory)
+
+        recorder = HandInfoRecorder(path)
+        recorder.open()
+        recorder.write([hand])
+        recorder.write([])
+        recorder.close()
+
+        source = HandInfoRecordSource(path)
+        source.open()
+        first = source.read()
+        second = source.read()
+
+        assert len(first) == 1 and len(second) == 0
+        assert first[0].gesture == Gesture.Victory
+        assert first[0].camera_size == (1280, 720)
+        assert list(map(tuple, first[0].hand_landmark_pos)) == pos
+        with self.assertRaises(EndOfRecording):
+            source.read()
+
+    def test_image_dir_source(self):
+        shutil.copy("tests/frame_test.jpg", os.path.join(self.tmp_dir, "0001.jpg"))
+        source = ImageDirSource(self.tmp_dir, loop=True)
+        source.open()
+
+        t1 = source.read()
+        t2 = source.read()
+
+        assert t1.width == 200 and t1.height == 300
+        assert t2.ctime > t1.ctime
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+import numpy as np
+
+from controllers.flows.node import (
+    GestureRecognizeNode,
+    NoResult,
+    OperationMapNode,
+    RoiCropNode,
+)
+from controllers.hand_info import HandInfo, landmark_array
+from controllers.types import FrameTuple
+
+
+class TestRoiCrop(TestCase):
+    def setUp(self) -> None:
+        self.hand_node = OperationMapNode(lambda x: x)
+        self.crop_node = RoiCropNode(self.hand_node, max_side=100)
+        self.frame = FrameTuple(np.zeros((720, 1280, 3), np.uint8), 1280, 720, 0)
+
+    def test_full_frame_without_hand(self):
+        self.hand_node.output = NoResult
+        res = self.crop_node.forward(self.frame)
+
+        assert res is self.frame
+        assert res.full_size == (1280, 720)
+
+    def test_crop_maps_back_to_full_frame(self):
+        pos = [(600 + 5 * i, 400 + 3 * i, 0) for i in range(21)]
+        self.hand_node.output = HandInfo(pos, (1280, 720), 0)
+        res = self.crop_node.forward(self.frame)
+
+        assert res.roi is not None
+        assert max(res.width, res.height) == 100
+        assert res.full_size == (1280, 720)
+
+        point = SimpleNamespace(x=0.5, y=0.5, z=0.0)
+        landmarks = landmark_array([point], res.width, res.height, roi=res.roi)
+        assert landmarks[0, 0] == res.roi.x + res.roi.width / 2
+        assert landmarks[0, 1] == res.roi.y + res.roi.height / 2
+        assert self.crop_node.state["roiFrames"] == 1
+
+    def test_crop_reuses_buffers(self):
+        crop_node = RoiCropNode(self.hand_node, max_side=256)
+        self.frame.frame[...] = np.arange(1280, dtype=np.uint8)[None, :, None]
+        resized = 0
+        for idx in range(20):
+            # 手的位置和大小每帧都在变化，小的直接裁剪，大的缩小到 max_side
+            step = 1 + idx // 2
+            pos = [(300 + 7 * idx + step * i, 300 + i + idx, 0) for i in range(21)]
+            self.hand_node.output = HandInfo(pos, (1280, 720), 0)
+            res = crop_node.forward(self.frame)
+            roi = res.roi
+            assert roi is not None and res.frame.flags.c_contiguous
+            if max(roi.width, roi.height) > 256:
+                resized += 1
+                continue
+            x, y = roi.x, roi.y
+            expected = self.frame.frame[y : y + roi.height, x : x + roi.width]
+            assert (res.frame == expected).all()
+        assert 0 < resized < 20
+        assert crop_node._pool.allocations == 4
+
+    def test_crops_use_separate_model(self):
+        calls: list[tuple[str, bool]] = []
+
+        class Model:
+            def __init__(self, name: str) -> None:
+                self.name = name
+
+            def forward(self, frame: FrameTuple):
+                calls.append((self.name, frame.roi is not None))
+                return []
+
+            def close(self):
+                pass
+
+        node = GestureRecognizeNode(Model("video"), Model("image"))  # type: ignore
+        pos = [(600 + 5 * i, 400 + 3 * i, 0) for i in range(21)]
+        self.hand_node.output = HandInfo(pos, (1280, 720), 0)
+        node.forward(self.crop_node.forward(self.frame))
+        self.hand_node.output = NoResult
+        node.forward(self.crop_node.forward(self.frame))
+
+        assert calls == [("image", True), ("video", False)]
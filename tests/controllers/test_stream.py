@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.synthetic import gen_synthetic_hand
+from controllers.actuator import VirtualScreenActuator
+from controllers.flows.stream import StreamConfig, StreamFlow, StreamManager
+from controllers.recording import HandInfoRecorder, hand_info_from_dict
+
+
+class TestStreamManager(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = StreamManager(max_workers=2)
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+        shutil.rmtree(self.tmp_dir)
+
+    def record(self, name: str, frames: int, offset: int) -> str:
+        path = os.path.join(self.tmp_dir, f"{name}.jsonl")
+        recorder = HandInfoRecorder(path)
+        recorder.open()
+        for i in range(frames):
+            hand = hand_info_from_dict(gen_synthetic_hand(i + offset))
+            hand.c_time = i / 30
+            recorder.write([hand])
+        recorder.close()
+        return path
+
+    def test_streams_are_independent(self):
+        frames = {"a": 120, "b": 80}
+        for idx, (name, n) in enumerate(frames.items()):
+            path = self.record(name, n, idx * 1000)
+            self.manager.add(StreamConfig(name, path, "virtual"))
+            self.manager.start(name)
+
+        t_start = time.time()
+        while any(s.running for s in self.manager.streams.values()):
+            assert time.time() - t_start < 30
+            time.sleep(0.01)
+
+        tracks = []
+        for name, n in frames.items():
+            stream = self.manager.get(name)
+            state = stream.state
+            assert state["finished"] and state["error"] is None
+            assert state["frames"] == n
+            assert state["fps"] > 0 and state["latencyMs"] > 0
+            actuator = stream.actuator
+            assert isinstance(actuator, VirtualScreenActuator)
+            assert any(e.kind == "move" for e in actuator.events)
+            tracks.append([(e.x, e.y) for e in actuator.events])
+        # 两路的手和滤波状态互不影响，光标轨迹不同
+        assert tracks[0] != tracks[1]
+
+        self.manager.remove("a")
+        assert [s["name"] for s in self.manager.state["streams"]] == ["b"]
+
+    def test_stop_timeout_still_closes(self):
+        path = self.record("slow", 10, 0)
+        stream = self.manager.add(StreamConfig("slow", path, "virtual"))
+        reading = threading.Event()
+        release = threading.Event()
+        closed = threading.Event()
+        read = stream.source.read
+
+        def slow_read():
+            reading.set()
+            release.wait(5)
+            return read()
+
+        def close():
+            StreamFlow.close(stream)
+            closed.set()
+
+        stream.source.read = slow_read
+        stream.close = close
+        self.manager.start("slow")
+        assert reading.wait(5)
+
+        # 这一帧还在阻塞读取，stop 不抛出超时，也不在读取中关闭
+        self.manager.stop("slow", timeout=0.05)
+        assert not closed.is_set()
+        with self.assertRaises(RuntimeError):
+            self.manager.start("slow")
+
+        release.set()
+        assert closed.wait(5)
+        t_start = time.time()
+        while "slow" in self.manager._closing:
+            assert time.time() - t_start < 5
+            time.sleep(0.01)
+        self.manager.remove("slow")
+
+    def test_camera_source_not_shared(self):
+        with self.assertRaises(ValueError):
+            self.manager.add(StreamConfig("main", 0))
+        self.manager.add(StreamConfig("a", 7))
+        with self.assertRaises(ValueError):
+            self.manager.add(StreamConfig("b", "7"))
+        assert "b" not in self.manager.streams
+
+    def test_open_failure_releases(self):
+        path = self.record("broken", 10, 0)
+        stream = self.manager.add(StreamConfig("broken", path, "virtual"))
+        with patch(
+            "controllers.flows.stream.compile_flow", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.manager.start("broken")
+        assert not stream.running
+        assert not stream.source.is_opened
+        assert stream.begin is None and stream.model is None
+
+    def test_not_close_borrowed_source(self):
+        path = self.record("shared", 10, 0)
+        stream = self.manager.add(StreamConfig("shared", path, "virtual", loop=True))
+        stream.source.open()
+        self.manager.start("shared")
+        self.manager.stop("shared")
+        # 输入源在流启动之前就已经打开，由打开它的一方负责关闭
+        assert stream.source.is_opened
+        stream.source.close()
@@ -0,0 +1,73 @@
+import threading
+
+from unittest import TestCase
+
+from controllers.flows.compiler import compile_flow
+from controllers.flows.node import OperationMapNode, run_flow
+from controllers.flows.profiler import flow_profiler
+from controllers.flows.swap import SwapFlowNode
+
+
+class TestSwapFlowNode(TestCase):
+    def test_swap_at_frame_boundary(self):
+        seen: list[tuple[str, int]] = []
+        swap_node = SwapFlowNode()
+        begin = OperationMapNode(lambda x: x)
+        begin.add_next(swap_node)
+
+        swap_node.publish(OperationMapNode(lambda x: seen.append(("a", x))), 1)
+        for i in range(5):
+            run_flow(begin, i)
+
+        worker = threading.Thread(
+            target=swap_node.publish,
+            args=(OperationMapNode(lambda x: seen.append(("b", x))), 2),
+        )
+        worker.start()
+        worker.join()
+        assert not swap_node.publish(OperationMapNode(lambda x: None), 1)
+
+        for i in range(5, 10):
+            run_flow(begin, i)
+
+        assert [x for _, x in seen] == list(range(10))
+        assert [name for name, _ in seen] == ["a"] * 5 + ["b"] * 5
+        assert swap_node.state == {"version": 2, "pending": False, "swaps": 2}
+
+    def test_clear_cleans_pending(self):
+        cleaned: list[str] = []
+
+        class Inner(OperationMapNode):
+            def clean_effect(self):
+                cleaned.append("inner")
+                return super().clean_effect()
+
+        swap_node = SwapFlowNode()
+        swap_node.publish(Inner(lambda x: x), 1)
+        swap_node.clear()
+
+        assert cleaned == ["inner"]
+        assert swap_node.state["pending"] is False
+
+    def test_profile_inner(self):
+        swap_node = SwapFlowNode("gesture")
+        begin = OperationMapNode(lambda x: x)
+        begin.add_next(swap_node)
+        swap_node.publish(OperationMapNode(lambda x: x + 1), 1)
+        # 编译器不展开子图，swap 节点仍然是一个步骤
+        plan = compile_flow(begin)
+        assert len(plan) == 2
+
+        flow_profiler.reset()
+        flow_profiler.enabled = True
+        try:
+            for i in range(3):
+                plan.run(i)
+            tree = flow_profiler.report([begin])["graphs"][0]["tree"]
+        finally:
+            flow_profiler.enabled = False
+            flow_profiler.reset()
+        swap_tree = tree["next"][0]
+        assert swap_tree["calls"] == 3
+        assert swap_tree["inner"][0]["name"] == "OperationMapNode"
+        assert swap_tree["inner"][0]["calls"] == 3
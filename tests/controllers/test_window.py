@@ -0,0 +1,68 @@
+import random
+
+from collections import deque
+from unittest import TestCase
+
+from controllers.hand_info import distance_nd
+from controllers.flows.node import PreResultWindowNode
+from controllers.flows.window import (
+    all_true,
+    jump_false,
+    jump_true,
+    move_down,
+    move_up,
+)
+
+# 逐个遍历窗口的参考实现，与增量 handler 的结果对比
+
+
+def _jump_true(it):
+    it = iter(it)
+    return not next(it) and all(it)
+
+
+def _jump_false(it):
+    it = iter(it)
+    return next(it) and all(not i for i in it)
+
+
+def _move_dir(dir: tuple[int, int], min_dis: float = 5):
+    def warp(it):
+        ite = iter(it)
+        first_pos = next(ite)
+        end_pos = first_pos
+        for i in ite:
+            end_pos = i
+            diff = (end_pos[0] - first_pos[0], end_pos[1] - first_pos[1])
+            if (dir[0] != 0 and diff[0] * dir[0] <= 0) or (
+                dir[1] != 0 and diff[1] * dir[1] <= 0
+            ):
+                return False
+        return distance_nd(end_pos, first_pos) >= min_dis
+
+    return warp
+
+
+class TestIncrementalWindow(TestCase):
+    def check_same(self, handler, func, gen, n: int):
+        node = PreResultWindowNode(n, handler)
+        window = deque(maxlen=n)
+        for i in range(2000):
+            it = gen(i)
+            window.append(it)
+            assert node.forward(it) == func(window)
+
+    def test_bool_handler(self):
+        rng = random.Random(0)
+        for n in (1, 3, 30):
+            gen = lambda _: rng.random() < 0.8
+            self.check_same(jump_true, _jump_true, gen, n)
+            self.check_same(jump_false, _jump_false, gen, n)
+            self.check_same(all_true, all, gen, n)
+
+    def test_move_handler(self):
+        rng = random.Random(0)
+        for n in (1, 6, 30):
+            gen = lambda i: (rng.randint(0, 3), i % 50 + rng.randint(0, 2), 0)
+            self.check_same(move_up, _move_dir((0, 1)), gen, n)
+            self.check_same(move_down, _move_dir((0, -1)), gen, n)
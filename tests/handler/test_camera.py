@@ -1,22 +1,33 @@
 from unittest import TestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 from .test_base import test_client
 from controllers.camera import FrameTuple
+from controllers.flows.broadcast import frame_broadcaster, jpeg_broadcaster
 
 from tests.test_helper import get_mock_frame
 
 
+class _MockCamera:
+    def read(self, auto_open: bool = False):
+        return FrameTuple(get_mock_frame(), 200, 300, 0.0)
+
+
 class TestCamera(TestCase):
-    @patch("routes.camera.read_real_time_camera")
-    async def test_websocket_real_time_camera(
-        self, mock_read_real_time_camera: MagicMock
-    ):
-        mock_read_real_time_camera.return_value = [
-            FrameTuple(get_mock_frame(), 200, 300, 0.0)
-        ]
+    @patch.object(frame_broadcaster, "is_flow_running", lambda: False)
+    @patch.object(frame_broadcaster, "source", _MockCamera())
+    def test_websocket_real_time_camera(self):
         with test_client.websocket_connect("/camera/test") as ws:
-
+            info = ws.receive_json()
             data = ws.receive_bytes()
 
+            assert info["format"] == "raw"
             assert len(data) != 0
+
+    def test_feed_setting_validate(self):
+        for setting in ({"quality": 0}, {"quality": 101}, {"scale": 0}, {"scale": 1.5}):
+            res = test_client.put("/camera/feed/setting", json=setting)
+            assert res.status_code == 422
+        quality = jpeg_broadcaster.quality
+        res = test_client.put("/camera/feed/setting", json={"quality": quality})
+        assert res.status_code == 200
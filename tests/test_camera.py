@@ -1,7 +1,12 @@
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 
+import cv2
+
 from controllers.camera import read_real_time_camera, camera
+from controllers.types import CameraSettingModel, SizeTuple
 
 from tests.test_helper import *
 
@@ -24,3 +29,83 @@ class TestCamera(unittest.TestCase):
             assert it.height == 300
             assert it.frame is not None
             break
+
+    @patch("controllers.camera.camera.cap")
+    def test_grabber_keep_latest_frame(self, mock_app: MagicMock):
+        mock_app.isOpened.return_value = True
+        mock_app.grab.return_value = True
+        mock_app.retrieve.return_value = (True, get_mock_frame())
+        camera.update_camera_setting(CameraSettingModel(grabber=True))
+        try:
+            frame = camera.read()
+            assert frame.width == 200
+            assert frame.height == 300
+            assert camera.state.grabber
+            mock_app.read.assert_not_called()
+        finally:
+            camera.update_camera_setting(CameraSettingModel(grabber=False))
+
+    @patch("controllers.camera.camera.cap")
+    def test_steady_state_read_no_allocation(self, mock_app: MagicMock):
+        test_frame = get_mock_frame()
+
+        def read_into(buf):
+            buf[...] = test_frame
+            return True, buf
+
+        mock_app.isOpened.return_value = True
+        mock_app.read.side_effect = read_into
+        camera.size = SizeTuple(test_frame.shape[1], test_frame.shape[0])
+        camera._raw_pool.clear()
+        camera._frame_pool.clear()
+
+        for _ in range(10):
+            frame = camera.read()
+        allocations = camera.frame_allocations
+        acquires = camera._frame_pool.acquires
+        for _ in range(10):
+            frame = camera.read()
+
+        assert camera.frame_allocations == allocations
+        # 镜像和转换成 RGB 在同一次拷贝中完成，每帧只取一次缓冲
+        assert camera._frame_pool.acquires == acquires + 10
+        assert (frame.frame == test_frame[:, ::-1, ::-1]).all()
+
+    @patch("controllers.camera.camera.cap")
+    def test_close_waits_for_grabber(self, mock_app: MagicMock):
+        calls: list[str] = []
+
+        def grab():
+            calls.append("grab")
+            time.sleep(0.02)
+            return True
+
+        mock_app.isOpened.return_value = True
+        mock_app.grab.side_effect = grab
+        mock_app.retrieve.return_value = (True, get_mock_frame())
+        mock_app.release.side_effect = lambda: calls.append("release")
+        camera.update_camera_setting(CameraSettingModel(grabber=True))
+        camera.read()
+        camera.close()
+        camera.grabber = False
+
+        assert calls[-1] == "release" and calls.count("release") == 1
+        assert camera._grab_thread is None
+
+    def test_set_fps_under_cap_lock(self):
+        cap = MagicMock()
+        cap.isOpened.return_value = True
+        old_cap, old_fps = camera._cap, camera.fps
+        camera._cap = cap
+        try:
+            with camera._cap_lock:
+                thread = threading.Thread(target=camera.set_fps, args=(old_fps + 5,))
+                thread.start()
+                thread.join(0.05)
+                # 采集线程持有锁时不能修改正在使用的 cap
+                cap.set.assert_not_called()
+            thread.join()
+            cap.set.assert_called_once_with(cv2.CAP_PROP_FPS, old_fps + 5)
+        finally:
+            camera._cap = old_cap
+            camera.fps = old_fps
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from filter import (
+    BatchRunningMeanFilter,
+    KalmanFilter,
+    OneEuroFilter,
+    RunningMeanFilter,
+    RunningVarianceFilter,
+    SlidingWindowMeanFilter,
+)
+
+
+class TestLandMarkFilter(unittest.TestCase):
+    def run_filter(self, landmark_filter, speed: float):
+        rng = np.random.default_rng(0)
+        for i in range(90):
+            t = i / 30
+            true = np.full((21, 3), speed * t)
+            res = landmark_filter.push(true + rng.normal(0, 2, (21, 3)), t)
+        return true, res
+
+    def test_filter_reduce_jitter(self):
+        for landmark_filter in (OneEuroFilter(), KalmanFilter()):
+            true, res = self.run_filter(landmark_filter, 0)
+            assert res.shape == (21, 3)
+            assert np.std(res - true) < 1
+
+    def test_kalman_predict(self):
+        landmark_filter = KalmanFilter()
+        true, res = self.run_filter(landmark_filter, 300)
+        pred = landmark_filter.predict(0.1)
+        assert abs(np.mean(res - true)) < 2
+        assert abs(np.mean(pred - true) - 30) < 3
+
+
+class TestWindowFilter(unittest.TestCase):
+    def test_running_window_same_as_numpy(self):
+        points = np.random.default_rng(1).normal(0, 10, (100, 2))
+        running = RunningVarianceFilter(5)
+        batch = BatchRunningMeanFilter(5, (2,))
+        for point in points:
+            mean = running.push(tuple(point))
+            batch_mean = batch.push(point)
+        window = points[-5:]
+        assert np.allclose(mean, window.mean(axis=0))
+        assert np.allclose(batch_mean, window.mean(axis=0))
+        assert np.allclose(running.variance, window.var(axis=0))
+
+    def test_sliding_window_warm_up_not_alias(self):
+        sliding = SlidingWindowMeanFilter(5)
+        res = sliding.push((1, 2))
+        sliding.push((3, 4))
+        assert res == (1, 2)
+
+    def test_running_window_warm_up(self):
+        running = RunningMeanFilter(5)
+        sliding = SlidingWindowMeanFilter(5)
+        points = [(10, 20), (12, 22), (14, 24), (16, 26), (18, 28), (20, 30)]
+        res = [running.push(p) for p in points]
+        old = [sliding.push(p) for p in points]
+        # 不到半个窗口时直接返回输入
+        assert res[:2] == old[:2] == [(10, 20), (12, 22)]
+        # 未填满时只对已有的数据求平均，旧实现把空位当作 0
+        assert res[2] == (12, 22)
+        assert old[2] == (7.2, 13.2)
+        assert res[3] == (13, 23)
+        # 填满后两者相同
+        assert res[4:] == old[4:]
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from controllers.types import FrameTuple
+from controllers.flows.pipeline import SlotWriterNode, _release
+from utils.frame_pool import FramePool, hold_frame, mirror_rgb, release_frame
+from utils.slot import LatestSlot
+
+
+class TestFramePool(unittest.TestCase):
+    def test_held_buffer_not_reused(self):
+        pool = FramePool(2)
+        first = pool.acquire((4, 4, 3))
+        assert hold_frame(first[1:3])
+        for _ in range(6):
+            assert pool.acquire((4, 4, 3)) is not first
+        assert pool.allocations == 2
+        # 所有缓冲都被持有时多分配一个
+        second = pool.acquire((4, 4, 3))
+        assert hold_frame(second)
+        third = pool.acquire((4, 4, 3))
+        assert third is not first and third is not second
+        assert pool.allocations == 3
+        release_frame(second)
+
+        release_frame(first)
+        assert pool.held == 0
+        assert any(pool.acquire((4, 4, 3)) is first for _ in range(3))
+
+    def test_mirror_rgb_one_pass(self):
+        frame = np.random.randint(0, 255, (6, 8, 3), np.uint8)
+        pool = FramePool(2)
+        buf = pool.acquire(frame.shape)
+        assert mirror_rgb(frame, buf) is buf
+        assert (buf == frame[:, ::-1, ::-1]).all()
+        assert (mirror_rgb(frame[:, 1:]) == frame[:, :0:-1, ::-1]).all()
+        assert pool.allocations == 1 and pool.acquires == 1
+
+    def test_not_pooled(self):
+        assert not hold_frame(np.zeros((2, 2), np.uint8))
+        release_frame(np.zeros((2, 2), np.uint8))
+
+    def test_pipeline_handoff_holds_until_done(self):
+        pool = FramePool(2)
+        slot: LatestSlot[FrameTuple] = LatestSlot(_release)
+        writer = SlotWriterNode(slot)
+
+        frames = [FrameTuple(pool.acquire((2, 2, 3)), 2, 2, i) for i in range(3)]
+        for frame in frames:
+            writer.forward(frame)
+        # 被覆盖的两帧已经释放，只剩还没有被读取的一帧
+        assert pool.held == 1
+        frame = slot.get(0)
+        assert frame is frames[-1]
+        _release(frame)
+        assert pool.held == 0
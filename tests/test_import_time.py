@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+# 导入 server 只应该加载 fastapi、opencv 和 numpy，模型在第一次使用时才创建
+IMPORT_BUDGET = 3.0
+
+_SCRIPT = """
+import sys, time
+t_start = time.perf_counter()
+import server
+print(time.perf_counter() - t_start)
+print("mediapipe" in sys.modules)
+"""
+
+
+class TestImportTime(TestCase):
+    def test_import_server(self):
+        res = subprocess.run(
+            [sys.executable, "-c", _SCRIPT],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True,
+        )
+        cost, loaded = res.stdout.strip().splitlines()[-2:]
+        assert loaded == "False"
+        assert float(cost) < IMPORT_BUDGET, f"import server took {cost}s"
@@ -14,7 +14,11 @@ stdout_handler.setFormatter(
 )
 logger.addHandler(stdout_handler)
 
-config = {"is_dev": os.getenv("is_dev", "1") == "1"}
+config = {
+    "is_dev": os.getenv("is_dev", "1") == "1",
+    # 启动服务后在后台加载并预热手势模型
+    "warm_up": os.getenv("warm_up", "0") == "1",
+}
 
 
 def convert_str_to_camelCase(src: str) -> str:
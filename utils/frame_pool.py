@@ -0,0 +1,151 @@
+import threading
+import weakref
+
+import cv2
+import numpy as np
+
+# 缓冲的 id 到所属的 FramePool，hold_frame/release_frame 通过它找到缓冲所在的池；
+# id 可能被复用，FramePool.hold 会再检查缓冲确实在池中
+_owners: "weakref.WeakValueDictionary[int, FramePool]" = weakref.WeakValueDictionary()
+
+
+class FramePool:
+    """
+    预先分配好的帧缓冲环，按顺序循环复用，形状不变时稳定运行不会再分配内存；
+    被 hold 的缓冲在 release 之前不会再被 acquire 返回，所有缓冲都被持有时环会变大。
+    帧交给其他线程使用时，在交出之前 hold_frame，对方用完后 release_frame
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        self.size = size
+        self.shape: tuple[int, ...] | None = None
+        self.allocations = 0
+        self.acquires = 0
+        self._buffers: list[np.ndarray] = []
+        self._holds: dict[int, int] = {}
+        self._idx = 0
+        self._lock = threading.Lock()
+
+    def _new_buffer(self, shape: tuple[int, ...]) -> np.ndarray:
+        buf = np.empty(shape, np.uint8)
+        self._buffers.append(buf)
+        _owners[id(buf)] = self
+        self.allocations += 1
+        return buf
+
+    def _reset(self, shape: tuple[int, ...] | None):
+        for buf in self._buffers:
+            _owners.pop(id(buf), None)
+        # 换形状后旧缓冲不再复用，持有者之后的 release 直接忽略
+        self._buffers = []
+        self._holds = {}
+        self._idx = 0
+        self.shape = shape
+
+    def acquire(self, shape: tuple[int, ...]) -> np.ndarray:
+        with self._lock:
+            if shape != self.shape:
+                self._reset(shape)
+            self.acquires += 1
+            if len(self._buffers) < self.size:
+                return self._new_buffer(shape)
+            buffers = self._buffers
+            for _ in range(len(buffers)):
+                buf = buffers[self._idx]
+                self._idx = (self._idx + 1) % len(buffers)
+                if id(buf) not in self._holds:
+                    return buf
+            return self._new_buffer(shape)
+
+    def acquire_prefix(self, shape: tuple[int, ...], capacity: int) -> np.ndarray:
+        """
+        缓冲按 capacity 个字节固定分配，返回由前面 prod(shape) 个字节组成的连续数组；
+        用于每帧大小都不同、但不超过 capacity 的画面，大小变化时不会重新分配
+        """
+        size = int(np.prod(shape))
+        if size > capacity:
+            raise ValueError(f"shape {shape} exceeds pool capacity {capacity}")
+        return self.acquire((capacity,))[:size].reshape(shape)
+
+    def adopt(self, buf: np.ndarray, frame: np.ndarray) -> np.ndarray:
+        """
+        cv2 没有写入给定的 buf 而是返回了新数组时，用新数组替换掉 buf，之后复用它
+        """
+        if frame is buf:
+            return frame
+        with self._lock:
+            self.allocations += 1
+            if frame.shape != self.shape:
+                self._reset(frame.shape)
+                self._buffers = [frame]
+                _owners[id(frame)] = self
+                return frame
+            for idx, it in enumerate(self._buffers):
+                if it is buf:
+                    _owners.pop(id(buf), None)
+                    self._holds.pop(id(buf), None)
+                    self._buffers[idx] = frame
+                    _owners[id(frame)] = self
+                    break
+        return frame
+
+    def hold(self, buf: np.ndarray) -> bool:
+        with self._lock:
+            if not any(it is buf for it in self._buffers):
+                return False
+            self._holds[id(buf)] = self._holds.get(id(buf), 0) + 1
+            return True
+
+    def release(self, buf: np.ndarray):
+        with self._lock:
+            count = self._holds.get(id(buf), 0)
+            if count > 1:
+                self._holds[id(buf)] = count - 1
+            else:
+                self._holds.pop(id(buf), None)
+
+    @property
+    def held(self) -> int:
+        return len(self._holds)
+
+    def clear(self):
+        with self._lock:
+            self._reset(None)
+
+
+def _base(frame: np.ndarray) -> np.ndarray:
+    while isinstance(frame.base, np.ndarray):
+        frame = frame.base
+    return frame
+
+
+def hold_frame(frame: np.ndarray) -> bool:
+    """
+    frame 可以是缓冲本身或者它的视图；不是池中的缓冲时什么都不做，返回 False
+    """
+    buf = _base(frame)
+    pool = _owners.get(id(buf))
+    return pool is not None and pool.hold(buf)
+
+
+def release_frame(frame: np.ndarray):
+    buf = _base(frame)
+    pool = _owners.get(id(buf))
+    if pool is not None:
+        pool.release(buf)
+
+
+def mirror_rgb(frame: np.ndarray, dst: np.ndarray | None = None) -> np.ndarray:
+    """
+    一次 flip 同时完成水平镜像和 BGR 到 RGB 的转换：把 (h, w, 3) 看成 (h, w*3)，
+    整行反过来时像素的顺序和像素内的通道顺序一起反过来
+    """
+    height, width, channels = frame.shape
+    if dst is None:
+        dst = np.empty((height, width, channels), np.uint8)
+    cv2.flip(
+        np.ascontiguousarray(frame).reshape(height, width * channels),
+        1,
+        dst=dst.reshape(height, width * channels),
+    )
+    return dst
@@ -0,0 +1,53 @@
+import threading
+
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_Empty = object()
+
+
+class LatestSlot(Generic[T]):
+    """
+    单槽的最新值交接：写入总是覆盖旧值，旧值如果还没有被读取就会被丢弃并计入 drops
+    """
+
+    def __init__(self, on_drop: Callable[[T], None] | None = None) -> None:
+        """
+        on_drop 在值没有被读取就被覆盖或清空时调用，用来释放值持有的资源
+        """
+        self._cond = threading.Condition()
+        self._value: object = _Empty
+        self._on_drop = on_drop
+        self.puts = 0
+        self.drops = 0
+
+    @property
+    def has_value(self) -> bool:
+        return self._value is not _Empty
+
+    def put(self, value: T):
+        with self._cond:
+            if self._value is not _Empty:
+                self.drops += 1
+                if self._on_drop is not None:
+                    self._on_drop(self._value)  # type: ignore
+            self._value = value
+            self.puts += 1
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None) -> T:
+        with self._cond:
+            if not self._cond.wait_for(self._has_value, timeout):
+                raise TimeoutError("wait slot value time out")
+            value, self._value = self._value, _Empty
+            return value  # type: ignore
+
+    def clear(self):
+        with self._cond:
+            if self._value is not _Empty and self._on_drop is not None:
+                self._on_drop(self._value)  # type: ignore
+            self._value = _Empty
+
+    def _has_value(self) -> bool:
+        return self._value is not _Empty
@@ -1,14 +1,20 @@
 import ctypes
-import win32process
+
+try:
+    import win32process
+except ImportError:
+    win32process = None
 
 
 # 获取当前线程的句柄
 def get_current_thread():
-    return ctypes.windll.kernel32.GetCurrentThread()
+    return ctypes.windll.kernel32.GetCurrentThread()  # type: ignore
 
 
 # 设置线程优先级
 def set_thread_priority_to_high():
+    if win32process is None:
+        return
     win32process.SetThreadPriority(
         get_current_thread(), win32process.THREAD_PRIORITY_HIGHEST
     )